@@ -0,0 +1,46 @@
+"""
+One-off backfill of news_items.canonical_url for rows ingested before URL
+canonicalization existed. The oldest row of each canonical URL keeps it; later
+copies are left NULL (they were already ingested separately) and reported.
+
+Usage: python backfill_canonical_urls.py
+"""
+
+from database import SessionLocal
+from models import NewsItem
+from services.ingestor import canonicalize_url
+import main  # noqa: F401  (ensures the canonical_url column and index exist)
+
+BATCH_SIZE = 1000
+
+db = SessionLocal()
+try:
+    seen = {row[0] for row in db.query(NewsItem.canonical_url).filter(NewsItem.canonical_url != None)}
+    print(f"Backfilling canonical URLs ({len(seen)} already set)...")
+
+    updated = 0
+    duplicates = 0
+    last_id = 0
+    while True:
+        batch = db.query(NewsItem).filter(
+            NewsItem.canonical_url == None,
+            NewsItem.id > last_id
+        ).order_by(NewsItem.id).limit(BATCH_SIZE).all()
+        if not batch:
+            break
+
+        for item in batch:
+            last_id = item.id
+            canonical = canonicalize_url(item.url)
+            if canonical in seen:
+                duplicates += 1
+                continue
+            seen.add(canonical)
+            item.canonical_url = canonical
+            updated += 1
+        db.commit()
+        print(f"  ... {updated} updated, {duplicates} duplicates (last id {last_id})")
+
+    print(f"\n✅ Backfill completed: {updated} rows updated, {duplicates} cross-feed duplicates left without canonical URL")
+finally:
+    db.close()
@@ -0,0 +1,192 @@
+"""
+Concurrency benchmark for the SQLite setup in database.py.
+
+Runs the same workload against two throwaway databases: one with a default
+engine (rollback journal, 5s driver timeout, no write serialization) and one
+built by database.make_engine (WAL, tuned pragmas, write lock). A background
+process runs writer threads simulating sustained ingest (batches of inserts
+plus translation/extraction style updates) and threads polling the full News
+page query (/api/news/discovered, as the frontend does every few seconds).
+This process times small dashboard reads meanwhile. Reports small-read
+latency percentiles, write throughput and "database is locked" errors. The
+databases live next to news.db, so they see the same disk.
+
+Usage:
+    python bench_db.py                       # 15s per configuration
+    python bench_db.py --seconds 30 --writers 3 --pollers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, joinedload
+import models
+from database import make_engine
+
+SEED_ITEMS = 20000
+BATCH = 200
+HOLD_SECONDS = 0.1  # Work done while a write transaction is open (parsing, scoring...)
+
+
+def seed(session_factory):
+    db = session_factory()
+    source = models.Source(name="bench", type="RSS")
+    db.add(source)
+    db.flush()
+    db.bulk_insert_mappings(models.NewsItem, [
+        {"source_id": source.id, "title": f"Seed story {i}", "url": f"http://seed/{i}", "status": "DISCOVERED",
+         "published_date": f"2026-01-{i % 28 + 1:02d}", "content_snippet": "Lorem ipsum " * 20}
+        for i in range(SEED_ITEMS)
+    ])
+    db.commit()
+    source_id = source.id
+    db.close()
+    return source_id
+
+
+def writer(session_factory, source_id, stop, stats, index):
+    rng = random.Random(index)
+    counter = 0
+    while not stop.is_set():
+        db = session_factory()
+        try:
+            # Ingest: a batch of new items
+            for _ in range(BATCH):
+                counter += 1
+                db.add(models.NewsItem(source_id=source_id, title=f"Writer {index} story {counter}",
+                                       url=f"http://w{index}/{counter}", status="DISCOVERED",
+                                       published_date="2026-02-01", content_snippet="Lorem ipsum " * 20))
+            db.flush()
+            time.sleep(HOLD_SECONDS)
+            db.commit()
+            # Translation/extraction: update existing rows
+            ids = [rng.randint(1, SEED_ITEMS) for _ in range(BATCH)]
+            db.query(models.NewsItem).filter(models.NewsItem.id.in_(ids)).update(
+                {"title_es": f"Traducido {counter}", "entities_extracted": True}, synchronize_session=False)
+            db.commit()
+            stats["writes"] += 2
+        except OperationalError as e:
+            db.rollback()
+            stats["write_errors"] += 1
+            stats["last_error"] = str(e.orig)
+        finally:
+            db.close()
+        time.sleep(0.01)
+
+
+def poller(session_factory, stop, stats):
+    """The News page poll: every discovered item with source and entities."""
+    while not stop.is_set():
+        db = session_factory()
+        try:
+            db.query(models.NewsItem).options(
+                joinedload(models.NewsItem.source),
+                joinedload(models.NewsItem.entities)
+            ).filter(models.NewsItem.status == "DISCOVERED").order_by(models.NewsItem.published_date.desc()).all()
+        except OperationalError as e:
+            stats["poll_errors"] += 1
+            stats["last_error"] = str(e.orig)
+        finally:
+            db.close()
+        time.sleep(0.5)
+
+
+def reader(session_factory, stop, stats):
+    """Small API reads (the dashboard counters), timed."""
+    while not stop.is_set():
+        db = session_factory()
+        start = time.perf_counter()
+        try:
+            db.query(models.Source).count()
+            db.query(models.NewsItem).filter(models.NewsItem.status == "DISCOVERED").count()
+            stats["latencies"].append(time.perf_counter() - start)
+        except OperationalError as e:
+            stats["read_errors"] += 1
+            stats["last_error"] = str(e.orig)
+        finally:
+            db.close()
+        time.sleep(0.05)
+
+
+def build_engine(url, tuned):
+    if tuned:
+        return make_engine(url)
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def load_process(url, tuned, source_id, writers, pollers, stop, results):
+    """Background load: ingest writers plus News page pollers, in their own process."""
+    engine = build_engine(url, tuned)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    stats = {"writes": 0, "write_errors": 0, "poll_errors": 0, "last_error": None}
+    local_stop = threading.Event()
+    threads = [threading.Thread(target=writer, args=(session_factory, source_id, local_stop, stats, i)) for i in range(writers)]
+    threads += [threading.Thread(target=poller, args=(session_factory, local_stop, stats)) for _ in range(pollers)]
+    for thread in threads:
+        thread.start()
+    stop.wait()
+    local_stop.set()
+    for thread in threads:
+        thread.join()
+    write_lock = getattr(engine, "write_lock", None)
+    stats["write_lock"] = write_lock.stats() if write_lock is not None else None
+    results.put(stats)
+
+
+def run(label, url, tuned, seconds, writers, pollers, readers):
+    engine = build_engine(url, tuned)
+    models.Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    source_id = seed(session_factory)
+
+    stats = {"latencies": [], "read_errors": 0, "last_error": None}
+    stop = threading.Event()
+    process_stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=load_process, args=(url, tuned, source_id, writers, pollers, process_stop, results))
+    process.start()
+    threads = [threading.Thread(target=reader, args=(session_factory, stop, stats)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    process_stop.set()
+    for thread in threads:
+        thread.join()
+    stats.update({key: value for key, value in results.get().items() if value is not None or key not in stats})
+    process.join()
+    engine.dispose()
+
+    latencies = sorted(stats["latencies"]) or [0.0]
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"{label}")
+    print(f"  small reads: {len(stats['latencies'])}, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {pct(0.95):.1f} ms, p99 {pct(0.99):.1f} ms, max {latencies[-1] * 1000:.1f} ms, errors {stats['read_errors']}")
+    print(f"  write transactions: {stats['writes']} ({stats['writes'] / seconds:.1f}/s), errors {stats['write_errors']}; "
+          f"page poll errors {stats['poll_errors']}")
+    if stats["write_lock"]:
+        print(f"  write lock (writer process): {stats['write_lock']}")
+    if stats["last_error"]:
+        print(f"  last error: {stats['last_error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite read latency under ingest load")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--writers", type=int, default=3)
+    parser.add_argument("--pollers", type=int, default=2, help="Threads polling the full News page query")
+    parser.add_argument("--readers", type=int, default=2, help="Threads issuing small timed reads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=".") as tmp:
+        run("Default engine (rollback journal)", f"sqlite:///{os.path.join(tmp, 'default.db')}", False,
+            args.seconds, args.writers, args.pollers, args.readers)
+        run("database.make_engine (WAL + pragmas + write lock)", f"sqlite:///{os.path.join(tmp, 'tuned.db')}", True,
+            args.seconds, args.writers, args.pollers, args.readers)
@@ -0,0 +1,110 @@
+"""
+Benchmark of entity resolution as the entities table grows.
+
+Builds throwaway SQLite databases with 1k, 10k and 100k entities and runs the
+extractor's resolve-and-link step over the same articles on each, reporting
+milliseconds per article. For comparison it also times the per-name
+`Entity.name.ilike(...)` lookup the extractor used to run, and the cost per
+batch of rebuilding the watch list PhraseMatcher from scratch (as it used to
+be done) against syncing the long-lived one. A blank SpaCy
+pipeline with an entity ruler stands in for the NER model, so only the
+database side is measured. Nothing touches news.db.
+
+Usage:
+    python bench_entities.py
+    python bench_entities.py --sizes 1000,100000 --items 500
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import spacy
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+import models
+from models import Entity, NewsItem, Source, normalize_entity_name
+from spacy.matcher import PhraseMatcher
+from services import extractor, entity_index, watchlist
+
+MENTIONS_PER_ITEM = 6
+
+
+def build_db(path: str, size: int, item_count: int, rng: random.Random):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    names = [f"Entidad {i}" for i in range(size)]
+    with engine.begin() as conn:
+        conn.execute(insert(Entity), [
+            {"name": name, "normalized_name": normalize_entity_name(name), "type": "ORGANIZATION", "is_ignored": False}
+            for name in names
+        ])
+    db = sessionmaker(bind=engine)()
+    source = Source(name="bench", type="RSS")
+    db.add(source)
+    db.flush()
+    mentions = []
+    for i in range(item_count):
+        # Mostly known entities, plus one new name per article
+        picked = rng.sample(names, MENTIONS_PER_ITEM - 1) + [f"Nueva {i}"]
+        mentions.append(picked)
+        db.add(NewsItem(source_id=source.id, title=" y ".join(picked), url=f"http://bench/{i}", language="es"))
+    db.commit()
+    return engine, db, mentions
+
+
+def make_nlp(mentions):
+    nlp = spacy.blank("es")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "ORG", "pattern": name} for names in mentions for name in set(names)])
+    return nlp
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entity resolution vs. entities table size")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--items", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'entities':>9} {'index load':>11} {'new ms/item':>12} {'ILIKE ms/item':>14}"
+          f" {'matcher rebuild':>16} {'first sync':>11} {'batch sync':>11}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rng = random.Random(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            engine, db, mentions = build_db(os.path.join(tmp, "bench.db"), size, args.items, rng)
+            nlp = make_nlp(mentions)
+            items = db.query(NewsItem).order_by(NewsItem.id).all()
+
+            entity_index.reset()
+            start = time.time()
+            entity_index.get(db)
+            load = time.time() - start
+
+            start = time.time()
+            extractor._extract_items(db, nlp, items, None, set())
+            db.commit()
+            new = (time.time() - start) * 1000 / len(items)
+
+            sample = mentions[:50]
+            start = time.time()
+            for names in sample:
+                for name in names:
+                    db.query(Entity).filter(Entity.name.ilike(name)).first()
+            old = (time.time() - start) * 1000 / len(sample)
+
+            start = time.time()
+            rebuilt = PhraseMatcher(nlp.vocab, attr="LOWER")
+            rebuilt.add("WATCH_LIST", [nlp.make_doc(e.name) for e in db.query(Entity).filter(Entity.is_ignored == False)])
+            rebuild = time.time() - start
+
+            start = time.time()
+            watchlist.get(db, nlp)
+            first_sync = time.time() - start
+            start = time.time()
+            watchlist.get(db, nlp)
+            batch_sync = time.time() - start
+
+            db.close()
+            engine.dispose()
+        print(f"{size:>9} {load:>10.2f}s {new:>12.2f} {old:>14.2f} {rebuild:>15.2f}s {first_sync:>10.2f}s {batch_sync:>10.3f}s")
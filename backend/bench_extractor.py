@@ -0,0 +1,69 @@
+"""
+Benchmark of the extractor's SpaCy paths on stored news items.
+
+Compares the previous per-item path (full pipeline, one nlp(text) call per
+item) with the batched one the extractor now uses (only the NER components,
+nlp.pipe with NLP_BATCH_SIZE / NLP_N_PROCESS). Texts are built exactly like
+the extractor builds them; if the database holds fewer items than requested
+they are repeated to reach the count. Nothing is written to the database.
+
+Usage:
+    python bench_extractor.py                                  # 2000 items, env settings
+    python bench_extractor.py --items 5000 --batch-size 128 --n-process 4
+"""
+
+import argparse
+import time
+import spacy
+from database import SessionLocal
+from models import NewsItem
+from services import extractor
+
+
+def load_texts(count: int):
+    db = SessionLocal()
+    try:
+        items = db.query(NewsItem).order_by(NewsItem.id.desc()).limit(count).all()
+        texts = [extractor._item_text(item) for item in items]
+    finally:
+        db.close()
+    if not texts:
+        raise SystemExit("No hay noticias en la base de datos para el benchmark")
+    if len(texts) < count:
+        print(f"Only {len(texts)} stored items, repeating them to reach {count}")
+        texts = (texts * (count // len(texts) + 1))[:count]
+    return texts
+
+
+def report(label: str, count: int, elapsed: float, entities: int):
+    print(f"{label:<32} {count / elapsed:8.1f} docs/s  ({elapsed:.1f}s, {entities} entities)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extractor SpaCy throughput benchmark")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=extractor.NLP_BATCH_SIZE)
+    parser.add_argument("--n-process", type=int, default=extractor.NLP_N_PROCESS)
+    args = parser.parse_args()
+
+    texts = load_texts(args.items)
+    print(f"Model {extractor.SPACY_MODEL}, {len(texts)} texts")
+
+    full = spacy.load(extractor.SPACY_MODEL)
+    print(f"Old path components: {', '.join(full.pipe_names)}")
+    start = time.time()
+    entities = sum(len(full(text).ents) for text in texts)
+    old = time.time() - start
+    report("old: nlp(text) per item", len(texts), old, entities)
+    del full
+
+    nlp = spacy.load(extractor.SPACY_MODEL)
+    nlp.select_pipes(disable=extractor.unneeded_pipes(nlp))
+    print(f"New path components: {', '.join(nlp.pipe_names)}")
+    start = time.time()
+    docs = nlp.pipe(texts, batch_size=args.batch_size, n_process=args.n_process)
+    entities = sum(len(doc.ents) for doc in docs)
+    new = time.time() - start
+    report(f"new: nlp.pipe (batch {args.batch_size}, x{args.n_process})", len(texts), new, entities)
+
+    print(f"Speed-up: {old / new:.2f}x")
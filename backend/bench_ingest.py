@@ -0,0 +1,155 @@
+"""
+Benchmark of concurrent feed fetching in ingestor.process_feeds.
+
+Starts stub feed servers on several loopback hosts (127.0.0.1, 127.0.0.2,
+...), each answering after --latency seconds with an RSS body of --entries
+fresh items, then runs one full scan against a throwaway SQLite database.
+Reports the scan's wall-clock time next to the serial sum of the per-feed
+fetch latencies the scan recorded. It fails unless the scan took no longer
+than the fetch rounds the concurrency limits force, i.e.
+latency * max(ceil(feeds per host / INGEST_MAX_PER_HOST),
+ceil(feeds / INGEST_MAX_CONCURRENCY)), plus the same scan against
+zero-latency servers (parsing and inserts) plus --slack. The parse pool is
+started before the clock runs, as it is once per process in the API/worker.
+Nothing touches news.db.
+
+Usage:
+    python bench_ingest.py
+    python bench_ingest.py --feeds 60 --hosts 10 --latency 0.5 --entries 30
+"""
+
+import argparse
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("gobierno", "mercado", "elecciones", "acuerdo", "ciudad", "tribunal", "empresa", "ministro",
+         "crisis", "reforma", "puerto", "energía", "salud", "frontera", "banco", "cumbre", "huelga", "récord")
+
+
+def feed_body(host: str, feed: int, entries: int, rng: random.Random) -> bytes:
+    now = format_datetime(datetime.now(timezone.utc))
+    items = []
+    for i in range(entries):
+        title = " ".join(rng.choice(WORDS) for _ in range(8)).capitalize()
+        summary = " ".join(rng.choice(WORDS) for _ in range(60))
+        items.append(f"<item><title>{title} {feed}-{i}</title><link>http://{host}/f{feed}/{i}</link>"
+                     f"<pubDate>{now}</pubDate><description>&lt;p&gt;{summary}&lt;/p&gt;</description></item>")
+    return (f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>Feed {feed}</title>"
+            f"{''.join(items)}</channel></rss>").encode("utf-8")
+
+
+def start_servers(hosts: int, feeds: int, entries: int, latency: float):
+    """One threaded stub server per loopback host; returns (servers, feed urls)."""
+    rng = random.Random(1)
+    servers, urls = [], []
+    for h in range(hosts):
+        address = f"127.0.0.{h + 1}"
+        bodies = {}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self, bodies=bodies):
+                time.sleep(latency)
+                body = bodies.get(self.path)
+                self.send_response(200 if body else 404)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((address, 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        for feed in range(h, feeds, hosts):
+            host = f"{address}:{server.server_port}"
+            bodies[f"/feed{feed}.xml"] = feed_body(host, feed, entries, rng)
+            urls.append(f"http://{host}/feed{feed}.xml")
+    return servers, urls
+
+
+def scan(args, latency: float):
+    """One full scan of fresh stub servers into a throwaway database; returns (created, stats, seconds)."""
+    from sqlalchemy import insert
+    from sqlalchemy.orm import sessionmaker
+    from database import make_engine
+    from services import ingestor
+    import models
+
+    servers, urls = start_servers(args.hosts, args.feeds, args.entries, latency)
+    with tempfile.TemporaryDirectory(dir=".") as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'ingest.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(insert(models.Source), [
+                {"name": f"Feed {i}", "type": "RSS", "config": {"url": url}} for i, url in enumerate(urls)
+            ])
+
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        stats = {}
+        start = time.perf_counter()
+        created, _ = ingestor.process_feeds(db, stats=stats)
+        elapsed = time.perf_counter() - start
+        db.close()
+        engine.dispose()
+    for server in servers:
+        server.shutdown()
+
+    assert stats["failed"] == 0, "some feeds failed"
+    assert created == args.feeds * args.entries, f"expected {args.feeds * args.entries} items"
+    return created, stats, elapsed
+
+
+def run(args):
+    from services import ingestor
+
+    pool = ingestor.get_parse_pool()
+    if pool is not None:
+        wait([pool.submit(time.sleep, 0.1) for _ in range(ingestor.PARSE_WORKERS)])
+
+    # The same scan with instant servers: what parsing and inserting cost on their own
+    # (the first one also warms up langdetect and the parse workers)
+    scan(args, 0.0)
+    _, _, baseline = scan(args, 0.0)
+    created, stats, elapsed = scan(args, args.latency)
+    ingestor.reset_parse_pool()
+
+    # Every feed takes `latency`; the busiest host gets its feeds a few at a time
+    feeds_per_host = math.ceil(args.feeds / args.hosts)
+    rounds = max(math.ceil(feeds_per_host / ingestor.MAX_FETCHES_PER_HOST),
+                 math.ceil(args.feeds / ingestor.MAX_CONCURRENT_FETCHES))
+    fetch_bound = args.latency * rounds
+    bound = fetch_bound + baseline + args.slack
+
+    latencies = [s["latency_ms"] / 1000 for s in stats["sources"].values() if s["latency_ms"] is not None]
+    serial = sum(latencies)
+    print(f"\n{args.feeds} feeds on {args.hosts} hosts, {args.latency:.2f}s each, {args.entries} entries per feed")
+    print(f"  items created:      {created} ({stats['fetched']} feeds parsed, {stats['failed']} failed)")
+    print(f"  scan wall-clock:    {elapsed:.2f}s")
+    print(f"  serial fetch sum:   {serial:.2f}s ({serial / elapsed:.1f}x the scan)")
+    print(f"  fetch rounds:       {rounds} x {args.latency:.2f}s = {fetch_bound:.2f}s "
+          f"(up to {ingestor.MAX_FETCHES_PER_HOST} per host, {ingestor.MAX_CONCURRENT_FETCHES} in total)")
+    print(f"  zero-latency scan:  {baseline:.2f}s")
+    print(f"  allowed:            {bound:.2f}s (with {args.slack:.2f}s slack)")
+    assert elapsed <= bound, (f"the scan took {elapsed:.2f}s; the slowest host's fetch rounds plus parsing "
+                              f"allow {bound:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="process_feeds wall-clock vs serial fetch time")
+    parser.add_argument("--feeds", type=int, default=40)
+    parser.add_argument("--hosts", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds each stub feed takes to answer")
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--slack", type=float, default=0.5, help="Seconds allowed on top of fetch rounds + zero-latency scan")
+    run(parser.parse_args())
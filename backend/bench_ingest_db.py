@@ -0,0 +1,132 @@
+"""
+Benchmark of the ingestor's per-feed database work.
+
+Builds a synthetic set of --entries feed entries split into feeds of
+--per-feed, a --known share of them already stored, and runs it through two
+paths on fresh throwaway SQLite databases:
+
+  former  one `query(NewsItem).filter(url == link).first()` per entry, then
+          `db.add` + `db.flush()` per new item, one commit per feed
+  bulk    ingestor.existing_urls (one IN query per chunk, by raw and by
+          canonical URL) and ingestor.bulk_insert_items (one executemany
+          returning the ids), one commit per feed
+
+Reports the SQL statements sent to the driver (counted with a
+before_cursor_execute listener) and the elapsed time of each path. Feed
+parsing is not included. Nothing touches news.db.
+
+Usage:
+    python bench_ingest_db.py
+    python bench_ingest_db.py --entries 10000 --per-feed 100 --known 0.5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import event, insert
+from sqlalchemy.orm import sessionmaker
+import models
+from database import make_engine
+from services import ingestor
+
+SEED_ITEMS = 20000
+
+
+def build_entries(total: int, per_feed: int, known: float, rng: random.Random):
+    """Feeds of entries (url, canonical_url, row fields); returns (feeds, urls to pre-store)."""
+    feeds, stored = [], []
+    for start in range(0, total, per_feed):
+        feed = []
+        for i in range(start, min(total, start + per_feed)):
+            url = f"https://www.bench.example/story/{i}?utm_source=rss"
+            entry = {
+                "url": url, "canonical_url": ingestor.canonicalize_url(url), "title": f"Noticia {i}",
+                "published_date": "2026-01-01T00:00:00+00:00", "status": "DISCOVERED", "language": "es",
+                "content_snippet": "Lorem ipsum dolor sit amet " * 10,
+            }
+            feed.append(entry)
+            if rng.random() < known:
+                stored.append(entry)
+        feeds.append(feed)
+    return feeds, stored
+
+
+def former_path(db, source_id, feeds):
+    created = 0
+    for feed in feeds:
+        for entry in feed:
+            if db.query(models.NewsItem).filter(models.NewsItem.url == entry["url"]).first():
+                continue
+            db.add(models.NewsItem(source_id=source_id, title=entry["title"], url=entry["url"],
+                                   published_date=entry["published_date"], status=entry["status"],
+                                   language=entry["language"], content_snippet=entry["content_snippet"]))
+            db.flush()
+            created += 1
+        db.commit()
+    return created
+
+
+def bulk_path(db, source_id, feeds):
+    created = 0
+    for feed in feeds:
+        known = ingestor.existing_urls(db, [e["url"] for e in feed])
+        known_canonical = ingestor.existing_urls(db, [e["canonical_url"] for e in feed], models.NewsItem.canonical_url)
+        rows = [
+            dict(e, source_id=source_id) for e in feed
+            if e["url"] not in known and e["canonical_url"] not in known_canonical
+        ]
+        created += len(ingestor.bulk_insert_items(db, rows))
+        db.commit()
+    return created
+
+
+def run(label, path, url, feeds, stored):
+    engine = make_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Source), [{"name": "bench", "type": "RSS", "config": {"url": "http://bench/rss"}}])
+        # Unrelated archive rows, so lookups hit a realistically sized index
+        conn.execute(insert(models.NewsItem), [
+            {"source_id": 1, "title": f"Archivo {i}", "url": f"https://archive.example/{i}",
+             "canonical_url": f"https://archive.example/{i}", "status": "APPROVED"}
+            for i in range(SEED_ITEMS)
+        ])
+        if stored:
+            conn.execute(insert(models.NewsItem), [dict(e, source_id=1) for e in stored])
+
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    start = time.perf_counter()
+    created = path(db, 1, feeds)
+    elapsed = time.perf_counter() - start
+    db.close()
+    engine.dispose()
+
+    entries = sum(len(feed) for feed in feeds)
+    print(f"{label:8s} created {created:6d}  statements {statements[0]:7d} ({statements[0] / entries:.2f}/entry)  "
+          f"{elapsed:7.2f}s ({entries / elapsed:,.0f} entries/s)")
+    return created
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-entry vs set-based URL dedup and insert")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--per-feed", type=int, default=100)
+    parser.add_argument("--known", type=float, default=0.5, help="Share of entries already stored")
+    args = parser.parse_args()
+
+    feeds, stored = build_entries(args.entries, args.per_feed, args.known, random.Random(1))
+    print(f"{args.entries} entries in {len(feeds)} feeds, {len(stored)} already stored")
+    with tempfile.TemporaryDirectory(dir=".") as tmp:
+        results = [
+            run("former", former_path, f"sqlite:///{os.path.join(tmp, 'former.db')}", feeds, stored),
+            run("bulk", bulk_path, f"sqlite:///{os.path.join(tmp, 'bulk.db')}", feeds, stored),
+        ]
+    assert results[0] == results[1], "both paths must create the same items"
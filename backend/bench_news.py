@@ -0,0 +1,136 @@
+"""
+Benchmark of the news listings as the archive grows.
+
+Builds throwaway SQLite databases with 10k, 100k and 300k approved items
+(each linked to a few entities) and times, through the API, the first page,
+a page deep in the archive (reached by following cursors), an entity-filtered
+page and what a polling client pays: a revalidation answered with 304 and a
+delta (/api/news/changes) carrying --changed updated items. For comparison it
+also times the former response: every approved item with its source and
+entities in one call (skipped above --full-max items, where it takes
+minutes). Nothing touches news.db.
+
+Usage:
+    python bench_news.py
+    python bench_news.py --sizes 10000,100000 --limit 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ENTITIES = 2000
+ENTITIES_PER_ITEM = 4
+
+
+def build_db(url: str, size: int, rng: random.Random):
+    from sqlalchemy import insert
+    from database import make_engine
+    import models
+
+    engine = make_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Source), [{"name": "bench", "type": "RSS", "config": {"url": "http://bench/rss"}}])
+        conn.execute(insert(models.Entity), [
+            {"name": f"Entidad {i}", "normalized_name": f"entidad {i}", "type": "ORGANIZATION", "is_ignored": False}
+            for i in range(1, ENTITIES + 1)
+        ])
+        for start in range(0, size, 10000):
+            ids = range(start + 1, min(size, start + 10000) + 1)
+            conn.execute(insert(models.NewsItem), [
+                {"id": i, "source_id": 1, "title": f"Noticia {i}", "url": f"http://bench/{i}", "language": "es",
+                 "status": "APPROVED", "entities_extracted": True,
+                 # Several items per second, so equal dates are common
+                 "published_date": f"2025-{1 + i * 12 // (size + 1):02d}-01T00:{(i // 7) % 60:02d}:{(i // 3) % 60:02d}+00:00"}
+                for i in ids
+            ])
+            conn.execute(insert(models.news_entities), [
+                {"news_id": i, "entity_id": entity_id}
+                for i in ids for entity_id in rng.sample(range(1, ENTITIES + 1), ENTITIES_PER_ITEM)
+            ])
+    engine.dispose()
+
+
+def timed(client, path, params, repeat=5, headers=None, status=200):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path, params=params, headers=headers)
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == status, response.text
+        best = elapsed if best is None else min(best, elapsed)
+    return best, response.json() if status == 200 else None
+
+
+def run(size: int, limit: int, deep_pages: int, full_max: int, changed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        # database reads DATABASE_URL at import; each size runs in its own process
+        os.environ.update(DATABASE_URL=url, EMBEDDED_WORKER="0", SCHEDULER_ENABLED="0")
+        build_db(url, size, random.Random(size))
+        import logging
+        logging.disable(logging.WARNING)
+        from fastapi.testclient import TestClient
+        from sqlalchemy.orm import joinedload
+        import main
+        import models
+        import schemas
+        from services import changes
+
+        client = TestClient(main.app)
+        first, data = timed(client, "/api/news/approved", {"limit": limit})
+        cursor = data["next_cursor"]
+        for _ in range(deep_pages):
+            cursor = client.get("/api/news/approved", params={"limit": limit, "cursor": cursor}).json()["next_cursor"]
+        deep, _ = timed(client, "/api/news/approved", {"limit": limit, "cursor": cursor})
+        entity, _ = timed(client, "/api/news/approved", {"limit": limit, "entity_id": 7})
+
+        etag = client.get("/api/news/approved", params={"limit": limit}).headers["etag"]
+        revalidate, _ = timed(client, "/api/news/approved", {"limit": limit}, headers={"If-None-Match": etag}, status=304)
+        db = main.SessionLocal()
+        changes.touch(db, models.NewsItem.id.in_(random.Random(size).sample(range(1, size + 1), changed)))
+        db.commit()
+        db.close()
+        poll, delta = timed(client, "/api/news/changes", {"since": data["seq"], "status": "APPROVED"})
+        assert len(delta["items"]) == changed, delta
+
+        full = None
+        if size <= full_max:
+            db = main.SessionLocal()
+            start = time.perf_counter()
+            items = db.query(models.NewsItem).options(
+                joinedload(models.NewsItem.source),
+                joinedload(models.NewsItem.entities)
+            ).filter(models.NewsItem.status == "APPROVED").order_by(models.NewsItem.published_date.desc()).all()
+            [schemas.NewsItemResponse.model_validate(item).model_dump(mode="json") for item in items]
+            full = (time.perf_counter() - start) * 1000
+            db.close()
+
+        full_text = f"{full:>10.0f}" if full is not None else f"{'-':>10}"
+        print(f"{size:>9} {first:>11.1f} {deep:>11.1f} {entity:>12.1f} {revalidate:>9.1f} {poll:>10.1f} {full_text}", flush=True)
+        main.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="News listing latency vs. archive size")
+    parser.add_argument("--sizes", default="10000,100000,300000")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--deep-pages", type=int, default=100, help="Cursors followed before timing the deep page")
+    parser.add_argument("--full-max", type=int, default=100000, help="Largest archive to time the full list on")
+    parser.add_argument("--changed", type=int, default=20, help="Items updated before timing the delta poll")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size:
+        run(args.size, args.limit, args.deep_pages, args.full_max, args.changed)
+        sys.exit()
+
+    import subprocess
+    print(f"{'items':>9} {'first (ms)':>11} {'deep (ms)':>11} {'entity (ms)':>12} {'304 (ms)':>9} {'poll (ms)':>10} {'full (ms)':>10}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        subprocess.run([sys.executable, __file__, "--size", str(size), "--limit", str(args.limit),
+                        "--deep-pages", str(args.deep_pages), "--full-max", str(args.full_max), "--changed", str(args.changed)], check=True)
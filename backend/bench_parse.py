@@ -0,0 +1,92 @@
+"""
+Benchmark of the ingestor's CPU stage against the number of parse workers.
+
+Generates --feeds synthetic RSS bodies of --entries fresh entries each (HTML
+descriptions in several languages) and pushes them through the same stages
+process_feeds uses: parse_feed_entries per feed, then prepare_entries (HTML
+cleaning, language detection, fingerprint) on its entries, streamed back as
+each future completes. Runs inline (0 workers, as INGEST_PARSE_WORKERS=0)
+and with spawn process pools of each --workers size, started before the
+clock runs, and reports entries per second and the speedup over inline.
+
+Usage:
+    python bench_parse.py                     # 0, 1, 2, 4... up to the CPU count
+    python bench_parse.py --feeds 200 --entries 50 --workers 1,2,4,8
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from services import ingestor
+
+TEXTS = {
+    "en": "the government announced a new agreement with the unions after weeks of talks about wages and pensions",
+    "es": "el gobierno anunció un nuevo acuerdo con los sindicatos tras semanas de negociación sobre salarios",
+    "fr": "le gouvernement a annoncé un nouvel accord avec les syndicats après des semaines de négociations",
+    "de": "die regierung kündigte nach wochenlangen gesprächen eine neue vereinbarung mit den gewerkschaften an",
+}
+
+
+def feed_body(feed: int, entries: int, rng: random.Random) -> bytes:
+    now = format_datetime(datetime.now(timezone.utc))
+    items = []
+    for i in range(entries):
+        words = TEXTS[rng.choice(list(TEXTS))].split()
+        rng.shuffle(words)
+        text = " ".join(words)
+        html = (f"&lt;div class=&quot;body&quot;&gt;&lt;p&gt;{text}&lt;/p&gt;&lt;p&gt;&lt;a href=&quot;#&quot;&gt;"
+                f"{text}&lt;/a&gt; {text}&lt;/p&gt;&lt;img src=&quot;x.jpg&quot;/&gt;&lt;/div&gt;")
+        items.append(f"<item><title>{' '.join(words[:8])} {feed}-{i}</title>"
+                     f"<link>https://bench.example/f{feed}/{i}?utm_source=rss</link>"
+                     f"<pubDate>{now}</pubDate><description>{html}</description></item>")
+    return (f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>Feed {feed}</title>"
+            f"{''.join(items)}</channel></rss>").encode("utf-8")
+
+
+def run(bodies, workers: int) -> float:
+    """Entries per second through parse + prepare with `workers` processes (0 = inline)."""
+    pool = None
+    if workers:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        wait([pool.submit(time.sleep, 0.2) for _ in range(workers)])
+    cutoff_iso = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+
+    start = time.perf_counter()
+    stages = {ingestor._submit(pool, ingestor.parse_feed_entries, body, cutoff_iso): "PARSE" for body in bodies}
+    prepared = 0
+    while stages:
+        done, _ = wait(stages, return_when=FIRST_COMPLETED)
+        for future in done:
+            if stages.pop(future) == "PARSE":
+                stages[ingestor._submit(pool, ingestor.prepare_entries, future.result())] = "PREPARE"
+            else:
+                prepared += len(future.result())
+    elapsed = time.perf_counter() - start
+    if pool is not None:
+        pool.shutdown()
+    return prepared / elapsed
+
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, cpus} | {2 ** n for n in range(1, 8) if 2 ** n <= cpus})
+    parser = argparse.ArgumentParser(description="Ingest parse/clean/detect throughput vs parse workers")
+    parser.add_argument("--feeds", type=int, default=100)
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="Comma-separated pool sizes (inline always runs first)")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    bodies = [feed_body(feed, args.entries, rng) for feed in range(args.feeds)]
+    print(f"{args.feeds} feeds x {args.entries} entries, {cpus} CPUs")
+    inline = run(bodies, 0)
+    print(f"  inline      {inline:8,.0f} entries/s")
+    for workers in (int(w) for w in args.workers.split(",")):
+        rate = run(bodies, workers)
+        print(f"  {workers:2d} workers  {rate:8,.0f} entries/s  ({rate / inline:.2f}x inline)")
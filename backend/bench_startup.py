@@ -0,0 +1,61 @@
+"""
+Startup benchmark for the API process.
+
+Imports `main` in fresh interpreters (what uvicorn does on every start and
+--reload) and reports the time until the app is ready and the peak RSS, then
+the same with the SpaCy model loaded, which is what every start used to pay
+when the extractor loaded it at import time.
+
+Usage:
+    python bench_startup.py            # 5 runs of each
+    python bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+ready = time.perf_counter() - start
+if {load_model}:
+    from services import extractor
+    extractor.warm_up()
+total = time.perf_counter() - start
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    rss = 0.0
+print(json.dumps({{"ready": ready, "total": total, "rss_mb": rss, "spacy": "spacy" in sys.modules}}))
+"""
+
+
+def probe(load_model: bool) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(load_model=load_model)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(label: str, runs: int, load_model: bool):
+    samples = [probe(load_model) for _ in range(runs)]
+    ready = statistics.median(s["ready"] for s in samples)
+    total = statistics.median(s["total"] for s in samples)
+    rss = max(s["rss_mb"] for s in samples)
+    spacy_loaded = any(s["spacy"] for s in samples)
+    print(f"{label:<28} import {ready:6.2f}s  total {total:6.2f}s  peak RSS {rss:7.1f} MB  spacy imported: {spacy_loaded}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API startup time and memory")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    run("API (lazy model)", args.runs, load_model=False)
+    run("API + model (eager load)", args.runs, load_model=True)
@@ -0,0 +1,369 @@
+"""
+Local fake Groq server for translation load tests.
+
+Serves /openai/v1/chat/completions with the same response shape and
+rate-limit headers as Groq, enforcing its own RPM/TPM quota and answering
+429 + retry-after when a client exceeds it. "Translations" are the original
+text prefixed with [ES]; --drop-rate makes it leave ids out of the JSON at
+random, like the real model sometimes does. --check runs scripted failure
+scenarios (ids never translated, outages, a revoked key) against the
+translator and asserts how attempts and FAILED are handled.
+
+Usage:
+    python fake_groq.py --rpm 30 --tpm 6000            # just serve on :8099
+    python fake_groq.py --rpm 30 --tpm 6000 --drain 500  # serve + time a 500 item backlog
+    python fake_groq.py --drain 500 --fixed-size 5       # same backlog with fixed 5-item batches
+    python fake_groq.py --drain 500 --drop-rate 0.3      # 30% of ids missing from each response
+    python fake_groq.py --drain 500 --break-rate 0.3     # 30% of streams cut off midway
+    python fake_groq.py --check                          # assert retry / FAILED behaviour
+    TRANSLATE_STREAM=0 python fake_groq.py --drain 500   # buffered responses, for comparison
+
+Point the backend at it with:
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=fake
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Quota:
+    """
+    Groq-style quota: requests and tokens replenish continuously up to their
+    per-minute limit; reset headers report the time until fully replenished.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.limits = {"requests": float(rpm), "tokens": float(tpm)}
+        self.levels = dict(self.limits)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.rejected = 0
+
+    def admit(self, tokens: int):
+        """Returns (accepted, headers)."""
+        with self.lock:
+            now = time.monotonic()
+            for kind, limit in self.limits.items():
+                self.levels[kind] = min(limit, self.levels[kind] + (now - self.updated) * limit / 60)
+            self.updated = now
+
+            cost = {"requests": 1, "tokens": tokens}
+            accepted = all(self.levels[kind] >= cost[kind] for kind in cost)
+            if accepted:
+                for kind in cost:
+                    self.levels[kind] -= cost[kind]
+            else:
+                self.rejected += 1
+
+            headers = {}
+            for kind, limit in self.limits.items():
+                headers[f"x-ratelimit-limit-{kind}"] = str(int(limit))
+                headers[f"x-ratelimit-remaining-{kind}"] = str(max(0, int(self.levels[kind])))
+                headers[f"x-ratelimit-reset-{kind}"] = f"{(limit - self.levels[kind]) * 60 / limit:.2f}s"
+            if not accepted:
+                wait = max((cost[kind] - self.levels[kind]) * 60 / self.limits[kind] for kind in cost)
+                headers["retry-after"] = str(max(1, round(wait)))
+            return accepted, headers
+
+
+def make_handler(quota: Quota, latency: float, drop_rate: float = 0.0, break_rate: float = 0.0, faults: dict = None):
+    """
+    `faults` can be changed while serving: "fail_next" requests are answered
+    with "status" (e.g. 503 for an outage, 401 for a revoked key) and ids in
+    "drop_ids" are never translated.
+    """
+    rng = random.Random(7)
+    faults = faults if faults is not None else {}
+    fault_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, content: str, finish_reason: str, usage: dict, headers: dict):
+            """Server-sent events in Groq's chunk format; usage arrives under x_groq at the end."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+            def event(delta: dict, finish=None, extra=None):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": "fake-model",
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }
+                chunk.update(extra or {})
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+            # Broken streams stop somewhere in the second half, without [DONE]
+            cut = len(pieces)
+            if rng.random() < break_rate:
+                cut = rng.randint(len(pieces) // 2, len(pieces) - 1) if len(pieces) > 1 else 0
+            event({"role": "assistant", "content": ""})
+            for piece in pieces[:cut]:
+                time.sleep(latency / len(pieces))
+                event({"content": piece})
+            if cut < len(pieces):
+                self.close_connection = True
+                return
+            event({}, finish_reason, {"x_groq": {"id": "req-fake", "usage": usage}})
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}}, {})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            with fault_lock:
+                failing = faults.get("fail_next", 0) > 0
+                if failing:
+                    faults["fail_next"] -= 1
+                    faults["failed"] = faults.get("failed", 0) + 1
+            if failing:
+                self._send(faults["status"], {"error": {"message": f"Injected {faults['status']}", "type": "fake"}}, {})
+                return
+            prompt = "".join(m["content"] for m in request["messages"])
+            marker = "Items to translate:"
+            items = json.loads(prompt.split(marker, 1)[1]) if marker in prompt else {}
+            translated = {
+                key: {"title_es": f"[ES] {value['title']}", "content_es": f"[ES] {value['content']}"}
+                for key, value in items.items()
+                if key not in faults.get("drop_ids", ()) and rng.random() >= drop_rate
+            }
+            content = json.dumps(translated, ensure_ascii=False)
+            finish_reason = "stop"
+            max_tokens = request.get("max_tokens")
+            if max_tokens and len(content) // 4 > max_tokens:
+                # Like the real model: cut the output mid-JSON
+                content = content[:max_tokens * 4]
+                finish_reason = "length"
+            prompt_tokens = len(prompt) // 4
+            completion_tokens = len(content) // 4
+            total = prompt_tokens + completion_tokens
+
+            accepted, headers = quota.admit(total)
+            if not accepted:
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "tokens"}}, headers)
+                return
+
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": total,
+            }
+            if request.get("stream"):
+                self._stream(content, finish_reason, usage, headers)
+                return
+
+            time.sleep(latency)
+            self._send(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            }, headers)
+
+    return Handler
+
+
+def drain(count: int, rpm: int, tpm: int, fixed_size: int = 0):
+    """
+    Translates `count` synthetic items (a mix of bare headlines and long
+    snippets) through the real translator stage and reports timings.
+    `fixed_size` packs a fixed number of items per batch instead of using the token budget.
+    """
+    import asyncio
+    from types import SimpleNamespace
+    from services import translator
+
+    rng = random.Random(42)
+    sentence = "Officials said on Tuesday that the measures would take effect next month. "
+    items = [
+        SimpleNamespace(
+            id=i,
+            title=f"Breaking story number {i} about markets and politics",
+            content_snippet=sentence * rng.choice([0, 0, 1, 2, 6, 12]) or None,
+            translation_attempts=0,
+        )
+        for i in range(1, count + 1)
+    ]
+    if fixed_size:
+        sizer = translator.BatchSizer(max_input=10 ** 9, max_output=10 ** 9, max_items=fixed_size)
+    else:
+        sizer = translator.BatchSizer()
+    done = {"items": 0, "tokens": 0, "batches": 0, "failed": 0, "exhausted": 0}
+    first = {}
+
+    def on_item(item_id, data):
+        first.setdefault("at", time.time() - start)
+
+    def on_result(batch, data):
+        done["batches"] += 1
+        done["items"] += len(batch) - len(data["missing"])
+        if len(batch) > len(data["missing"]):
+            first.setdefault("at", time.time() - start)
+        done["failed"] += data["parse_failed"]
+        done["exhausted"] += len(data["exhausted"])
+        if data["usage"]:
+            done["tokens"] += data["usage"].total_tokens
+
+    start = time.time()
+    waited = asyncio.run(translator.run_batches(items, "fake-model", on_result, sizer, on_item))
+    elapsed = time.time() - start
+
+    # Lower bound imposed by the quotas themselves (the first minute's budget is available up front)
+    bound = max(0.0, (done["batches"] - rpm) / rpm * 60, (done["tokens"] - tpm) / tpm * 60)
+    print(f"Translated {done['items']}/{count} items in {done['batches']} requests "
+          f"({count / done['batches']:.1f} items/request, {done['failed']} truncated/invalid), {done['tokens']} tokens")
+    print(f"Gave up on {done['exhausted']} items after {translator.TRANSLATE_ITEM_MAX_ATTEMPTS} attempts each")
+    mode = "streaming" if translator.TRANSLATE_STREAM else "buffered"
+    print(f"First translated item after {first.get('at', 0):.2f}s ({mode})")
+    print(f"Drain time: {elapsed:.1f}s (quota lower bound ~{bound:.1f}s, limiter wait {waited:.1f}s)")
+
+
+def check(faults: dict):
+    """
+    Runs the translator against scripted failures and asserts that only
+    answered-but-missing items spend attempts, that outages back off or give
+    up leaving items pending, and that FAILED is reached after exactly
+    TRANSLATE_ITEM_MAX_ATTEMPTS.
+    """
+    import asyncio
+    from types import SimpleNamespace
+
+    # Fast, deterministic settings; the translator reads them at import time
+    os.environ.update({
+        "TRANSLATE_MAX_RETRIES": "0",
+        "TRANSLATE_RETRY_BASE_DELAY": "0.05",
+        "TRANSLATE_MAX_CALL_FAILURES": "3",
+        "TRANSLATE_RPM": "10000",
+        "TRANSLATE_TPM": "10000000",
+    })
+    from services import translator
+
+    def run(count: int):
+        items = [SimpleNamespace(id=i, title=f"Story {i}", content_snippet=None, translation_attempts=0)
+                 for i in range(1, count + 1)]
+        translated, exhausted = set(), set()
+
+        def on_result(batch, data):
+            missing = {item.id for item in data["missing"]}
+            translated.update(item.id for item in batch if item.id not in missing)
+            exhausted.update(item.id for item in data["exhausted"])
+
+        sizer = translator.BatchSizer(max_input=10 ** 9, max_output=10 ** 9, max_items=5)
+        error = None
+        try:
+            asyncio.run(translator.run_batches(items, "fake-model", on_result, sizer, lambda item_id, data: None))
+        except translator.TranslationUnavailable as e:
+            error = e
+        attempts = {item.id: item.translation_attempts for item in items}
+        return translated, exhausted, attempts, error
+
+    def reset(**changes):
+        faults.clear()
+        faults.update(changes)
+
+    # Ids the model keeps leaving out: FAILED after exactly the allowed attempts, nobody else charged
+    reset(drop_ids={"3", "7"})
+    translated, exhausted, attempts, error = run(20)
+    assert error is None, error
+    assert exhausted == {3, 7}, exhausted
+    assert translated == set(range(1, 21)) - {3, 7}, translated
+    assert attempts[3] == attempts[7] == translator.TRANSLATE_ITEM_MAX_ATTEMPTS, attempts
+    assert all(attempts[i] == 0 for i in translated), attempts
+    print(f"OK dropped ids: FAILED after {translator.TRANSLATE_ITEM_MAX_ATTEMPTS} attempts, others untouched")
+
+    # Short outage: every batch is answered 503 once or twice, then all get through without spending attempts
+    reset(status=503, fail_next=6)
+    translated, exhausted, attempts, error = run(20)
+    assert error is None, error
+    assert faults["failed"] == 6, faults
+    assert translated == set(range(1, 21)) and not exhausted, (translated, exhausted)
+    assert not any(attempts.values()), attempts
+    print(f"OK short outage: {faults['failed']} rejected calls retried, no attempts spent")
+
+    # Long outage: the run gives up after TRANSLATE_MAX_CALL_FAILURES rounds, items stay pending
+    reset(status=503, fail_next=10 ** 6)
+    translated, exhausted, attempts, error = run(20)
+    assert isinstance(error, translator.TranslationUnavailable), error
+    assert not translated and not exhausted and not any(attempts.values()), (translated, exhausted, attempts)
+    assert faults["failed"] <= translator.TRANSLATE_MAX_CALL_FAILURES * translator.TRANSLATE_CONCURRENCY, faults
+    print(f"OK long outage: abandoned after {faults['failed']} rejected calls, items left pending")
+
+    # Revoked key: abandoned on the first answers, no attempts spent
+    reset(status=401, fail_next=10 ** 6)
+    translated, exhausted, attempts, error = run(20)
+    assert isinstance(error, translator.TranslationUnavailable), error
+    assert not translated and not exhausted and not any(attempts.values()), (translated, exhausted, attempts)
+    assert faults["failed"] <= translator.TRANSLATE_CONCURRENCY, faults
+    print(f"OK revoked key: abandoned after {faults['failed']} rejected calls, items left pending")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Groq chat completions server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--rpm", type=int, default=30)
+    parser.add_argument("--tpm", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.8, help="Seconds per completion")
+    parser.add_argument("--drain", type=int, default=0, help="Translate N synthetic items and exit")
+    parser.add_argument("--fixed-size", type=int, default=0, help="With --drain: fixed items per batch (baseline)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Probability of leaving each id out of a response")
+    parser.add_argument("--break-rate", type=float, default=0.0, help="Probability of cutting a streamed response short")
+    parser.add_argument("--check", action="store_true", help="Assert retry/FAILED behaviour under scripted failures and exit")
+    args = parser.parse_args()
+
+    faults = {}
+    if args.check:
+        # Quotas and latency would only slow the scenarios down
+        args.rpm, args.tpm, args.latency = 10000, 10000000, 0.05
+    quota = Quota(args.rpm, args.tpm)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 make_handler(quota, args.latency, args.drop_rate, args.break_rate, faults))
+
+    if args.check:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+        os.environ.setdefault("GROQ_API_KEY", "fake")
+        check(faults)
+        server.shutdown()
+    elif not args.drain:
+        print(f"Fake Groq listening on http://127.0.0.1:{args.port} ({args.rpm} RPM / {args.tpm} TPM)")
+        server.serve_forever()
+    else:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+        os.environ.setdefault("GROQ_API_KEY", "fake")
+        # The translator reads its limits at import time; default them to the server's
+        os.environ.setdefault("TRANSLATE_RPM", str(args.rpm))
+        os.environ.setdefault("TRANSLATE_TPM", str(args.tpm))
+        drain(args.drain, args.rpm, args.tpm, args.fixed_size)
+        print(f"Requests rejected with 429: {quota.rejected}")
+        server.shutdown()
@@ -1,46 +1,137 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session, joinedload
-from typing import List
-import time
+from typing import List, Optional
+import os
+import threading
 
 import models
 import schemas
 from database import SessionLocal, engine
-from sqlalchemy import text
+from sqlalchemy import inspect, literal, text
 from datetime import datetime
-from services import ingestor, translator, extractor
+from services import jobs, ingestor, scheduler, health, translation_memory, entity_index, news_feed, changes, dedup
+import worker
 
 models.Base.metadata.create_all(bind=engine)
 
-# Simple migration to ensure new columns exist (for prototype robustness)
+# Columns added to existing tables after they were first created (create_all only
+# creates missing tables). Types come from the models, compiled for the engine's
+# dialect, so the same list works on SQLite and PostgreSQL.
+# List of (table, column, default for existing rows or None)
+MIGRATED_COLUMNS = [
+    ("news_items", "language", None),
+    ("news_items", "content_snippet", None),
+    ("sources", "etag", None),
+    ("sources", "last_modified", None),
+    ("sources", "content_hash", None),
+    ("jobs", "progress", None),
+    ("sources", "poll_interval", None),
+    ("sources", "last_polled_at", None),
+    ("sources", "next_poll_at", None),
+    ("sources", "health_detail", None),
+    ("news_items", "entities_extracted", False),
+    ("news_items", "canonical_url", None),
+    ("news_items", "simhash", None),
+    ("news_items", "duplicate_of_id", None),
+    ("news_items", "translation_attempts", 0),
+    ("news_items", "translation_status", None),
+    ("entities", "normalized_name", None),
+    ("news_items", "change_seq", None)
+]
+
+def add_column_ddl(table_name, col_name, default=None):
+    column = models.Base.metadata.tables[table_name].c[col_name]
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {col_name} {column.type.compile(dialect=engine.dialect)}"
+    if default is not None:
+        ddl += f" DEFAULT {literal(default, column.type).compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})}"
+    return ddl
+
 def run_migrations():
     db = SessionLocal()
     try:
-        # Check if column exists by trying to select it. If error, add it.
-        # SQLite doesn't support IF NOT EXISTS in ALTER TABLE ADD COLUMN directly in all versions/drivers nicely,
-        # so we try-except.
-        # List of columns to check and adding if missing
-        columns = [
-            ("language", "VARCHAR"),
-            ("content_snippet", "TEXT")
+        inspector = inspect(engine)
+        existing = {table_name: {c["name"] for c in inspector.get_columns(table_name)} for table_name in {t for t, _, _ in MIGRATED_COLUMNS}}
+
+        added = set()
+        for table_name, col_name, default in MIGRATED_COLUMNS:
+            if col_name in existing[table_name]:
+                continue
+            try:
+                db.execute(text(add_column_ddl(table_name, col_name, default)))
+                db.commit()
+                added.add((table_name, col_name))
+                print(f"Migration: Added column {table_name}.{col_name}")
+            except Exception as e:
+                db.rollback()
+                print(f"Migration error adding {col_name}: {e}")
+
+        # Failed translations used to be stored as "[Fallo] <title>"; put them
+        # back in the queue once, now that failures are retried and tracked.
+        if ("news_items", "translation_status") in added:
+            result = db.execute(text("UPDATE news_items SET title_es = NULL, content_es = NULL, entities_extracted = :extracted WHERE title_es LIKE '[Fallo]%'"), {"extracted": False})
+            db.commit()
+            print(f"Migration: Re-queued {result.rowcount} failed translations")
+
+        # A reused SQLite id could make an item the near-duplicate of itself
+        result = db.execute(text("UPDATE news_items SET duplicate_of_id = NULL WHERE duplicate_of_id = id"))
+        db.commit()
+        if result.rowcount:
+            print(f"Migration: Unlinked {result.rowcount} items marked as duplicates of themselves")
+
+        # Entities lookups go through normalized_name (unique). Backfill it and merge
+        # case/whitespace variants of a name into the oldest row first.
+        pending = db.execute(text("SELECT id, name, is_ignored FROM entities WHERE normalized_name IS NULL ORDER BY id")).fetchall()
+        if pending:
+            kept = {key: entity_id for entity_id, key in db.execute(text("SELECT id, normalized_name FROM entities WHERE normalized_name IS NOT NULL"))}
+            merged = 0
+            for entity_id, name, is_ignored in pending:
+                key = models.normalize_entity_name(name)
+                keep_id = kept.get(key)
+                if keep_id is None:
+                    kept[key] = entity_id
+                    db.execute(text("UPDATE entities SET normalized_name = :key WHERE id = :id"), {"key": key, "id": entity_id})
+                    continue
+                for table_name in ("news_entities", "entity_sources"):
+                    db.execute(text(f"UPDATE {table_name} SET entity_id = :keep WHERE entity_id = :id"), {"keep": keep_id, "id": entity_id})
+                if is_ignored:
+                    db.execute(text("UPDATE entities SET is_ignored = :ignored WHERE id = :keep"), {"ignored": True, "keep": keep_id})
+                db.execute(text("DELETE FROM entities WHERE id = :id"), {"id": entity_id})
+                merged += 1
+            if merged:
+                # Merging can leave the same link twice; keep a single copy of each
+                for table_name, col_name in (("news_entities", "news_id"), ("entity_sources", "source_id")):
+                    duplicated = db.execute(text(f"SELECT {col_name}, entity_id FROM {table_name} GROUP BY {col_name}, entity_id HAVING COUNT(*) > 1")).fetchall()
+                    for owner_id, entity_id in duplicated:
+                        params = {"owner": owner_id, "entity": entity_id}
+                        db.execute(text(f"DELETE FROM {table_name} WHERE {col_name} = :owner AND entity_id = :entity"), params)
+                        db.execute(text(f"INSERT INTO {table_name} ({col_name}, entity_id) VALUES (:owner, :entity)"), params)
+            db.commit()
+            print(f"Migration: Normalized {len(pending)} entity names ({merged} duplicates merged)")
+
+        # Indexes added to existing tables (create_all only indexes new tables)
+        indexes = [
+            ("ix_sources_next_poll_at", "sources", "next_poll_at", False),
+            ("ix_news_items_canonical_url", "news_items", "canonical_url", True),
+            ("ix_news_items_duplicate_of_id", "news_items", "duplicate_of_id", False),
+            ("ix_entities_normalized_name", "entities", "normalized_name", True),
+            ("ix_news_items_status_published", "news_items", "status, published_date, id", False),
+            ("ix_news_entities_news_id", "news_entities", "news_id", False),
+            ("ix_news_entities_entity_id", "news_entities", "entity_id, news_id", False),
+            ("ix_news_tags_news_id", "news_tags", "news_id", False),
+            ("ix_news_items_change_seq", "news_items", "change_seq", False)
         ]
-        
-        for col_name, col_type in columns:
+
+        for index_name, table_name, col_names, unique in indexes:
             try:
-                db.execute(text(f"SELECT {col_name} FROM news_items LIMIT 1"))
-            except Exception:
+                db.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} ON {table_name} ({col_names})"))
+                db.commit()
+            except Exception as e:
                 db.rollback()
-                try:
-                    db.execute(text(f"ALTER TABLE news_items ADD COLUMN {col_name} {col_type}"))
-                    db.commit()
-                    print(f"Migration: Added column {col_name}")
-                except Exception as e:
-                    db.rollback()
-                    print(f"Migration error adding {col_name}: {e}")
+                print(f"Migration error creating index {index_name}: {e}")
     except Exception as e:
         print(f"Migration warning: {e}")
     finally:
@@ -50,6 +141,25 @@ run_migrations()
 
 app = FastAPI()
 
+# Pipeline jobs (scans, translation, NER) run in worker.py processes so they
+# never compete with requests for the API's GIL. For a single-process dev
+# setup EMBEDDED_WORKER=1 drains the queue in a background thread instead.
+_worker_stop = threading.Event()
+
+@app.on_event("startup")
+def start_worker():
+    if os.getenv("EMBEDDED_WORKER", "0") == "1":
+        worker.start_embedded_worker(_worker_stop)
+        # The SpaCy model otherwise loads on the first extraction job
+        if worker.NLP_WARMUP:
+            worker.warm_up_nlp()
+        if os.getenv("SCHEDULER_ENABLED", "1") == "1":
+            scheduler.start_scheduler(_worker_stop, SessionLocal)
+
+@app.on_event("shutdown")
+def stop_worker():
+    _worker_stop.set()
+
 # Configure CORS - Allow all origins for development
 app.add_middleware(
     CORSMiddleware,
@@ -73,7 +183,10 @@ async def get_status():
     return {"status": "online", "system_active": True}
 
 @app.get("/api/dashboard-stats")
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(request: Request, response: Response, db: Session = Depends(get_db)):
+    cached = not_modified(request, response, news_feed.etag(db))
+    if cached:
+        return cached
     sources_count = db.query(models.Source).count()
     active_news_count = db.query(models.NewsItem).filter(models.NewsItem.status == "DISCOVERED").count()
     return {
@@ -86,6 +199,10 @@ def read_sources(skip: int = 0, limit: int = 100, db: Session = Depends(get_db))
     sources = db.query(models.Source).offset(skip).limit(limit).all()
     return sources
 
+@app.get("/api/sources/health", response_model=List[schemas.FetchHealthResponse])
+def read_sources_health(db: Session = Depends(get_db)):
+    return db.query(models.FetchHealth).order_by(models.FetchHealth.key).all()
+
 @app.post("/api/sources", response_model=schemas.SourceResponse)
 def create_source(source: schemas.SourceCreate, db: Session = Depends(get_db)):
     db_source = models.Source(**source.dict())
@@ -100,8 +217,17 @@ def update_source(source_id: int, source: schemas.SourceCreate, db: Session = De
     if db_source is None:
         raise HTTPException(status_code=404, detail="Source not found")
     
+    # A new feed URL invalidates the stored conditional GET validators
+    if (db_source.config or {}).get("url") != source.config.get("url"):
+        db_source.etag = None
+        db_source.last_modified = None
+        db_source.content_hash = None
+        health.reset_source(db, source_id)
+
     for key, value in source.dict().items():
         setattr(db_source, key, value)
+    # The items embed their source
+    changes.touch(db, models.NewsItem.source_id == source_id)
     
     db.commit()
     db.refresh(db_source)
@@ -112,6 +238,10 @@ def delete_source(source_id: int, db: Session = Depends(get_db)):
     db_source = db.query(models.Source).filter(models.Source.id == source_id).first()
     if db_source is None:
         raise HTTPException(status_code=404, detail="Source not found")
+    # News items are kept without their source (foreign keys are enforced outside SQLite)
+    db.query(models.NewsItem).filter(models.NewsItem.source_id == source_id).update(
+        {models.NewsItem.source_id: None, models.NewsItem.change_seq: changes.marker(db)}, synchronize_session=False)
+    health.reset_source(db, source_id)
     db.delete(db_source)
     db.commit()
     return {"ok": True}
@@ -120,19 +250,66 @@ def delete_source(source_id: int, db: Session = Depends(get_db)):
 async def root():
     return {"message": "Agentic Newsroom Backend is running"}
 
-@app.post("/api/scan")
-def scan_sources(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    # 1. Ingest RSS feeds (Synchronous)
-    # We process all feeds here to give immediate feedback on count
-    count, new_ids = ingestor.process_feeds(db)
-    
-    # 2. Trigger Parallel flows in background (Heavy lifting)
-    background_tasks.add_task(auto_extract_native_background)
+@app.post("/api/scan", response_model=schemas.ScanStartResponse, status_code=202)
+def scan_sources(request: Optional[schemas.ScanRequest] = None, db: Session = Depends(get_db)):
+    # Ingest runs in a worker; it queues translation and native extraction itself.
+    requested_ids = request.source_ids if request else None
+    source_ids = [s.id for s in ingestor.rss_source_query(db, requested_ids).all()]
+
+    # Refuse overlapping scans: the running one already covers these sources
+    job, created = jobs.enqueue_scan(db, source_ids)
+    if not created:
+        raise HTTPException(status_code=409, detail={
+            "message": "A scan over these sources is already in progress",
+            "scan_id": job.id
+        })
+    return {"scan_id": job.id, "status": job.status, "sources_total": len(source_ids)}
+
+@app.get("/api/scan/{scan_id}", response_model=schemas.ScanProgressResponse)
+def get_scan_progress(scan_id: int, db: Session = Depends(get_db)):
+    job = db.query(models.Job).filter(models.Job.id == scan_id, models.Job.kind == jobs.SCAN).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    progress = job.progress or {}
+    result = job.result or {}
+    sources_total = progress.get("sources_total", len((job.payload or {}).get("source_ids") or []))
+    sources_done = progress.get("sources_done", 0)
+    return {
+        "scan_id": job.id,
+        "status": job.status,
+        "sources_total": sources_total,
+        "sources_done": sources_done,
+        "sources_remaining": max(0, sources_total - sources_done),
+        "items_created": progress.get("items_created", 0),
+        "new_item_ids": result.get("new_item_ids", []),
+        "sources": list((progress.get("sources") or {}).values()),
+        "error": job.last_error if job.status == jobs.FAILED else None,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
 
-    if new_ids:
-        background_tasks.add_task(auto_translate_background, new_ids)
-    
-    return {"new_items": count, "new_item_ids": new_ids}
+@app.post("/api/crawl", response_model=schemas.JobResponse)
+def crawl_news(db: Session = Depends(get_db)):
+    return jobs.enqueue(db, jobs.CRAWL, dedupe_key="crawl")
+
+@app.get("/api/translation-memory/stats", response_model=schemas.TranslationMemoryStats)
+def read_translation_memory_stats(db: Session = Depends(get_db)):
+    return translation_memory.stats(db)
+
+@app.get("/api/jobs", response_model=List[schemas.JobResponse])
+def read_jobs(status: Optional[str] = None, limit: int = 50, db: Session = Depends(get_db)):
+    query = db.query(models.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    return query.order_by(models.Job.id.desc()).limit(limit).all()
+
+@app.get("/api/jobs/{job_id}", response_model=schemas.JobResponse)
+def read_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 def clean_old_invalid_entities(db: Session):
     """Temporary helper to wipe entities that start with STOP_PREFIXES after filter update."""
@@ -142,48 +319,44 @@ def clean_old_invalid_entities(db: Session):
         db.query(Entity).filter(Entity.name.like(f"{prefix}%")).delete(synchronize_session=False)
     db.commit()
 
-def auto_translate_background(new_item_ids: List[int]):
-    """Helper to translate items. Extraction is handled internally by translator per batch."""
-    db = SessionLocal()
-    try:
-        print(f"[Background] Starting translation flow for {len(new_item_ids)} items")
-        count = translator.process_pending_translations(db, new_item_ids)
-        print(f"[Background] Flow A: Translated {count} items")
-    except Exception as e:
-        print(f"[Background] Error during translation flow: {e}")
-    finally:
-        db.close()
-
-def auto_extract_entities_background():
-    """Helper to extract entities from translated items (if any left)."""
-    db = SessionLocal()
-    try:
-        count = extractor.process_pending_entities(db)
-        if count > 0:
-            print(f"[Background] Extracted entities from {count} translated items")
-    except Exception as e:
-        print(f"[Background] Error during batch entity extraction: {e}")
-    finally:
-        db.close()
-
-def auto_extract_native_background():
-    """Helper to extract entities from native Spanish items."""
-    db = SessionLocal()
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Sets the validators on `response`; returns a 304 if the client's copy (If-None-Match) is still current."""
+    # no-cache: browsers may keep the response but revalidate it on every use
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    response.headers.update(headers)
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    # Weak comparison (RFC 9110 8.8.3.2)
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers=headers)
+    return None
+
+def news_page(request: Request, response: Response, db: Session, status: str, cursor: Optional[str], limit: int,
+              source_id: Optional[int], language: Optional[str], entity_id: Optional[int]):
+    cached = not_modified(request, response, news_feed.etag(db))
+    if cached:
+        return cached
     try:
-        count = extractor.process_native_pending(db)
-        if count > 0:
-            print(f"[Background] Extracted entities from {count} native ES items")
-    except Exception as e:
-        print(f"[Background] Error during native entity extraction: {e}")
-    finally:
-        db.close()
-
-@app.get("/api/news/discovered", response_model=List[schemas.NewsItemResponse])
-def get_discovered_news(db: Session = Depends(get_db)):
-    return db.query(models.NewsItem).options(
-        joinedload(models.NewsItem.source),
-        joinedload(models.NewsItem.entities)
-    ).filter(models.NewsItem.status == "DISCOVERED").order_by(models.NewsItem.published_date.desc()).all()
+        return news_feed.page(db, status, cursor, limit, source_id=source_id, language=language, entity_id=entity_id)
+    except news_feed.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/api/news/discovered", response_model=schemas.NewsPage)
+def get_discovered_news(request: Request, response: Response, cursor: Optional[str] = None, limit: int = news_feed.PAGE_SIZE,
+                        source_id: Optional[int] = None, language: Optional[str] = None, entity_id: Optional[int] = None,
+                        db: Session = Depends(get_db)):
+    return news_page(request, response, db, "DISCOVERED", cursor, limit, source_id, language, entity_id)
+
+@app.get("/api/news/changes", response_model=schemas.NewsChanges)
+def get_news_changes(since: int, status: str = "DISCOVERED", source_id: Optional[int] = None, language: Optional[str] = None,
+                     entity_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Delta of a listing since the `seq` of a page or of the previous poll:
+    items to add or update, ids to drop, or `reset` to reload the listing.
+    """
+    return news_feed.changes_since(db, since, status, source_id=source_id, language=language, entity_id=entity_id)
 
 @app.put("/api/news/{news_id}/status", response_model=schemas.NewsItemResponse)
 def update_news_status(news_id: int, status_update: schemas.NewsItemStatusUpdate, db: Session = Depends(get_db)):
@@ -196,32 +369,44 @@ def update_news_status(news_id: int, status_update: schemas.NewsItemStatusUpdate
     db.refresh(item)
     return item
 
-@app.get("/api/news/approved", response_model=List[schemas.NewsItemResponse])
-def get_approved_news(db: Session = Depends(get_db)):
-    return db.query(models.NewsItem).options(
-        joinedload(models.NewsItem.source),
-        joinedload(models.NewsItem.entities)
-    ).filter(models.NewsItem.status == 'APPROVED').order_by(models.NewsItem.published_date.desc()).all()
-
-@app.get("/api/news/rejected", response_model=List[schemas.NewsItemResponse])
-def get_rejected_news(db: Session = Depends(get_db)):
-    return db.query(models.NewsItem).options(
-        joinedload(models.NewsItem.source),
-        joinedload(models.NewsItem.entities)
-    ).filter(models.NewsItem.status == 'REJECTED').order_by(models.NewsItem.published_date.desc()).all()
+@app.get("/api/news/approved", response_model=schemas.NewsPage)
+def get_approved_news(request: Request, response: Response, cursor: Optional[str] = None, limit: int = news_feed.PAGE_SIZE,
+                      source_id: Optional[int] = None, language: Optional[str] = None, entity_id: Optional[int] = None,
+                      db: Session = Depends(get_db)):
+    return news_page(request, response, db, "APPROVED", cursor, limit, source_id, language, entity_id)
+
+@app.get("/api/news/rejected", response_model=schemas.NewsPage)
+def get_rejected_news(request: Request, response: Response, cursor: Optional[str] = None, limit: int = news_feed.PAGE_SIZE,
+                      source_id: Optional[int] = None, language: Optional[str] = None, entity_id: Optional[int] = None,
+                      db: Session = Depends(get_db)):
+    return news_page(request, response, db, "REJECTED", cursor, limit, source_id, language, entity_id)
+
+def delete_news_items(db: Session, news_ids):
+    """Deletes news items (ids or an id subquery) together with the rows that reference them."""
+    deleted_ids = [item_id for (item_id,) in db.query(models.NewsItem.id).filter(models.NewsItem.id.in_(news_ids))]
+    changes.record_deleted(db, news_ids)
+    for table in (models.news_entities, models.news_tags):
+        db.execute(table.delete().where(table.c.news_id.in_(news_ids)))
+    db.query(models.ParsedDoc).filter(models.ParsedDoc.news_id.in_(news_ids)).delete(synchronize_session=False)
+    db.query(models.NewsItem).filter(models.NewsItem.duplicate_of_id.in_(news_ids)).update(
+        {models.NewsItem.duplicate_of_id: None, models.NewsItem.change_seq: changes.marker(db)}, synchronize_session=False)
+    db.query(models.NewsItem).filter(models.NewsItem.id.in_(news_ids)).delete(synchronize_session=False)
+    # Later rewrites must not be linked to these; other processes catch up through the tombstones
+    dedup.forget(deleted_ids)
 
 @app.delete("/api/news/{news_id}")
 def delete_news_item(news_id: int, db: Session = Depends(get_db)):
     item = db.query(models.NewsItem).filter(models.NewsItem.id == news_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="News item not found")
-    db.delete(item)
+    delete_news_items(db, [news_id])
     db.commit()
     return {"ok": True}
 
 @app.delete("/api/news/rejected/all")
 def empty_trash(db: Session = Depends(get_db)):
-    db.query(models.NewsItem).filter(models.NewsItem.status == "REJECTED").delete(synchronize_session=False)
+    rejected = db.query(models.NewsItem.id).filter(models.NewsItem.status == "REJECTED").scalar_subquery()
+    delete_news_items(db, rejected)
     db.commit()
     return {"ok": True}
 
@@ -238,13 +423,14 @@ def restore_news_item(news_id: int, db: Session = Depends(get_db)):
 
 @app.post("/api/news/batch/delete")
 def batch_delete_news(request: schemas.BatchIdRequest, db: Session = Depends(get_db)):
-    db.query(models.NewsItem).filter(models.NewsItem.id.in_(request.ids)).delete(synchronize_session=False)
+    delete_news_items(db, request.ids)
     db.commit()
     return {"ok": True, "count": len(request.ids)}
 
 @app.post("/api/news/batch/restore")
 def batch_restore_news(request: schemas.BatchIdRequest, db: Session = Depends(get_db)):
-    db.query(models.NewsItem).filter(models.NewsItem.id.in_(request.ids)).update({models.NewsItem.status: "DISCOVERED"}, synchronize_session=False)
+    db.query(models.NewsItem).filter(models.NewsItem.id.in_(request.ids)).update(
+        {models.NewsItem.status: "DISCOVERED", models.NewsItem.change_seq: changes.marker(db)}, synchronize_session=False)
     db.commit()
     return {"ok": True, "count": len(request.ids)}
 
@@ -325,17 +511,35 @@ def update_topic(topic_id: int, topic: schemas.InterestTopicCreate, db: Session
     return {"ok": True}
 
 
-@app.post("/api/extract-entities")
+@app.post("/api/extract-entities", response_model=schemas.JobResponse)
 def extract_entities(db: Session = Depends(get_db)):
     """
     Manual trigger for entity extraction.
-    Uses the new Extractor service with Groq (Spanish).
+    Queues an EXTRACT job for the SpaCy extractor (translated items).
     """
-    try:
-        count = extractor.process_pending_entities(db)
-        return {"extracted_count": count}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return jobs.enqueue(db, jobs.EXTRACT, dedupe_key="extract")
+
+@app.post("/api/translations/retry", response_model=schemas.JobResponse)
+def retry_translations(db: Session = Depends(get_db)):
+    """
+    Gives the items marked FAILED a fresh set of attempts and queues a
+    TRANSLATE job over everything still pending (including items left behind
+    by a run abandoned during a provider outage).
+    """
+    from services.translator import FAILED
+    db.query(models.NewsItem).filter(models.NewsItem.translation_status == FAILED).update(
+        {models.NewsItem.translation_status: None, models.NewsItem.translation_attempts: 0,
+         models.NewsItem.change_seq: changes.marker(db)}, synchronize_session=False)
+    db.commit()
+    return jobs.enqueue(db, jobs.TRANSLATE, dedupe_key="translate-pending")
+
+@app.post("/api/entities/rescan", response_model=schemas.JobResponse)
+def rescan_watchlist(db: Session = Depends(get_db)):
+    """
+    Queues a watch list re-scan: every active entity name is matched against
+    the cached parses of already extracted items (no NER) and missing links are added.
+    """
+    return jobs.enqueue(db, jobs.RESCAN_WATCHLIST, dedupe_key="rescan-watchlist")
 
 # Tag Endpoints
 
@@ -364,6 +568,7 @@ def update_tag(tag_id: int, tag: schemas.TagCreate, db: Session = Depends(get_db
     
     for key, value in tag.dict().items():
         setattr(db_tag, key, value)
+    changes.touch(db, models.NewsItem.tags.any(models.Tag.id == tag_id))
     
     try:
         db.commit()
@@ -378,6 +583,7 @@ def delete_tag(tag_id: int, db: Session = Depends(get_db)):
     db_tag = db.query(models.Tag).filter(models.Tag.id == tag_id).first()
     if db_tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
+    changes.touch(db, models.NewsItem.tags.any(models.Tag.id == tag_id))
     db.delete(db_tag)
     db.commit()
     return {"ok": True}
@@ -410,6 +616,9 @@ def create_entity(entity: schemas.EntityCreate, db: Session = Depends(get_db)):
     try:
         db.commit()
         db.refresh(db_entity)
+        entity_index.invalidate(db)
+        # Apply the (new) name to already extracted items too
+        jobs.enqueue(db, jobs.RESCAN_WATCHLIST, {"entity_ids": [db_entity.id]}, dedupe_key=f"rescan-entity-{db_entity.id}")
         return db_entity
     except Exception as e:
         db.rollback()
@@ -428,10 +637,14 @@ def update_entity(entity_id: int, entity: schemas.EntityCreate, db: Session = De
     if entity.source_ids is not None:
         sources = db.query(models.Source).filter(models.Source.id.in_(entity.source_ids)).all()
         db_entity.sources = sources
+    changes.touch(db, models.NewsItem.entities.any(models.Entity.id == entity_id))
     
     try:
         db.commit()
         db.refresh(db_entity)
+        entity_index.invalidate(db)
+        # Apply the (new) name to already extracted items too
+        jobs.enqueue(db, jobs.RESCAN_WATCHLIST, {"entity_ids": [db_entity.id]}, dedupe_key=f"rescan-entity-{db_entity.id}")
         return db_entity
     except Exception as e:
         db.rollback()
@@ -442,8 +655,10 @@ def delete_entity(entity_id: int, db: Session = Depends(get_db)):
     db_entity = db.query(models.Entity).filter(models.Entity.id == entity_id).first()
     if db_entity is None:
         raise HTTPException(status_code=404, detail="Entity not found")
+    changes.touch(db, models.NewsItem.entities.any(models.Entity.id == entity_id))
     db.delete(db_entity)
     db.commit()
+    entity_index.invalidate(db)
     return {"ok": True}
 
 @app.put("/api/entities/{entity_id}/ignore")
@@ -454,8 +669,10 @@ def toggle_ignore_entity(entity_id: int, db: Session = Depends(get_db)):
     
     # Toggle the is_ignored status
     db_entity.is_ignored = not db_entity.is_ignored
+    changes.touch(db, models.NewsItem.entities.any(models.Entity.id == entity_id))
     db.commit()
     db.refresh(db_entity)
+    entity_index.invalidate(db)
     
     return {"ok": True, "is_ignored": db_entity.is_ignored}
 
@@ -540,14 +757,18 @@ def export_system(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
+# Plain def: FastAPI runs it in the threadpool, since its writes may wait for the write lock
 @app.post("/api/system/import")
-async def import_system(data: dict, db: Session = Depends(get_db)):
+def import_system(data: dict, db: Session = Depends(get_db)):
     """Wipe config tables and restore from JSON. Preserve NewsItems."""
     try:
         # 1. Wipe Config Tables (Order matters due to FKs if any, though here it's mostly secondary tables)
         db.execute(text("DELETE FROM news_tags")) # We wipe news-tag associations because Tag IDs will change
         db.execute(text("DELETE FROM news_entities")) # We wipe news-entity associations
         db.execute(text("DELETE FROM entity_sources"))
+        # News items are preserved but lose their source (new sources get new ids), tags and entities
+        db.query(models.NewsItem).update({models.NewsItem.source_id: None, models.NewsItem.change_seq: changes.marker(db)}, synchronize_session=False)
+        db.query(models.FetchHealth).filter(models.FetchHealth.source_id.isnot(None)).delete(synchronize_session=False)
         db.query(models.Source).delete()
         db.query(models.Entity).delete()
         db.query(models.Tag).delete()
@@ -623,6 +844,7 @@ async def import_system(data: dict, db: Session = Depends(get_db)):
             db.add(new_config)
             
         db.commit()
+        entity_index.invalidate(db)
         return {"ok": True, "message": "System configuration restored successfully"}
     except Exception as e:
         db.rollback()
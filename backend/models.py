@@ -1,10 +1,14 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Table, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Index, Table, JSON, LargeBinary
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 from database import Base
 
+def normalize_entity_name(name: str) -> str:
+    """Case- and whitespace-insensitive form of an entity name (Entity.normalized_name)."""
+    return " ".join((name or "").split()).lower()
+
 news_tags = Table('news_tags', Base.metadata,
-    Column('news_id', Integer, ForeignKey('news_items.id')),
+    Column('news_id', Integer, ForeignKey('news_items.id'), index=True),
     Column('tag_id', Integer, ForeignKey('tags.id'))
 )
 
@@ -14,8 +18,9 @@ entity_sources = Table('entity_sources', Base.metadata,
 )
 
 news_entities = Table('news_entities', Base.metadata,
-    Column('news_id', Integer, ForeignKey('news_items.id')),
-    Column('entity_id', Integer, ForeignKey('entities.id'))
+    Column('news_id', Integer, ForeignKey('news_items.id'), index=True),
+    Column('entity_id', Integer, ForeignKey('entities.id')),
+    Index('ix_news_entities_entity_id', 'entity_id', 'news_id')  # News listings filtered by entity
 )
 
 class Tag(Base):
@@ -37,9 +42,20 @@ class Source(Base):
     subtype = Column(String, nullable=True) # TWITTER, YOUTUBE, etc.
     config = Column(JSON) # { "url": "...", "headers": "..." }
     icon = Column(String, nullable=True)
-    health_status = Column(String, default="OK")
+    health_status = Column(String, default="OK")  # OK, DEGRADED, DOWN (set by services/health.py)
+    health_detail = Column(String, nullable=True)
     active = Column(Boolean, default=True)
 
+    # Conditional GET validators from the last successful fetch
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True)
+
+    # Adaptive polling (services/scheduler.py)
+    poll_interval = Column(Integer, nullable=True)  # seconds
+    last_polled_at = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=True, index=True)
+
     entities = relationship("Entity", secondary=entity_sources, back_populates="sources")
 
 class Entity(Base):
@@ -47,19 +63,30 @@ class Entity(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
+    normalized_name = Column(String, unique=True, index=True)  # Kept in sync with name, see normalize_entity_name
     type = Column(String)  # PERSON, ORGANIZATION, LOCATION, CONCEPT
     is_ignored = Column(Boolean, default=False)
 
     sources = relationship("Source", secondary=entity_sources, back_populates="entities")
     news_items = relationship("NewsItem", secondary=news_entities, back_populates="entities")
 
+    @validates("name")
+    def _sync_normalized_name(self, key, name):
+        self.normalized_name = normalize_entity_name(name)
+        return name
+
 class NewsItem(Base):
     __tablename__ = "news_items"
+    __table_args__ = (
+        # Keyset pagination of the listings (services/news_feed.py)
+        Index("ix_news_items_status_published", "status", "published_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source_id = Column(Integer, ForeignKey("sources.id"), index=True)
     title = Column(String, index=True)
     url = Column(String, unique=True, index=True)
+    canonical_url = Column(String, unique=True, index=True, nullable=True)  # See ingestor.canonicalize_url
     published_date = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String, default="DISCOVERED")  # DISCOVERED, APPROVED, REJECTED
@@ -70,14 +97,100 @@ class NewsItem(Base):
     # Spanish translations
     title_es = Column(String, nullable=True)
     content_es = Column(Text, nullable=True)
+    translation_attempts = Column(Integer, default=0)  # Responses that came back without this item
+    translation_status = Column(String, nullable=True)  # FAILED once retries are exhausted
     
     # Processing flags
     entities_extracted = Column(Boolean, default=False)
+
+    # Near-duplicate detection (services/dedup.py)
+    simhash = Column(BigInteger, nullable=True)
+    duplicate_of_id = Column(Integer, ForeignKey("news_items.id"), nullable=True, index=True)
+
+    # Delta sync (services/changes.py): sequence number of the last change
+    change_seq = Column(BigInteger, nullable=True, index=True)
     
     source = relationship("Source")
+    duplicate_of = relationship("NewsItem", remote_side=[id])
     tags = relationship("Tag", secondary=news_tags, back_populates="news_items")
     entities = relationship("Entity", secondary=news_entities, back_populates="news_items")
 
+class NewsTombstone(Base):
+    """Deleted news item, kept for a while so delta-sync clients can drop it too."""
+    __tablename__ = "news_tombstones"
+
+    news_id = Column(Integer, primary_key=True, autoincrement=False)
+    change_seq = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class ChangeCounter(Base):
+    """Named monotonic counters (services/changes.py; also translation memory stats)."""
+    __tablename__ = "change_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+class ParsedDoc(Base):
+    """SpaCy parse of a news item's text (DocBin bytes), see services/doc_cache.py."""
+    __tablename__ = "parsed_docs"
+
+    news_id = Column(Integer, ForeignKey("news_items.id"), primary_key=True)
+    text_hash = Column(String, nullable=False)  # sha256 of model + parsed text
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True)  # SCAN, TRANSLATE, EXTRACT, EXTRACT_NATIVE, CRAWL
+    payload = Column(JSON, nullable=True)
+    status = Column(String, default="PENDING", index=True)  # PENDING, RUNNING, DONE, FAILED
+    dedupe_key = Column(String, nullable=True, index=True)  # Only one active job per key
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_after = Column(DateTime, default=datetime.utcnow, index=True)
+    locked_by = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    progress = Column(JSON, nullable=True)  # Live counters written while RUNNING
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class FetchHealth(Base):
+    __tablename__ = "fetch_health"
+
+    key = Column(String, primary_key=True, index=True)  # "source:<id>" or "host:<netloc>"
+    scope = Column(String)  # SOURCE, HOST
+    source_id = Column(Integer, ForeignKey("sources.id"), nullable=True, index=True)
+    host = Column(String, nullable=True, index=True)
+    state = Column(String, default="CLOSED")  # CLOSED, OPEN, HALF_OPEN
+    consecutive_failures = Column(Integer, default=0)
+    total_failures = Column(Integer, default=0)
+    total_successes = Column(Integer, default=0)
+    opened_at = Column(DateTime, nullable=True)
+    last_success_at = Column(DateTime, nullable=True)
+    last_failure_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    latencies = Column(JSON, nullable=True)  # Recent fetch latencies (ms)
+    p50_ms = Column(Integer, nullable=True)
+    p95_ms = Column(Integer, nullable=True)
+
+class TranslationMemory(Base):
+    __tablename__ = "translation_memory"
+
+    key = Column(String, primary_key=True, index=True)  # sha256(text, language, model, prompt version)
+    source_language = Column(String, nullable=True)
+    model = Column(String)
+    prompt_version = Column(String)
+    title_es = Column(String)
+    content_es = Column(Text, nullable=True)
+    tokens = Column(Integer, default=0)  # Estimated tokens a fresh translation costs
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 class AgentConfig(Base):
     __tablename__ = "agent_config"
 
@@ -94,3 +207,7 @@ class InterestTopic(Base):
     exclusions = Column(String)  # Comma-separated
     relevance_level = Column(String)  # High, Medium, Low
     context_tags = Column(String)  # Comma-separated tags
+
+# Registers the session listeners that stamp changed news items (delta sync) in
+# every process that maps these models, whatever else it imports
+from services import changes  # noqa: E402,F401
@@ -16,10 +16,42 @@ class SourceCreate(SourceBase):
 
 class SourceResponse(SourceBase):
     id: int
+    health_detail: Optional[str] = None
+    poll_interval: Optional[int] = None
+    last_polled_at: Optional[datetime] = None
+    next_poll_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class FetchHealthResponse(BaseModel):
+    key: str
+    scope: str
+    source_id: Optional[int] = None
+    host: Optional[str] = None
+    state: str
+    consecutive_failures: int = 0
+    total_failures: int = 0
+    total_successes: int = 0
+    opened_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    p50_ms: Optional[int] = None
+    p95_ms: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class TranslationMemoryStats(BaseModel):
+    entries: int
+    total_hits: int
+    tokens_saved: int
+    run_lookups: int  # Every translation run so far, across processes
+    run_hits: int
+    run_tokens_saved: int
+    hit_rate: float
+
 class EntityBase(BaseModel):
     name: str
     type: str
@@ -69,22 +101,79 @@ class NewsItemCreate(NewsItemBase):
 
 class NewsItemResponse(NewsItemBase):
     id: int
-    source_id: int
+    source_id: Optional[int] = None  # None once the source has been deleted
     source: Optional[SourceResponse] = None
     created_at: datetime
     language: Optional[str] = None
     content_snippet: Optional[str] = None
     title_es: Optional[str] = None
     content_es: Optional[str] = None
+    translation_status: Optional[str] = None
+    duplicate_of_id: Optional[int] = None
     tags: List[TagResponse] = []
     entities: List[EntitySimpleResponse] = []
 
     class Config:
         from_attributes = True
 
+class NewsPage(BaseModel):
+    items: List[NewsItemResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page; None on the last one
+    seq: int = 0  # Change sequence the page reflects; poll /api/news/changes?since= from it
+
+class NewsChanges(BaseModel):
+    seq: int  # Pass back as ?since= on the next poll
+    reset: bool = False  # The delta is too large or too old: reload the listing instead
+    items: List[NewsItemResponse] = []  # New or updated items of the listing
+    removed: List[int] = []  # Ids that left the listing or were deleted
+
 class NewsItemStatusUpdate(BaseModel):
     status: str
 
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str
+    payload: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    attempts: int = 0
+    max_attempts: int = 0
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ScanRequest(BaseModel):
+    source_ids: Optional[List[int]] = None
+
+class ScanStartResponse(BaseModel):
+    scan_id: int
+    status: str
+    sources_total: int
+
+class ScanSourceProgress(BaseModel):
+    source_id: int
+    name: Optional[str] = None
+    status: str
+    latency_ms: Optional[int] = None
+    items: int = 0
+    error: Optional[str] = None
+
+class ScanProgressResponse(BaseModel):
+    scan_id: int
+    status: str
+    sources_total: int = 0
+    sources_done: int = 0
+    sources_remaining: int = 0
+    items_created: int = 0
+    new_item_ids: List[int] = []
+    sources: List[ScanSourceProgress] = []
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class AgentConfigBase(BaseModel):
     key: str
     value: str
@@ -0,0 +1,140 @@
+"""
+Changes Service - News Change Sequence and Tombstones
+
+Every change a reader of the news listings can see (ingestion, status
+changes, translation, entity linking, deletion) stamps the affected
+news_items rows with a number from the "news" counter in `change_counters`,
+and deleted items leave a row in `news_tombstones`. The delta endpoint
+(GET /api/news/changes?since=N) then only reads what changed after N, and
+the listings derive their weak ETag from the counter.
+
+While a transaction works, its rows carry a negative marker of its own
+(`marker`); only when it commits does it take the next number from the
+counter and swap it in. The counter row is locked just for that last step,
+so writers never queue behind each other's work, yet numbers become visible
+in commit order: once a client has seen N, nothing numbered N or lower can
+show up later. ORM changes to NewsItem objects are marked on every flush
+(models.py imports this module, so every process that writes has the
+listeners); bulk statements set change_seq to `marker` or call `touch`.
+"""
+
+import os
+import secrets
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import ChangeCounter, NewsItem, NewsTombstone
+
+TOMBSTONE_TTL_DAYS = int(os.getenv("NEWS_TOMBSTONE_TTL_DAYS", "7"))
+
+NEWS = "news"
+PRUNED = "news_tombstones_pruned"  # Highest change_seq among the pruned tombstones
+
+_MARKER_KEY = "news_change_marker"
+
+
+def _counter(db: Session, name: str):
+    """Counter value, or None if the row does not exist yet."""
+    return db.connection().execute(select(ChangeCounter.value).where(ChangeCounter.name == name)).scalar()
+
+
+def _set_counter(db: Session, name: str, value):
+    """UPDATE a counter row (creating it first if needed) to `value`, a literal or SQL expression."""
+    conn = db.connection()
+    stmt = update(ChangeCounter).where(ChangeCounter.name == name).values(value=value)
+    if conn.execute(stmt).rowcount:
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(ChangeCounter).values(name=name, value=0))
+    except IntegrityError:
+        pass  # Created by a concurrent transaction
+    conn.execute(stmt)
+
+
+def increment(db: Session, name: str, amount: int = 1):
+    """Adds `amount` to a counter in the caller's transaction; the row stays locked until it commits."""
+    _set_counter(db, name, ChangeCounter.value + amount)
+
+
+def read(db: Session, name: str) -> int:
+    """Committed value of a counter (0 if it does not exist yet)."""
+    return db.query(ChangeCounter.value).filter(ChangeCounter.name == name).scalar() or 0
+
+
+def marker(db: Session) -> int:
+    """Placeholder change_seq of the current transaction, replaced by its sequence number on commit."""
+    value = db.info.get(_MARKER_KEY)
+    if value is None:
+        value = db.info[_MARKER_KEY] = -1 - secrets.randbits(62)
+    return value
+
+
+def current(db: Session) -> int:
+    """Highest committed sequence number (0 before the first change)."""
+    return db.query(ChangeCounter.value).filter(ChangeCounter.name == NEWS).scalar() or 0
+
+
+def pruned(db: Session) -> int:
+    """Deletions numbered up to this value may have been forgotten already."""
+    return db.query(ChangeCounter.value).filter(ChangeCounter.name == PRUNED).scalar() or 0
+
+
+def touch(db: Session, *criteria):
+    """Marks the news items matching `criteria` as changed (for bulk UPDATEs and link inserts)."""
+    db.query(NewsItem).filter(*criteria).update({NewsItem.change_seq: marker(db)}, synchronize_session=False)
+
+
+def record_deleted(db: Session, news_ids):
+    """
+    Leaves tombstones for news items about to be deleted (ids or an id
+    subquery) and drops the ones older than TOMBSTONE_TTL_DAYS.
+    """
+    now = datetime.utcnow()
+    # SQLite can hand the id of a deleted last row out again
+    db.query(NewsTombstone).filter(NewsTombstone.news_id.in_(news_ids)).delete(synchronize_session=False)
+    db.execute(insert(NewsTombstone).from_select(
+        ["news_id", "change_seq", "deleted_at"],
+        select(NewsItem.id, literal(marker(db)), literal(now)).where(NewsItem.id.in_(news_ids))
+    ))
+
+    cutoff = now - timedelta(days=TOMBSTONE_TTL_DAYS)
+    expired = db.query(func.max(NewsTombstone.change_seq)).filter(NewsTombstone.deleted_at < cutoff).scalar()
+    if expired is not None:
+        if expired > pruned(db):
+            _set_counter(db, PRUNED, expired)
+        db.query(NewsTombstone).filter(NewsTombstone.deleted_at < cutoff).delete(synchronize_session=False)
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_news_items(session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, NewsItem)]
+    changed += [obj for obj in session.dirty if isinstance(obj, NewsItem) and session.is_modified(obj)]
+    if changed:
+        value = marker(session)
+        for item in changed:
+            item.change_seq = value
+
+
+@event.listens_for(Session, "before_commit")
+def _assign_seq(session):
+    if session.in_nested_transaction():
+        return  # Releasing a savepoint (e.g. entity_index.create) fires it too
+    # before_commit runs ahead of the final flush, which may still mark rows
+    session.flush()
+    value = session.info.get(_MARKER_KEY)
+    if value is None:
+        return
+    _set_counter(session, NEWS, ChangeCounter.value + 1)
+    seq = _counter(session, NEWS)
+    conn = session.connection()
+    conn.execute(update(NewsItem).where(NewsItem.change_seq == value).values(change_seq=seq))
+    conn.execute(update(NewsTombstone).where(NewsTombstone.change_seq == value).values(change_seq=seq))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_marker(session, transaction):
+    # Savepoints end inside the transaction whose rows carry the marker
+    if transaction.parent is None:
+        session.info.pop(_MARKER_KEY, None)
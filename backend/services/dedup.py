@@ -0,0 +1,249 @@
+"""
+Dedup Service - Near-Duplicate Story Detection (SimHash)
+
+Wire stories get lightly rewritten by every outlet, so URL canonicalization
+can't catch them. Each NewsItem gets a 64-bit SimHash of its title and
+content_snippet (persisted in news_items.simhash); items within
+NEAR_DUP_MAX_DISTANCE bits of a recent item are linked to it through
+duplicate_of_id, and the translator/extractor reuse the canonical item's
+translation and entities instead of processing the copy again.
+
+Lookups use the pigeonhole banding trick: the fingerprint is split into
+max_distance + 1 bands, and any two fingerprints within max_distance bits
+must share at least one band exactly, so only those buckets are compared.
+
+Deleted items leave the index through their tombstones (services/changes.py),
+so every process forgets them on its next refresh; the canonicals a feed is
+about to reference are also checked (and locked) right before its insert.
+"""
+
+import os
+import re
+import hashlib
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, List, Tuple
+from sqlalchemy.orm import Session
+from models import NewsItem, NewsTombstone
+from . import changes
+
+# Headline + snippet texts are short, so features are single words: rewrites of
+# the same wire story land ~5-12 bits apart, unrelated stories 20+.
+MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "8"))  # < 0 disables detection
+WINDOW_HOURS = int(os.getenv("NEAR_DUP_WINDOW_HOURS", "72"))
+SHINGLE_SIZE = int(os.getenv("NEAR_DUP_SHINGLE_SIZE", "1"))
+
+_MASK64 = (1 << 64) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def simhash(text: str) -> int:
+    """Unsigned 64-bit SimHash over word shingles of the normalized text."""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return 0
+    if len(words) < SHINGLE_SIZE:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def item_fingerprint(title: Optional[str], content_snippet: Optional[str]) -> int:
+    return simhash(f"{title or ''} {content_snippet or ''}")
+
+
+def to_signed(value: int) -> int:
+    """SQLite/Postgres BIGINT are signed: store the unsigned fingerprint as two's complement."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & _MASK64
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateIndex:
+    """In-memory banded SimHash index over a sliding time window."""
+
+    def __init__(self, max_distance: int = MAX_DISTANCE, window_hours: int = WINDOW_HOURS):
+        self.max_distance = max_distance
+        self.window = timedelta(hours=window_hours)
+        bands = max(1, max_distance + 1)
+        self.band_bits = 64 // bands
+        self.bands = bands
+        self.buckets = {}        # (band, value) -> set(item_id)
+        self.fingerprints = {}   # item_id -> fingerprint
+        self.canonical = {}      # item_id -> canonical item_id (itself if original)
+        self.order = deque()     # (created_at, item_id), oldest first
+        self.last_loaded_id = 0
+        self.last_tombstone_seq = 0
+        self.lock = threading.Lock()
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, (fingerprint >> (band * self.band_bits)) & mask
+
+    def _remove(self, item_id: int):
+        fingerprint = self.fingerprints.pop(item_id, None)
+        self.canonical.pop(item_id, None)
+        if fingerprint is None:
+            return
+        for key in self._band_keys(fingerprint):
+            bucket = self.buckets.get(key)
+            if bucket:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def _evict(self, now: datetime):
+        cutoff = now - self.window
+        while self.order and self.order[0][0] < cutoff:
+            _, item_id = self.order.popleft()
+            self._remove(item_id)
+
+    def add(self, item_id: int, fingerprint: int, canonical_id: Optional[int] = None, created_at: Optional[datetime] = None):
+        created_at = created_at or datetime.utcnow()
+        with self.lock:
+            if item_id in self.fingerprints:
+                return
+            self.fingerprints[item_id] = fingerprint
+            self.canonical[item_id] = canonical_id or item_id
+            self.order.append((created_at, item_id))
+            for key in self._band_keys(fingerprint):
+                self.buckets.setdefault(key, set()).add(item_id)
+            self.last_loaded_id = max(self.last_loaded_id, item_id)
+            self._evict(datetime.utcnow())
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Canonical id of the closest item within max_distance bits, or None."""
+        if self.max_distance < 0 or fingerprint == 0:
+            return None
+        best = None
+        with self.lock:
+            for key in self._band_keys(fingerprint):
+                for item_id in self.buckets.get(key, ()):
+                    distance = hamming(fingerprint, self.fingerprints[item_id])
+                    if distance <= self.max_distance and (best is None or distance < best[0] or (distance == best[0] and item_id < best[1])):
+                        best = (distance, item_id)
+            return self.canonical[best[1]] if best else None
+
+    def discard(self, item_ids: Iterable[int]):
+        """Forgets deleted items; their duplicates (unlinked by the delete) become originals."""
+        with self.lock:
+            removed = {item_id for item_id in item_ids if item_id in self.fingerprints}
+            if not removed:
+                return
+            for item_id in removed:
+                self._remove(item_id)
+            for item_id, canonical_id in self.canonical.items():
+                if canonical_id in removed:
+                    self.canonical[item_id] = item_id
+            # SQLite hands the id of a deleted last row out again: load it anew
+            self.last_loaded_id = min(self.last_loaded_id, min(removed) - 1)
+
+    def refresh(self, db: Session):
+        """Loads fingerprints persisted, and drops items deleted, since the last refresh (e.g. by other processes)."""
+        deleted = db.query(NewsTombstone.news_id, NewsTombstone.change_seq).filter(
+            NewsTombstone.change_seq > self.last_tombstone_seq
+        ).all()
+        if deleted:
+            self.discard(news_id for news_id, _ in deleted)
+            self.last_tombstone_seq = max(seq for _, seq in deleted)
+
+        cutoff = datetime.utcnow() - self.window
+        rows = db.query(NewsItem.id, NewsItem.simhash, NewsItem.duplicate_of_id, NewsItem.created_at).filter(
+            NewsItem.id > self.last_loaded_id,
+            NewsItem.simhash != None,
+            NewsItem.created_at >= cutoff
+        ).order_by(NewsItem.id).all()
+        for item_id, fingerprint, duplicate_of_id, created_at in rows:
+            self.add(item_id, to_unsigned(fingerprint), duplicate_of_id, created_at)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index(db: Session) -> NearDuplicateIndex:
+    """Process-wide index, brought up to date with the DB on every call."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+    _index.refresh(db)
+    return _index
+
+
+def forget(item_ids: Iterable[int]):
+    """Drops deleted items from this process's index (others catch up through the tombstones)."""
+    if _index is not None:
+        _index.discard(item_ids)
+
+
+def link_near_duplicates(db: Session, rows: List[dict]) -> List[Tuple[int, int]]:
+    """
+    Sets `duplicate_of_id` on rows (dicts with a "simhash" fingerprint) that
+    match a recent item. Matches against earlier rows of the same batch are
+    returned as (row_position, canonical_position) pairs, because those ids
+    only exist after the insert; resolve them with register_inserted().
+    """
+    index = get_index(db)
+    pending = []
+    in_batch = []
+    for position, row in enumerate(rows):
+        fingerprint = row.get("simhash") or 0
+        canonical_id = index.find(fingerprint)
+        row["duplicate_of_id"] = canonical_id
+        if canonical_id is None and index.max_distance >= 0 and fingerprint:
+            for other_position, other_fp in in_batch:
+                if hamming(fingerprint, other_fp) <= index.max_distance:
+                    pending.append((position, other_position))
+                    break
+            else:
+                in_batch.append((position, fingerprint))
+        row["simhash"] = to_signed(fingerprint) if fingerprint else None
+
+    # The index may lag behind a delete made elsewhere. Lock the canonicals
+    # still there (FOR KEY SHARE on PostgreSQL) so they outlive the insert.
+    canonical_ids = {row["duplicate_of_id"] for row in rows if row["duplicate_of_id"] is not None}
+    if canonical_ids:
+        existing = {item_id for (item_id,) in db.query(NewsItem.id).filter(
+            NewsItem.id.in_(canonical_ids)).with_for_update(key_share=True)}
+        gone = canonical_ids - existing
+        if gone:
+            index.discard(gone)
+            for row in rows:
+                if row["duplicate_of_id"] in gone:
+                    row["duplicate_of_id"] = None
+    return pending
+
+
+def register_inserted(db: Session, ids: List[int], pending: List[Tuple[int, int]]):
+    """
+    Links in-batch near-duplicates once their ids exist, then pulls the
+    committed rows into the index. Call after the insert has been committed.
+    """
+    for position, canonical_position in pending:
+        db.query(NewsItem).filter(NewsItem.id == ids[position]).update(
+            {NewsItem.duplicate_of_id: ids[canonical_position], NewsItem.change_seq: changes.marker(db)},
+            synchronize_session=False)
+    db.commit()
+    if ids:
+        get_index(db)
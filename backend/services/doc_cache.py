@@ -0,0 +1,66 @@
+"""
+Doc Cache Service - Serialized SpaCy Docs per News Item
+
+The extractor stores the parse of every article it processes in the
+`parsed_docs` table: a DocBin holding the tokens and NER annotations, keyed by
+news item and tagged with a hash of the model and the parsed text. Watch list
+re-scans (`extractor.rescan_watchlist`) deserialize these docs and run only the
+PhraseMatcher on them, so new watch list names reach the whole archive without
+repeating NER. A doc whose hash no longer matches the item's text is stale and
+is not used.
+"""
+
+import os
+import hashlib
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from models import ParsedDoc
+
+if TYPE_CHECKING:
+    from spacy.tokens import Doc
+    from spacy.vocab import Vocab
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("DOC_CACHE", "1") == "1"
+
+# Token text (whitespace is always kept) and entities; LOWER and the other
+# lexical attributes the matcher uses come back from the vocab.
+ATTRS = ["ORTH", "ENT_IOB", "ENT_TYPE"]
+
+
+def text_hash(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\x1f{text}".encode("utf-8")).hexdigest()
+
+
+def serialize(doc: "Doc") -> bytes:
+    from spacy.tokens import DocBin
+    return DocBin(attrs=ATTRS, docs=[doc]).to_bytes()
+
+
+def deserialize(data: bytes, vocab: "Vocab") -> "Doc":
+    from spacy.tokens import DocBin
+    return next(DocBin().from_bytes(data).get_docs(vocab))
+
+
+def store(db: Session, model: str, entries: Iterable[Tuple[int, str, "Doc"]]):
+    """Saves (news_id, parsed text, doc) entries, replacing older parses. The caller commits."""
+    if not ENABLED:
+        return
+    now = datetime.utcnow()
+    rows = {
+        news_id: {"news_id": news_id, "text_hash": text_hash(text, model), "data": serialize(doc), "created_at": now}
+        for news_id, text, doc in entries
+    }
+    if not rows:
+        return
+    db.query(ParsedDoc).filter(ParsedDoc.news_id.in_(list(rows))).delete(synchronize_session=False)
+    db.execute(insert(ParsedDoc), list(rows.values()))
+
+
+def stats(db: Session) -> dict:
+    count, size = db.query(func.count(ParsedDoc.news_id), func.coalesce(func.sum(func.length(ParsedDoc.data)), 0)).one()
+    return {"docs": count, "bytes": size}
@@ -0,0 +1,104 @@
+"""
+Entity Index Service - In-memory Entity Name Lookup
+
+Keeps a process-level map of normalized entity name -> (id, type, is_ignored)
+so the extractor resolves candidate names without one query per name. The map
+is loaded once, extended as the extractor creates entities, and dropped by the
+entity CRUD endpoints through `invalidate()`. That also writes a new version
+stamp to agent_config, so other processes (pipeline workers) notice the change
+and reload on their next batch.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, NamedTuple, Optional, Set
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import AgentConfig, Entity, normalize_entity_name
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "entity_index_version"
+
+
+class IndexEntry(NamedTuple):
+    id: int
+    type: str
+    is_ignored: bool
+
+
+_entries: Optional[Dict[str, IndexEntry]] = None
+_version: Optional[str] = None
+_lock = threading.Lock()
+
+
+def read_version(db: Session) -> Optional[str]:
+    """Current stamp of the entities table; changes whenever `invalidate()` runs."""
+    row = db.query(AgentConfig.value).filter(AgentConfig.key == VERSION_KEY).first()
+    return row[0] if row else None
+
+
+def get(db: Session) -> Dict[str, IndexEntry]:
+    """
+    Returns the name map, loading it on first use or when another process has
+    changed the entities since it was loaded (one primary-key read per call).
+    """
+    global _entries, _version
+    version = read_version(db)
+    with _lock:
+        if _entries is None or version != _version:
+            start = time.time()
+            rows = db.query(Entity.id, Entity.normalized_name, Entity.type, Entity.is_ignored).all()
+            _entries = {
+                row.normalized_name: IndexEntry(row.id, row.type, bool(row.is_ignored))
+                for row in rows if row.normalized_name
+            }
+            _version = version
+            logger.info(f"[ENTIDADES] Índice de entidades cargado: {len(_entries)} nombres en {time.time() - start:.2f}s")
+        return _entries
+
+
+def ignored_names(db: Session) -> Set[str]:
+    entries = get(db)
+    with _lock:
+        return {name for name, entry in entries.items() if entry.is_ignored}
+
+
+def create(db: Session, name: str, entity_type: str) -> IndexEntry:
+    """
+    Inserts a new entity and adds it to the map. If another process inserted the
+    same normalized name meanwhile, the existing row is used instead.
+    """
+    key = normalize_entity_name(name)
+    try:
+        with db.begin_nested():
+            entity = Entity(name=name, type=entity_type)
+            db.add(entity)
+        entry = IndexEntry(entity.id, entity.type, False)
+    except IntegrityError:
+        row = db.query(Entity.id, Entity.type, Entity.is_ignored).filter(Entity.normalized_name == key).one()
+        entry = IndexEntry(row.id, row.type, bool(row.is_ignored))
+    with _lock:
+        if _entries is not None:
+            _entries[key] = entry
+    return entry
+
+
+def reset():
+    """Drops this process's map only (e.g. after a rolled back extraction)."""
+    global _entries
+    with _lock:
+        _entries = None
+
+
+def invalidate(db: Session):
+    """Drops the map in every process after entities were changed. Commits."""
+    reset()
+    row = db.query(AgentConfig).filter(AgentConfig.key == VERSION_KEY).first()
+    if row is None:
+        db.add(AgentConfig(key=VERSION_KEY, value=uuid.uuid4().hex))
+    else:
+        row.value = uuid.uuid4().hex
+    db.commit()
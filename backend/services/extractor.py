@@ -3,28 +3,78 @@ Extractor Service - Named Entity Recognition (NER) with SpaCy
 
 Handles local entity extraction from news items using SpaCy.
 Processes both translated news and native Spanish news.
+
+The SpaCy model is loaded on first use (`get_nlp()`), so importing this module
+is cheap: the API and workers that never extract do not pay for it. Worker
+processes can load it up front with `warm_up()`.
 """
 
-import spacy
-from spacy.matcher import PhraseMatcher
 import logging
+import os
 import re
+import threading
+import time
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from models import NewsItem, Entity
-from typing import List, Optional, Set
+from models import NewsItem, ParsedDoc, news_entities, normalize_entity_name
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set
+from . import changes, doc_cache, entity_index, watchlist
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+    from .watchlist import WatchList
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load SpaCy model globally
-try:
-    logger.info("[EXTRACTOR] Cargando modelo SpaCy 'es_core_news_lg'...")
-    nlp = spacy.load("es_core_news_lg")
-    logger.info("[EXTRACTOR] Modelo cargado exitosamente")
-except Exception as e:
-    logger.error(f"[EXTRACTOR] Error al cargar el modelo SpaCy: {e}")
-    nlp = None
+SPACY_MODEL = os.getenv("SPACY_MODEL", "es_core_news_lg")
+RESCAN_CHUNK_SIZE = int(os.getenv("RESCAN_CHUNK_SIZE", "500"))  # Cached docs per re-scan step
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "64"))  # Texts per nlp.pipe batch
+NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))  # Worker processes for large backlogs
+
+def unneeded_pipes(nlp_obj: "Language") -> List[str]:
+    """
+    Components extraction does not use: everything except the NER and the
+    tok2vec layers it listens to. The watch list matcher works on LOWER, which
+    the tokenizer already provides.
+    """
+    keep = {"ner"}
+    for name, component in nlp_obj.pipeline:
+        if "ner" in getattr(component, "listening_components", []):
+            keep.add(name)
+    return [name for name in nlp_obj.pipe_names if name not in keep]
+
+_nlp = None
+_nlp_failed = False
+_nlp_lock = threading.Lock()
+
+def get_nlp() -> Optional["Language"]:
+    """
+    Returns the SpaCy model, loading it on the first call (thread-safe).
+    Returns None if it could not be loaded; the failure is not retried.
+    """
+    global _nlp, _nlp_failed
+    if _nlp is not None or _nlp_failed:
+        return _nlp
+    with _nlp_lock:
+        if _nlp is None and not _nlp_failed:
+            start = time.time()
+            try:
+                import spacy
+                logger.info(f"[EXTRACTOR] Cargando modelo SpaCy '{SPACY_MODEL}'...")
+                nlp_obj = spacy.load(SPACY_MODEL)
+                nlp_obj.select_pipes(disable=unneeded_pipes(nlp_obj))
+                _nlp = nlp_obj
+                logger.info(f"[EXTRACTOR] Modelo cargado en {time.time() - start:.1f}s (componentes activos: {', '.join(_nlp.pipe_names)})")
+            except Exception as e:
+                logger.error(f"[EXTRACTOR] Error al cargar el modelo SpaCy: {e}")
+                _nlp_failed = True
+    return _nlp
+
+def warm_up() -> bool:
+    """Loads the model ahead of the first extraction. Returns whether it is available."""
+    return get_nlp() is not None
 
 # Mapping SpaCy labels to DB Enums
 # We only care about PER, ORG, LOC, GPE
@@ -72,55 +122,57 @@ def is_valid_entity(text: str, label: str) -> bool:
         
     return True
 
-def load_watchlist_matcher(db: Session, nlp_obj: spacy.language.Language) -> Optional[PhraseMatcher]:
+def load_watchlist_matcher(db: Session, nlp_obj: "Language") -> Optional["WatchList"]:
     """
-    Loads active entity names from Entity table into a SpaCy PhraseMatcher.
+    Returns the process-wide watch list matcher (active entity names), patched
+    with whatever changed in the Entity table since the previous batch.
     """
     try:
-        # Load entities that are NOT ignored
-        active_entities = db.query(Entity).filter(Entity.is_ignored == False).all()
-        
-        if not active_entities:
-            return None
-            
-        matcher = PhraseMatcher(nlp_obj.vocab, attr="LOWER")
-        # Use a set to avoid duplicates and convert to doc objects
-        patterns = [nlp_obj.make_doc(e.name) for e in active_entities]
-        
-        if not patterns:
-            return None
-            
-        matcher.add("WATCH_LIST", patterns)
-        
-        logger.info(f"[EXTRACTOR] Watch List cargada: {len(patterns)} entidades activas")
-        return matcher
+        matcher = watchlist.get(db, nlp_obj)
+        return matcher if matcher else None
     except Exception as e:
         logger.error(f"[EXTRACTOR] Error al cargar Watch List: {e}")
         return None
 
 def get_blacklisted_names(db: Session) -> Set[str]:
-    """Returns a set of lowercase names of ignored entities."""
-    ignored = db.query(Entity.name).filter(Entity.is_ignored == True).all()
-    return {name[0].lower() for name in ignored}
+    """Returns a set of normalized names of ignored entities."""
+    return entity_index.ignored_names(db)
+
+def _item_text(item: NewsItem) -> str:
+    # Use Spanish content if available (translated), else fallback to original (native ES)
+    title = item.title_es or item.title
+    content = item.content_es or item.content_snippet or ""
+    return f"{title}. {content}".strip()
 
-def _extract_from_item(db: Session, item: NewsItem, matcher: PhraseMatcher = None, blacklist: Set[str] = None):
-    """Internal helper to process a single NewsItem."""
+def _copy_from_canonical(item: NewsItem, blacklist: Set[str], links: Dict[int, Set[int]]) -> bool:
+    """Near-duplicate of an already processed story: reuse its entities."""
+    canonical = item.duplicate_of
+    if canonical is None or not canonical.entities_extracted:
+        return False
+    linked = links.setdefault(item.id, set())
+    for entity in canonical.entities:
+        if entity.normalized_name not in blacklist:
+            linked.add(entity.id)
+    item.entities_extracted = True
+    logger.info(f"  > Item {item.id}: entidades copiadas del original {canonical.id}")
+    return True
+
+def _extract_from_item(db: Session, item: NewsItem, doc, index: Dict[str, entity_index.IndexEntry],
+                       links: Dict[int, Set[int]], matcher: "WatchList" = None, blacklist: Set[str] = None):
+    """
+    Internal helper to resolve the entities of a single NewsItem from its parsed
+    doc. Links are collected in `links` (item id -> entity ids) and written in bulk.
+    """
     if blacklist is None:
         blacklist = set()
         
     try:
-        # Use Spanish content if available (translated), else fallback to original (native ES)
-        title = item.title_es or item.title
-        content = item.content_es or item.content_snippet or ""
-        text = f"{title}. {content}".strip()
-        
-        doc = nlp(text)
-        entities_to_save = {} # name_lower -> (name, type)
+        entities_to_save = {} # normalized name -> (name, type)
         
         # Step 1: Statistical NER
         for ent in doc.ents:
             ent_name = ent.text.strip()
-            ent_name_lower = ent_name.lower()
+            ent_name_lower = normalize_entity_name(ent_name)
             ent_label = ent.label_
             
             # Skip if in blacklist
@@ -137,7 +189,7 @@ def _extract_from_item(db: Session, item: NewsItem, matcher: PhraseMatcher = Non
             for match_id, start, end in matches:
                 span = doc[start:end]
                 ent_name = span.text.strip()
-                ent_name_lower = ent_name.lower()
+                ent_name_lower = normalize_entity_name(ent_name)
                 
                 # If already found by NER, NER type is already there.
                 # If NOT found by NER, add it as valid entity.
@@ -146,38 +198,97 @@ def _extract_from_item(db: Session, item: NewsItem, matcher: PhraseMatcher = Non
                     if is_valid_entity(ent_name, "CONCEPT"):
                         entities_to_save[ent_name_lower] = (ent_name, "CONCEPT")
 
-        # Step 3: Save and Link
-        entities_added = 0
+        # Step 3: Resolve (in-memory index) and collect links
+        linked = links.setdefault(item.id, set())
         for name_lower, (ent_name, ent_type) in entities_to_save.items():
-            # Check existing (ilike for case-insensitive match)
-            existing_entity = db.query(Entity).filter(Entity.name.ilike(ent_name)).first()
-            
+            entry = index.get(name_lower)
+            if entry is None:
+                # Existing entities keep their DB type; new ones take the detected type
+                entry = entity_index.create(db, ent_name, ent_type)
+
             # Double check ignore status (even if not in batch blacklist yet)
-            if existing_entity and existing_entity.is_ignored:
+            if entry.is_ignored:
                 continue
-                
-            if not existing_entity:
-                existing_entity = Entity(name=ent_name, type=ent_type)
-                db.add(existing_entity)
-                db.flush()
-            else:
-                # If entity exists, we preserve its type from DB, but we already have its name
-                pass
-                
-            if existing_entity not in item.entities:
-                item.entities.append(existing_entity)
-                entities_added += 1
+            linked.add(entry.id)
                 
         item.entities_extracted = True
-        logger.info(f"  > Item {item.id}: {entities_added} entidades vinculadas ({item.language})")
+        logger.info(f"  > Item {item.id}: {len(linked)} entidades vinculadas ({item.language})")
         return True
     except Exception as e:
         logger.error(f"[EXTRACTOR] Error in item {item.id}: {e}")
         item.entities_extracted = True # Mark to avoid retrying indefinitely
         return False
 
+def _write_links(db: Session, links: Dict[int, Set[int]]) -> int:
+    """Bulk-inserts the news_entities rows that do not exist yet."""
+    links = {news_id: entity_ids for news_id, entity_ids in links.items() if entity_ids}
+    if not links:
+        return 0
+    existing = set(db.execute(
+        select(news_entities.c.news_id, news_entities.c.entity_id).where(news_entities.c.news_id.in_(list(links)))
+    ).all())
+    rows = [
+        {"news_id": news_id, "entity_id": entity_id}
+        for news_id, entity_ids in links.items()
+        for entity_id in entity_ids
+        if (news_id, entity_id) not in existing
+    ]
+    if rows:
+        changes.touch(db, NewsItem.id.in_({row["news_id"] for row in rows}))
+        db.execute(insert(news_entities), rows)
+    return len(rows)
+
+def _extract_items(db: Session, nlp_obj: "Language", items: List[NewsItem], matcher: "WatchList" = None, blacklist: Set[str] = None) -> int:
+    """
+    Runs the items through nlp.pipe in batches of NLP_BATCH_SIZE, using
+    NLP_N_PROCESS workers when there are enough texts to keep them busy.
+    """
+    if blacklist is None:
+        blacklist = set()
+    index = entity_index.get(db)
+    links = {}
+    count = 0
+    to_parse = []
+    for item in items:
+        if _copy_from_canonical(item, blacklist, links):
+            count += 1
+        else:
+            to_parse.append(item)
+    if not to_parse:
+        _write_links(db, links)
+        return count
+
+    # Worker start-up only pays off when every process gets at least one full batch
+    n_process = NLP_N_PROCESS if len(to_parse) >= NLP_BATCH_SIZE * NLP_N_PROCESS else 1
+    texts = [_item_text(item) for item in to_parse]
+    parsed = []
+    try:
+        docs = nlp_obj.pipe(texts, batch_size=NLP_BATCH_SIZE, n_process=n_process)
+        for item, text, doc in zip(to_parse, texts, docs):
+            if _extract_from_item(db, item, doc, index, links, matcher, blacklist):
+                count += 1
+            parsed.append((item.id, text, doc))
+    except Exception as e:
+        # Items not reached stay pending and are picked up by the next run
+        logger.error(f"[EXTRACTOR] Error en nlp.pipe ({len(to_parse)} textos): {e}")
+    _write_links(db, links)
+    doc_cache.store(db, SPACY_MODEL, parsed)
+    return count
+
+def _extract_and_commit(db: Session, nlp_obj: "Language", items: List[NewsItem], matcher: "WatchList", blacklist: Set[str]) -> int:
+    try:
+        count = _extract_items(db, nlp_obj, items, matcher, blacklist)
+        db.commit()
+        return count
+    except Exception:
+        # Entities created in this batch are gone; so must be their index entries
+        db.rollback()
+        entity_index.reset()
+        raise
+
 def process_pending_entities(db: Session, item_ids: List[int] = None) -> int:
     """Processes translated items (Flow A)."""
+    nlp = get_nlp()
     if nlp is None: return 0
     
     # Load Watch List Matcher and Black List once per batch
@@ -191,15 +302,12 @@ def process_pending_entities(db: Session, item_ids: List[int] = None) -> int:
         query = query.filter(NewsItem.title_es != None).limit(10)
         
     items = query.all()
-    count = 0
-    for item in items:
-        if _extract_from_item(db, item, matcher, blacklist):
-            count += 1
-    db.commit()
+    count = _extract_and_commit(db, nlp, items, matcher, blacklist)
     return count
 
 def process_native_pending(db: Session) -> int:
     """Processes native Spanish items (Flow B)."""
+    nlp = get_nlp()
     if nlp is None: return 0
     
     # Load Watch List Matcher and Black List once per batch
@@ -216,9 +324,53 @@ def process_native_pending(db: Session) -> int:
         return 0
         
     logger.info(f"[EXTRACTOR] Procesando {len(items)} noticias NATIVAS ES con SpaCy (+ WatchList & BlackList)...")
-    count = 0
-    for item in items:
-        if _extract_from_item(db, item, matcher, blacklist):
-            count += 1
-    db.commit()
+    count = _extract_and_commit(db, nlp, items, matcher, blacklist)
     return count
+
+def rescan_watchlist(db: Session, entity_ids: List[int] = None, on_progress: Callable[[dict], None] = None) -> dict:
+    """
+    Runs only the watch list matcher (no NER) over the cached docs of items
+    already extracted and links what it finds, e.g. after analysts add names.
+    `entity_ids` limits the scan to those entities. Items without a cached doc,
+    or whose text changed since it was parsed, are skipped and counted as stale.
+    """
+    result = {"scanned": 0, "stale": 0, "linked": 0}
+    nlp = get_nlp()
+    if nlp is None:
+        return result
+    matcher = watchlist.WatchList.of(db, nlp, entity_ids) if entity_ids else load_watchlist_matcher(db, nlp)
+    if not matcher:
+        return result
+
+    start = time.time()
+    last_id = 0
+    while True:
+        rows = db.query(
+            ParsedDoc.news_id, ParsedDoc.text_hash, ParsedDoc.data,
+            NewsItem.id, NewsItem.title, NewsItem.title_es, NewsItem.content_snippet, NewsItem.content_es
+        ).join(NewsItem, NewsItem.id == ParsedDoc.news_id).filter(
+            ParsedDoc.news_id > last_id,
+            NewsItem.entities_extracted == True
+        ).order_by(ParsedDoc.news_id).limit(RESCAN_CHUNK_SIZE).all()
+        if not rows:
+            break
+
+        links = {}
+        for row in rows:
+            last_id = row.news_id
+            if row.text_hash != doc_cache.text_hash(_item_text(row), SPACY_MODEL):
+                result["stale"] += 1
+                continue
+            doc = doc_cache.deserialize(row.data, nlp.vocab)
+            for match_id, start_token, end_token in matcher(doc):
+                if is_valid_entity(doc[start_token:end_token].text.strip(), "CONCEPT"):
+                    links.setdefault(row.news_id, set()).add(int(nlp.vocab.strings[match_id]))
+            result["scanned"] += 1
+        result["linked"] += _write_links(db, links)
+        db.commit()
+        if on_progress:
+            on_progress(dict(result))
+
+    logger.info(f"[EXTRACTOR] Re-escaneo de Watch List: {result['scanned']} docs en {time.time() - start:.1f}s, "
+                f"{result['linked']} vínculos nuevos ({result['stale']} sin doc vigente)")
+    return result
@@ -0,0 +1,205 @@
+"""
+Health Service - Circuit Breakers for Feed Fetching
+
+Tracks fetch outcomes per source and per host in the `fetch_health` table
+(consecutive failures, recent latencies and their p50/p95). After N
+consecutive failures a circuit opens and that source/host is skipped by
+scans until its cool-down expires; then a single half-open probe decides
+whether it closes again. Only failures that say something about the
+server (connection errors, timeouts, 5xx, 429) count against the host; other
+HTTP errors such as a removed feed's 404 only count against the source.
+Source.health_status (OK / DEGRADED / DOWN) and
+Source.health_detail are derived from these records after every scan.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Tuple, Iterable
+from urllib.parse import urlparse
+import requests
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import FetchHealth, Source
+
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+OPEN_SECONDS = int(os.getenv("CIRCUIT_OPEN_SECONDS", "900"))
+MAX_OPEN_SECONDS = int(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", "86400"))
+LATENCY_WINDOW = int(os.getenv("HEALTH_LATENCY_WINDOW", "50"))
+DEGRADED_P95_MS = int(os.getenv("HEALTH_DEGRADED_P95_MS", "8000"))
+
+# Circuit states
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+# Source.health_status values
+OK = "OK"
+DEGRADED = "DEGRADED"
+DOWN = "DOWN"
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def is_host_failure(error: Exception) -> bool:
+    """False for HTTP errors that only concern the requested URL (4xx other than 429)."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def _percentile(values, pct: float) -> Optional[int]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return int(ordered[index])
+
+
+def _cooldown(record: FetchHealth) -> timedelta:
+    """Open period doubles for every threshold's worth of extra failures, capped."""
+    extra = max(0, (record.consecutive_failures or 0) - FAILURE_THRESHOLD) // FAILURE_THRESHOLD
+    return timedelta(seconds=min(MAX_OPEN_SECONDS, OPEN_SECONDS * (2 ** extra)))
+
+
+class CircuitBreaker:
+    """
+    Per-scan view of the source and host circuits.
+    Mutates FetchHealth rows on the caller's session; the caller commits.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.records = {}
+        self._probing = set()
+
+    def _record(self, scope: str, name: str, source_id: Optional[int] = None) -> FetchHealth:
+        key = f"{scope.lower()}:{name}"
+        if key not in self.records:
+            query = self.db.query(FetchHealth).filter(FetchHealth.key == key)
+            record = query.first()
+            if record is None:
+                # Overlapping scans may create the same host record: insert-or-ignore, then read it
+                dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+                self.db.execute(dialect.insert(FetchHealth).values(
+                    key=key, scope=scope, source_id=source_id, host=name if scope == "HOST" else None,
+                    state=CLOSED, consecutive_failures=0, total_failures=0, total_successes=0, latencies=[]
+                ).on_conflict_do_nothing(index_elements=[FetchHealth.key]))
+                record = query.first()
+            self.records[key] = record
+        return self.records[key]
+
+    def source_record(self, source_id: int) -> FetchHealth:
+        return self._record("SOURCE", str(source_id), source_id=source_id)
+
+    def host_record(self, host: str) -> FetchHealth:
+        return self._record("HOST", host)
+
+    def _blocked(self, record: FetchHealth, now: datetime) -> Optional[str]:
+        """Why the circuit refuses a request right now (None if it lets one through). No side effects."""
+        if record.state == CLOSED:
+            return None
+        if record.key in self._probing:
+            return "Sondeo de recuperación en curso"
+        if record.state == OPEN and record.opened_at and now < record.opened_at + _cooldown(record):
+            return f"Circuito abierto tras {record.consecutive_failures} fallos: {record.last_error}"
+        return None
+
+    def _claim(self, record: FetchHealth):
+        """A request is about to go out: an open circuit past its cool-down gets it as its single probe."""
+        if record.state != CLOSED:
+            record.state = HALF_OPEN
+            self._probing.add(record.key)
+
+    def allow(self, source_id: int, url: str) -> Tuple[bool, Optional[str]]:
+        """
+        Whether this scan may fetch the source, and why not if it may not.
+        Both circuits are checked before either claims its probe, so a refused
+        source never ties up its host's probe.
+        """
+        now = datetime.utcnow()
+        source_rec = self.source_record(source_id)
+        host_rec = self.host_record(host_of(url))
+        reason = self._blocked(source_rec, now)
+        if reason is not None:
+            return False, reason
+        reason = self._blocked(host_rec, now)
+        if reason is not None:
+            return False, f"Host {host_of(url)}: {reason}"
+        self._claim(host_rec)
+        self._claim(source_rec)
+        return True, None
+
+    def _success(self, record: FetchHealth, latency_ms: Optional[int]):
+        record.state = CLOSED
+        record.consecutive_failures = 0
+        record.total_successes = (record.total_successes or 0) + 1
+        record.last_success_at = datetime.utcnow()
+        record.opened_at = None
+        if latency_ms is not None:
+            record.latencies = ((record.latencies or []) + [latency_ms])[-LATENCY_WINDOW:]
+            record.p50_ms = _percentile(record.latencies, 50)
+            record.p95_ms = _percentile(record.latencies, 95)
+        self._probing.discard(record.key)
+
+    def _failure(self, record: FetchHealth, error: str):
+        now = datetime.utcnow()
+        record.consecutive_failures = (record.consecutive_failures or 0) + 1
+        record.total_failures = (record.total_failures or 0) + 1
+        record.last_failure_at = now
+        record.last_error = (error or "")[:500]
+        if record.state == HALF_OPEN or record.consecutive_failures >= FAILURE_THRESHOLD:
+            record.state = OPEN
+            record.opened_at = now
+        self._probing.discard(record.key)
+
+    def record_fetch(self, source_id: int, url: str, latency_ms: int, error: Optional[str] = None,
+                     host_failure: bool = True):
+        """
+        Outcome of the HTTP request. Errors count against the source, and
+        against its host only if `host_failure` (see is_host_failure); a host
+        that answered with, say, a 404 counts as reachable.
+        """
+        host_rec = self.host_record(host_of(url))
+        if error is None or not host_failure:
+            self._success(host_rec, latency_ms)
+        else:
+            self._failure(host_rec, error)
+        source_rec = self.source_record(source_id)
+        if error is None:
+            self._success(source_rec, latency_ms)
+        else:
+            self._failure(source_rec, error)
+
+    def record_source_failure(self, source_id: int, error: str):
+        """Feed-level problems (unparseable body, write errors) only affect the source."""
+        self._failure(self.source_record(source_id), error)
+
+    def apply_health(self, sources: Iterable[Source]):
+        """Derives health_status / health_detail for the given sources from their circuits."""
+        for source in sources:
+            url = (source.config or {}).get('url')
+            if not url:
+                continue
+            source.health_status, source.health_detail = evaluate(
+                self.source_record(source.id), self.host_record(host_of(url))
+            )
+
+
+def evaluate(source_rec: FetchHealth, host_rec: FetchHealth) -> Tuple[str, Optional[str]]:
+    if host_rec.state == OPEN:
+        return DOWN, f"Host {host_rec.host} caído: {host_rec.consecutive_failures} fallos seguidos ({host_rec.last_error})"
+    if source_rec.state == OPEN:
+        return DOWN, f"{source_rec.consecutive_failures} fallos seguidos ({source_rec.last_error})"
+    if source_rec.consecutive_failures:
+        return DEGRADED, f"Último intento falló: {source_rec.last_error}"
+    if source_rec.p95_ms is not None and source_rec.p95_ms > DEGRADED_P95_MS:
+        return DEGRADED, f"Respuesta lenta: p95 {source_rec.p95_ms} ms"
+    return OK, None
+
+
+def reset_source(db: Session, source_id: int):
+    """Forgets a source's circuit, e.g. after its URL changes."""
+    db.query(FetchHealth).filter(FetchHealth.key == f"source:{source_id}").delete(synchronize_session=False)
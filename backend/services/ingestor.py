@@ -4,17 +4,43 @@ Ingestor Service - RSS Feed Processing
 Handles raw RSS feed ingestion without translation.
 Extracts: title, link, date, content (cascade: content > summary > description)
 Saves to: title and content_snippet columns
+
+Feeds are downloaded concurrently over a pooled keep-alive session (bounded
+globally and per host). Parsing, HTML cleaning and language detection run in a
+process pool; DB writes stay on the calling thread.
+Each Source keeps its HTTP validators (ETag / Last-Modified) and a body hash so
+unchanged feeds are skipped before feedparser/BeautifulSoup run.
 """
 
+import os
+import time
+import hashlib
+import threading
+import multiprocessing
 import feedparser
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlparse, urlsplit, urlunsplit, urljoin, parse_qsl, urlencode
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from models import Source, NewsItem
+from . import health, dedup, changes
 from datetime import datetime, timedelta, timezone
 from langdetect import detect
 from bs4 import BeautifulSoup
 import re
-from typing import Tuple, List
+from typing import Tuple, List, Set, Optional, Callable
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+
+# Fetch tuning (overridable from .env)
+FETCH_TIMEOUT = float(os.getenv("INGEST_FETCH_TIMEOUT", "20"))
+MAX_CONCURRENT_FETCHES = int(os.getenv("INGEST_MAX_CONCURRENCY", "16"))
+MAX_FETCHES_PER_HOST = int(os.getenv("INGEST_MAX_PER_HOST", "2"))
+# Processes for feed parsing, HTML cleaning and language detection (0 = inline)
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(os.cpu_count() or 1)))
 
 
 def clean_html(html_content: str) -> str:
@@ -27,98 +53,492 @@ def clean_html(html_content: str) -> str:
     return text
 
 
-def process_feeds(db: Session) -> Tuple[int, List[int]]:
+class FetchResult:
+    """Outcome of downloading a single feed."""
+
+    def __init__(self, key, url: str, content: Optional[bytes] = None, error: Optional[Exception] = None, elapsed: float = 0.0,
+                 not_modified: bool = False, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.key = key
+        self.url = url
+        self.content = content
+        self.error = error
+        self.elapsed = elapsed
+        self.not_modified = not_modified
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class FeedFetcher:
+    """
+    Downloads feeds concurrently using a shared keep-alive session.
+
+    `max_workers` bounds the total number of requests in flight and
+    `max_per_host` keeps us from hammering a single publisher.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_FETCHES, max_per_host: int = MAX_FETCHES_PER_HOST, timeout: float = FETCH_TIMEOUT):
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def fetch(self, key, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchResult:
+        """Conditional GET: sends the stored validators and reports 304 as not_modified."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        start = time.time()
+        try:
+            with self._host_slot(url):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code == 304:
+                    return FetchResult(key, url, not_modified=True, elapsed=time.time() - start,
+                                       etag=etag, last_modified=last_modified)
+                response.raise_for_status()
+                return FetchResult(key, url, content=response.content, elapsed=time.time() - start,
+                                   etag=response.headers.get("ETag"),
+                                   last_modified=response.headers.get("Last-Modified"))
+        except Exception as e:
+            return FetchResult(key, url, error=e, elapsed=time.time() - start)
+
+    def close(self):
+        self.session.close()
+
+
+def _interleave_hosts(targets: List[Tuple]) -> List[Tuple]:
+    """Round-robin targets by host so per-host waits don't starve the pool."""
+    by_host = {}
+    for target in targets:
+        by_host.setdefault(urlparse(target[1]).netloc.lower(), []).append(target)
+    ordered = []
+    queues = list(by_host.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
+
+
+# Query parameters that only track the click, never select the article
+TRACKING_PARAMS = {
+    "ref", "ref_src", "ref_url", "referrer", "fbclid", "gclid", "dclid", "msclkid", "yclid",
+    "mc_cid", "mc_eid", "cmpid", "ocid", "igshid", "_ga", "_gl", "ito", "smid",
+    "outputtype", "amp", "s_cid", "ns_mchannel", "ns_source", "ns_campaign"
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+
+
+def canonicalize_url(url: str) -> str:
     """
-    Process all active RSS feeds and ingest new items.
-    
+    Normalizes an article URL so copies from different feeds collide:
+    https scheme, lowercase host without www./m./amp., no default port or
+    fragment, no tracking params (utm_*, ref, fbclid, ...), sorted query,
+    no AMP path variants (/amp, .amp, amp/) and no trailing slash.
+    URLs without a host (relative links) are returned as they are: they
+    would otherwise all collapse onto https:///path.
+    """
+    parts = urlsplit(url.strip())
+    if not parts.hostname:
+        return url.strip()
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m.", "amp."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r'/+', '/', parts.path or "/")
+    path = re.sub(r'(/amp/?|\.amp)$', '', path)
+    path = re.sub(r'^/amp/', '/', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path or "/", urlencode(query), ""))
+
+
+# Stay well under SQLite's bound-parameter limit for IN (...) lookups
+URL_LOOKUP_CHUNK = 500
+
+
+def existing_urls(db: Session, urls: List[str], column=NewsItem.url) -> Set[str]:
+    """Returns the subset of `urls` already stored in `column`, using one IN query per chunk."""
+    found = set()
+    for i in range(0, len(urls), URL_LOOKUP_CHUNK):
+        chunk = urls[i:i + URL_LOOKUP_CHUNK]
+        found.update(row[0] for row in db.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def bulk_insert_items(db: Session, rows: List[dict]) -> List[int]:
+    """Inserts NewsItem rows in a single executemany and returns their ids in order."""
+    if not rows:
+        return []
+    marker = changes.marker(db)
+    # Ids are matched back by url (unique): asking for RETURNING in parameter order
+    # makes SQLAlchemy fall back to one INSERT per row on SQLite
+    stmt = insert(NewsItem).returning(NewsItem.id, NewsItem.url)
+    ids = dict((url, item_id) for item_id, url in db.execute(stmt, [dict(row, change_seq=marker) for row in rows]))
+    return [ids[row["url"]] for row in rows]
+
+
+def _entry_date(entry) -> datetime:
+    item_date = datetime.now(timezone.utc)
+    if hasattr(entry, 'published_parsed') and entry.published_parsed:
+        try:
+            item_date = datetime(*entry.published_parsed[:6]).replace(tzinfo=timezone.utc)
+        except: pass
+    return item_date
+
+
+# --- CPU stage: these run in the parse process pool and only see plain data ---
+
+def parse_feed_entries(content: bytes, cutoff_iso: str, feed_url: str = "") -> List[dict]:
+    """
+    Parse a feed body into its fresh (24h), de-duplicated entries.
+    Relative links are resolved against `feed_url`.
+    """
+    cutoff_date = datetime.fromisoformat(cutoff_iso)
+    feed = feedparser.parse(content)
+
+    candidates = {}
+    for entry in feed.entries:
+        try:
+            link = entry.get('link')
+            if not link: continue
+            link = urljoin(feed_url, link.strip())
+            canonical = canonicalize_url(link)
+            if canonical in candidates: continue
+
+            # Freshness Check (24h)
+            item_date = _entry_date(entry)
+            if item_date < cutoff_date:
+                continue
+
+            # Content Extraction (Robust)
+            content_raw = ""
+            if hasattr(entry, 'content') and entry.content:
+                content_raw = entry.content[0].value
+            elif hasattr(entry, 'summary_detail') and entry.summary_detail:
+                content_raw = entry.summary_detail.value
+            elif hasattr(entry, 'summary'):
+                content_raw = entry.summary
+            else:
+                content_raw = entry.get('description', '')
+
+            candidates[canonical] = {
+                "url": link,
+                "canonical_url": canonical,
+                "title": entry.get('title', 'Sin título'),
+                "published_date": item_date.isoformat(),
+                "content_raw": content_raw or ""
+            }
+        except Exception as entry_e:
+            print(f"  [INGESTOR] Error in entry: {entry_e}")
+            continue
+
+    return list(candidates.values())
+
+
+def prepare_entries(entries: List[dict]) -> List[dict]:
+    """Clean HTML and detect language for entries that passed the existence check."""
+    rows = []
+    for entry in entries:
+        try:
+            title = entry["title"]
+            content_snippet = clean_html(entry["content_raw"])
+
+            # Language detection (Quick sample)
+            text_sample = f"{title} {content_snippet[:200]}".strip()
+            detected_lang = "unknown"
+            if text_sample:
+                try: detected_lang = detect(text_sample)
+                except: pass
+
+            rows.append({
+                "title": title,
+                "url": entry["url"],
+                "canonical_url": entry["canonical_url"],
+                "published_date": entry["published_date"],
+                "status": "DISCOVERED",
+                "language": detected_lang,
+                "content_snippet": content_snippet,
+                "simhash": dedup.item_fingerprint(title, content_snippet)
+            })
+        except Exception as entry_e:
+            print(f"  [INGESTOR] Error in entry: {entry_e}")
+            continue
+    return rows
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Shared process pool for parse/clean/detect work (None when disabled).
+    Uses spawn so forking a threaded API/worker process is never an issue.
+    """
+    global _parse_pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _parse_pool
+
+
+def reset_parse_pool():
+    """Drops the shared pool (e.g. after a worker process died); the next scan starts a new one."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def _submit(pool: Optional[ProcessPoolExecutor], fn, *args) -> Future:
+    """Runs `fn` in the pool, or inline (as an already-finished Future) when pooling is disabled."""
+    if pool is not None:
+        return pool.submit(fn, *args)
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def body_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def rss_source_query(db: Session, source_ids: Optional[List[int]] = None):
+    """Active RSS sources, optionally restricted to `source_ids`."""
+    query = db.query(Source).filter(Source.type == 'RSS', Source.active == True)
+    if source_ids is not None:
+        query = query.filter(Source.id.in_(source_ids))
+    return query
+
+
+# Pipeline stages tracked by process_feeds
+FETCH, PARSE, PREPARE = "FETCH", "PARSE", "PREPARE"
+
+
+def process_feeds(db: Session, fetcher: Optional[FeedFetcher] = None, stats: Optional[dict] = None,
+                  source_ids: Optional[List[int]] = None,
+                  on_progress: Optional[Callable[[dict], None]] = None) -> Tuple[int, List[int]]:
+    """
+    Process all active RSS feeds (or only `source_ids`) and ingest new items.
+
+    Work flows through three stages: FETCH (thread pool, pooled keep-alive
+    HTTP), PARSE (feedparser, in the process pool), and PREPARE (HTML cleaning
+    and language detection for unseen URLs, in the process pool). Results are
+    consumed as they complete by this thread, the only DB writer. Feeds that
+    answer 304 or return the same body as last time never reach PARSE, and
+    sources/hosts whose circuit breaker is open are skipped without a request
+    (see services/health.py).
+
+    If `stats` is given it is filled with per-scan counters (fetched,
+    unchanged, failed, skipped, bytes_downloaded, items_created, sources_total,
+    sources_done) and a per-source breakdown under "sources" (status,
+    latency_ms, items, error). `on_progress(stats)` is called after each
+    source completes.
+
     Returns:
         Tuple[int, List[int]]: (count of new items, list of new item IDs)
     """
-    sources = db.query(Source).filter(Source.type == 'RSS', Source.active == True).all()
-    new_items_count = 0
+    sources = rss_source_query(db, source_ids).all()
     new_item_ids = []
-    
+
     # Filter: 24h freshness
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=1)
     print(f"[INGESTOR] Starting RSS scan. Freshness cutoff: {cutoff_date}")
-    
-    HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-    
+
+    # Snapshot plain values so worker threads/processes never touch ORM objects
+    by_id = {}
+    targets = []
     for source in sources:
-        url = source.config.get('url')
+        url = (source.config or {}).get('url')
         if not url: continue
-            
-        try:
-            print(f"[INGESTOR] Fetching {source.name} ({url})...")
-            # Using requests for better timeout/header control than feedparser.parse(url)
-            response = requests.get(url, headers=HEADERS, timeout=20)
-            response.raise_for_status()
-            
-            feed = feedparser.parse(response.content)
-            print(f"[INGESTOR] Parsing {len(feed.entries)} entries from {source.name}")
-            
-            for entry in feed.entries:
+        by_id[source.id] = source
+        targets.append((source.id, url, source.etag, source.last_modified))
+    urls = {source_id: url for source_id, url, *_ in targets}
+    breaker = health.CircuitBreaker(db)
+
+    if stats is None:
+        stats = {}
+    stats.update({
+        "fetched": 0, "unchanged": 0, "failed": 0, "skipped": 0, "bytes_downloaded": 0,
+        "items_created": 0, "sources_total": len(targets), "sources_done": 0,
+        "sources": {
+            str(source_id): {"source_id": source_id, "name": by_id[source_id].name, "status": "PENDING",
+                             "latency_ms": None, "items": 0, "error": None}
+            for source_id, *_ in targets
+        }
+    })
+
+    def finish(source_id: int, status: str, items: int = 0, error: Optional[str] = None):
+        result = fetched.get(source_id)
+        stats["sources"][str(source_id)].update({
+            "status": status, "latency_ms": int(result.elapsed * 1000) if result else None,
+            "items": items, "error": error
+        })
+        stats["sources_done"] += 1
+        if on_progress:
+            on_progress(stats)
+
+    def store(source_id: int, rows: List[dict]):
+        """Single-writer step: insert the feed's new rows and its validators in one commit."""
+        source = by_id[source_id]
+        result, content_hash = fetched[source_id], hashes[source_id]
+        for row in rows:
+            row["source_id"] = source_id
+        pending_links = dedup.link_near_duplicates(db, rows)
+        created_ids = bulk_insert_items(db, rows)
+        # Only remember validators once the body has been fully ingested
+        source.etag = result.etag
+        source.last_modified = result.last_modified
+        source.content_hash = content_hash
+        db.commit()
+        dedup.register_inserted(db, created_ids, pending_links)
+
+        stats["fetched"] += 1
+        new_item_ids.extend(created_ids)
+        stats["items_created"] = len(new_item_ids)
+        finish(source_id, "OK", items=len(created_ids))
+
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = FeedFetcher()
+
+    scan_start = time.time()
+    fetched = {}  # source_id -> FetchResult
+    hashes = {}   # source_id -> body hash
+    stages = {}   # Future -> (stage, source_id)
+    claimed = set()  # Canonical URLs already on their way to the DB in this scan
+    io_pool = ThreadPoolExecutor(max_workers=max(1, min(fetcher.max_workers, len(targets))))
+    parse_pool = get_parse_pool()
+    cutoff_iso = cutoff_date.isoformat()
+    try:
+        print(f"[INGESTOR] Fetching {len(targets)} feeds (concurrency={fetcher.max_workers}, "
+              f"per host={fetcher.max_per_host}, parse workers={PARSE_WORKERS})...")
+        for target in _interleave_hosts(targets):
+            allowed, reason = breaker.allow(target[0], target[1])
+            if not allowed:
+                print(f"[INGESTOR] Skipping {by_id[target[0]].name}: {reason}")
+                stats["skipped"] += 1
+                finish(target[0], "SKIPPED", error=reason)
+                continue
+            stages[io_pool.submit(fetcher.fetch, *target)] = (FETCH, target[0])
+        db.commit()  # Persist circuit records and half-open transitions
+
+        while stages:
+            done, _ = wait(stages, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, source_id = stages.pop(future)
+                source = by_id[source_id]
+                source_name = source.name
                 try:
-                    link = entry.get('link')
-                    if not link: continue
-                        
-                    # 1. Existence Check
-                    existing = db.query(NewsItem).filter(NewsItem.url == link).first()
-                    if existing: continue
-                    
-                    # 2. Freshness Check (24h)
-                    item_date = datetime.now(timezone.utc)
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        try:
-                            item_date = datetime(*entry.published_parsed[:6]).replace(tzinfo=timezone.utc)
-                        except: pass
-                    
-                    if item_date < cutoff_date:
-                        continue
-
-                    # 3. Content Extraction (Robust)
-                    title = entry.get('title', 'Sin título')
-                    content_raw = ""
-                    if hasattr(entry, 'content') and entry.content:
-                        content_raw = entry.content[0].value
-                    elif hasattr(entry, 'summary_detail') and entry.summary_detail:
-                        content_raw = entry.summary_detail.value
-                    elif hasattr(entry, 'summary'):
-                        content_raw = entry.summary
+                    if stage == FETCH:
+                        result = future.result()
+                        fetched[source_id] = result
+                        breaker.record_fetch(source_id, urls[source_id], int(result.elapsed * 1000),
+                                             error=str(result.error) if result.error is not None else None,
+                                             host_failure=result.error is None or health.is_host_failure(result.error))
+                        db.commit()
+                        if result.error is not None:
+                            print(f"[INGESTOR] Failed to sync {source_name}: {result.error}")
+                            stats["failed"] += 1
+                            finish(source_id, "FAILED", error=str(result.error))
+                            continue
+
+                        if result.not_modified:
+                            print(f"[INGESTOR] {source_name} not modified (304), skipping")
+                            stats["unchanged"] += 1
+                            finish(source_id, "UNCHANGED")
+                            continue
+
+                        stats["bytes_downloaded"] += len(result.content)
+                        content_hash = body_hash(result.content)
+                        if content_hash == source.content_hash:
+                            print(f"[INGESTOR] {source_name} body unchanged, skipping")
+                            source.etag = result.etag
+                            source.last_modified = result.last_modified
+                            db.commit()
+                            stats["unchanged"] += 1
+                            finish(source_id, "UNCHANGED")
+                            continue
+
+                        print(f"[INGESTOR] Fetched {source_name} in {result.elapsed:.2f}s")
+                        hashes[source_id] = content_hash
+                        stages[_submit(parse_pool, parse_feed_entries, result.content, cutoff_iso, urls[source_id])] = (PARSE, source_id)
+                        result.content = None  # Body now lives in the parse stage
+
+                    elif stage == PARSE:
+                        candidates = future.result()
+                        print(f"[INGESTOR] Parsed {len(candidates)} fresh entries from {source_name}")
+
+                        # Existence Check (set-based, by raw and canonical URL). Canonicals already
+                        # handed to PREPARE for another feed in this scan count as known too.
+                        known = existing_urls(db, [c["url"] for c in candidates])
+                        known_canonical = existing_urls(db, [c["canonical_url"] for c in candidates], NewsItem.canonical_url)
+                        unseen = [
+                            c for c in candidates
+                            if c["url"] not in known
+                            and c["canonical_url"] not in known_canonical
+                            and c["canonical_url"] not in claimed
+                        ]
+                        claimed.update(c["canonical_url"] for c in unseen)
+                        if unseen:
+                            stages[_submit(parse_pool, prepare_entries, unseen)] = (PREPARE, source_id)
+                        else:
+                            store(source_id, [])
+
+                    else:  # PREPARE
+                        store(source_id, future.result())
+
+                except Exception as source_e:
+                    db.rollback()
+                    if isinstance(source_e, BrokenProcessPool):
+                        reset_parse_pool()
+                        parse_pool = get_parse_pool()
                     else:
-                        content_raw = entry.get('description', '')
-                    
-                    content_snippet = clean_html(content_raw)
-                    
-                    # 4. Language detection (Quick sample)
-                    text_sample = f"{title} {content_snippet[:200]}".strip()
-                    detected_lang = "unknown"
-                    if text_sample:
-                        try: detected_lang = detect(text_sample)
-                        except: pass
-
-                    # 5. Create Item
-                    new_item = NewsItem(
-                        source_id=source.id,
-                        title=title,
-                        url=link,
-                        published_date=item_date.isoformat(),
-                        status="DISCOVERED",
-                        language=detected_lang,
-                        content_snippet=content_snippet
-                    )
-                    db.add(new_item)
-                    db.flush()
-                    new_item_ids.append(new_item.id)
-                    new_items_count += 1
-                    
-                except Exception as entry_e:
-                    print(f"  [INGESTOR] Error in entry: {entry_e}")
-                    continue
-
-        except Exception as source_e:
-            print(f"[INGESTOR] Failed to sync {source.name}: {source_e}")
-            
+                        breaker.record_source_failure(source_id, str(source_e))
+                        db.commit()
+                    print(f"[INGESTOR] Failed to sync {source_name}: {source_e}")
+                    stats["failed"] += 1
+                    finish(source_id, "FAILED", error=str(source_e))
+    finally:
+        io_pool.shutdown(wait=False, cancel_futures=True)
+        if own_fetcher:
+            fetcher.close()
+
+    breaker.apply_health(by_id.values())
     db.commit()
-    print(f"[INGESTOR] Sync complete. Created {new_items_count} items.")
-    return new_items_count, new_item_ids
+    print(f"[INGESTOR] Sync complete. Created {len(new_item_ids)} items in {time.time() - scan_start:.2f}s "
+          f"({stats['fetched']} parsed, {stats['unchanged']} unchanged, {stats['failed']} failed, "
+          f"{stats['skipped']} skipped by circuit breaker).")
+    return len(new_item_ids), new_item_ids
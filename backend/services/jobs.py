@@ -0,0 +1,192 @@
+"""
+Jobs Service - Persistent Pipeline Queue
+
+Stores pipeline work (scans, translations, extractions, crawls) in the `jobs`
+table so it survives restarts and can be drained by separate worker processes
+(see worker.py). Claiming is an atomic conditional UPDATE, failed jobs are
+retried with exponential backoff, and jobs left RUNNING by a dead worker are
+put back in the queue once their heartbeat goes stale.
+"""
+
+import os
+import random
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, List, Tuple
+from sqlalchemy.orm import Session
+from models import Job
+from . import changes
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Job kinds
+SCAN = "SCAN"
+TRANSLATE = "TRANSLATE"
+EXTRACT = "EXTRACT"
+EXTRACT_NATIVE = "EXTRACT_NATIVE"
+RESCAN_WATCHLIST = "RESCAN_WATCHLIST"
+CRAWL = "CRAWL"
+
+# Job states
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+ACTIVE_STATES = (PENDING, RUNNING)
+
+SCAN_REQUESTS = "scan_requests"  # Counter row that serializes SCAN enqueues
+
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+STALE_AFTER_SECONDS = float(os.getenv("JOB_STALE_AFTER_SECONDS", "600"))
+
+
+def enqueue(db: Session, kind: str, payload: Optional[dict] = None, dedupe_key: Optional[str] = None,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS, delay_seconds: float = 0) -> Job:
+    """
+    Adds a job to the queue and commits.
+    If `dedupe_key` matches a job that is still PENDING or RUNNING, that job
+    is returned instead, so bursts of identical requests collapse into one.
+    """
+    if dedupe_key:
+        active = db.query(Job).filter(
+            Job.dedupe_key == dedupe_key,
+            Job.status.in_(ACTIVE_STATES)
+        ).first()
+        if active:
+            return active
+
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        status=PENDING,
+        dedupe_key=dedupe_key,
+        max_attempts=max_attempts,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds)
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    logger.info(f"[JOBS] Encolado {kind} #{job.id}")
+    return job
+
+
+def claim_next(db: Session, worker_id: str, kinds: Optional[List[str]] = None) -> Optional[Job]:
+    """
+    Atomically moves the oldest runnable PENDING job to RUNNING for `worker_id`.
+    Safe to call from several processes: only one UPDATE can win each row.
+    """
+    now = datetime.utcnow()
+    query = db.query(Job.id).filter(Job.status == PENDING, Job.run_after <= now)
+    if kinds:
+        query = query.filter(Job.kind.in_(kinds))
+    candidate_ids = [row[0] for row in query.order_by(Job.run_after, Job.id).limit(10)]
+
+    for job_id in candidate_ids:
+        claimed = db.query(Job).filter(Job.id == job_id, Job.status == PENDING).update({
+            Job.status: RUNNING,
+            Job.locked_by: worker_id,
+            Job.heartbeat_at: now,
+            Job.attempts: Job.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.query(Job).filter(Job.id == job_id).first()
+    return None
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str):
+    """Marks a RUNNING job as still alive."""
+    db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id, Job.status == RUNNING).update(
+        {Job.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+def set_progress(db: Session, job_id: int, progress: dict):
+    """Publishes live progress for a RUNNING job (use a session separate from the job's work)."""
+    db.query(Job).filter(Job.id == job_id).update({Job.progress: progress}, synchronize_session=False)
+    db.commit()
+
+
+def find_active_scan(db: Session, source_ids: List[int]) -> Optional[Job]:
+    """Returns a PENDING/RUNNING scan that covers any of `source_ids`, if one exists."""
+    wanted = set(source_ids)
+    for job in db.query(Job).filter(Job.kind == SCAN, Job.status.in_(ACTIVE_STATES)).order_by(Job.id):
+        if wanted & set((job.payload or {}).get("source_ids") or []):
+            return job
+    return None
+
+
+def lock_scans(db: Session):
+    """
+    Serializes "check active scans, then enqueue" until the next commit.
+    Scans overlap by source rather than by key, so instead of a dedupe key
+    this writes the SCAN_REQUESTS counter row (row lock on PostgreSQL, write
+    lock on SQLite) as the first statement of a fresh transaction: a
+    concurrent enqueuer waits for the commit and then sees the new job.
+    """
+    db.commit()
+    changes.increment(db, SCAN_REQUESTS)
+
+
+def enqueue_scan(db: Session, source_ids: List[int]) -> Tuple[Job, bool]:
+    """
+    Queues a SCAN over `source_ids` unless an active one already covers any of
+    them; returns (job, True) for the new job or (active job, False).
+    """
+    lock_scans(db)
+    active = find_active_scan(db, source_ids)
+    if active:
+        db.commit()
+        return active, False
+    return enqueue(db, SCAN, {"source_ids": source_ids}), True
+
+
+def complete(db: Session, job: Job, result: Optional[dict] = None):
+    job.status = DONE
+    job.result = result
+    job.last_error = None
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail(db: Session, job: Job, error: str):
+    """Schedules a retry with backoff, or marks the job FAILED when out of attempts."""
+    job.last_error = error
+    job.locked_by = None
+    if job.attempts < job.max_attempts:
+        delay = retry_delay(job.attempts)
+        job.status = PENDING
+        job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning(f"[JOBS] {job.kind} #{job.id} falló (intento {job.attempts}/{job.max_attempts}), reintento en {delay:.0f}s: {error}")
+    else:
+        job.status = FAILED
+        job.finished_at = datetime.utcnow()
+        logger.error(f"[JOBS] {job.kind} #{job.id} falló definitivamente: {error}")
+    db.commit()
+
+
+def recover_stale(db: Session, stale_after: float = STALE_AFTER_SECONDS) -> int:
+    """Returns RUNNING jobs whose worker stopped heartbeating to the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    stale = db.query(Job).filter(Job.status == RUNNING, Job.heartbeat_at < cutoff).all()
+    for job in stale:
+        logger.warning(f"[JOBS] Recuperando {job.kind} #{job.id} abandonado por {job.locked_by}")
+        if job.attempts < job.max_attempts:
+            job.status = PENDING
+            job.run_after = datetime.utcnow()
+        else:
+            job.status = FAILED
+            job.finished_at = datetime.utcnow()
+            job.last_error = "Worker lost while running"
+        job.locked_by = None
+    db.commit()
+    return len(stale)
@@ -0,0 +1,74 @@
+"""
+JSON Stream - Incremental Parser for Streamed Objects
+
+Parses JSON objects of the form {"key": {...}, ...} while they are streamed.
+The translator uses it to consume streamed completions: each top-level member
+is emitted as soon as its value object closes, so finished translations can
+be stored while the rest of the batch is still being generated, and a broken
+or truncated stream only loses the members that never closed.
+"""
+
+import json
+from typing import Iterator, Optional, Tuple
+
+
+class ObjectMemberStream:
+    """
+    Feed text chunks with `feed()`; iterate the returned (key, value) pairs.
+    Only members whose value is a JSON object are emitted; anything else at the
+    top level (or malformed members) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string: Optional[str] = None
+        self.key: Optional[str] = None
+        self.value_start = None
+
+    def feed(self, chunk: str) -> Iterator[Tuple[str, dict]]:
+        self.buffer += chunk
+        while self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        try:
+                            self.last_string = json.loads(self.buffer[self.string_start:self.pos + 1])
+                        except ValueError:
+                            self.last_string = None
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif char == ":" and self.depth == 1:
+                self.key = self.last_string
+            elif char in "{[":
+                self.depth += 1
+                if self.depth == 2 and char == "{":
+                    self.value_start = self.pos
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1 and char == "}" and self.value_start is not None:
+                    member = self._close_member(self.pos)
+                    if member:
+                        yield member
+            self.pos += 1
+
+    def _close_member(self, end: int) -> Optional[Tuple[str, dict]]:
+        raw = self.buffer[self.value_start:end + 1]
+        key, self.key, self.value_start = self.key, None, None
+        if key is None:
+            return None
+        try:
+            return key, json.loads(raw)
+        except ValueError:
+            return None
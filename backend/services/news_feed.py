@@ -0,0 +1,150 @@
+"""
+News Feed Service - Keyset-Paginated Listings
+
+The news listings (discovered, approved, rejected) are served in pages
+ordered by (published_date, id), newest first. Instead of an offset, each
+page ends with an opaque cursor holding the sort key of its last item; the
+next page starts strictly after it. With the (status, published_date, id)
+index every page costs the same whatever the size of the archive, and items
+arriving while the user pages never shift the pages already loaded.
+Items without a published_date come after all dated ones, newest id first.
+
+Each page also carries the change sequence it reflects (services/changes.py).
+A client polls `changes_since` with it and gets back only the items that
+entered, changed in or left its listing, and the listings answer
+conditional requests with a weak ETag built from the same sequence.
+"""
+
+import os
+import json
+import base64
+import hashlib
+from typing import Optional, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from models import NewsItem, NewsTombstone, Source, news_entities
+from . import changes
+
+PAGE_SIZE = int(os.getenv("NEWS_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("NEWS_MAX_PAGE_SIZE", "200"))
+CHANGES_LIMIT = int(os.getenv("NEWS_CHANGES_LIMIT", "500"))  # Larger deltas ask the client to reload
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(item: NewsItem) -> str:
+    payload = json.dumps([item.published_date, item.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    """Returns the (published_date, id) a cursor points after."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published_date, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(item_id, int) or not (published_date is None or isinstance(published_date, str)):
+        raise InvalidCursor(cursor)
+    return published_date, item_id
+
+
+def page(db: Session, status: str, cursor: Optional[str] = None, limit: int = PAGE_SIZE,
+         source_id: Optional[int] = None, language: Optional[str] = None, entity_id: Optional[int] = None) -> dict:
+    """
+    One page of news items with `status`, optionally filtered by source,
+    language or linked entity. Raises InvalidCursor for a malformed cursor.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+    # Read first: changes committed while the page is read are polled again, never missed
+    seq = changes.current(db)
+
+    query = _item_query(db).filter(NewsItem.status == status)
+    if source_id is not None:
+        query = query.filter(NewsItem.source_id == source_id)
+    if language:
+        query = query.filter(NewsItem.language == language)
+    if entity_id is not None:
+        query = query.filter(NewsItem.id.in_(select(news_entities.c.news_id).where(news_entities.c.entity_id == entity_id)))
+
+    # Dated items first; each part is a single range scan of the index
+    items = []
+    if after is None or after[0] is not None:
+        dated = query.filter(NewsItem.published_date.isnot(None))
+        if after is not None:
+            dated = dated.filter(tuple_(NewsItem.published_date, NewsItem.id) < tuple_(*after))
+        items = dated.order_by(NewsItem.published_date.desc(), NewsItem.id.desc()).limit(limit + 1).all()
+    if len(items) <= limit:
+        undated = query.filter(NewsItem.published_date.is_(None))
+        if after is not None and after[0] is None:
+            undated = undated.filter(NewsItem.id < after[1])
+        items += undated.order_by(NewsItem.id.desc()).limit(limit + 1 - len(items)).all()
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {"items": items, "next_cursor": encode_cursor(items[-1]) if has_more else None, "seq": seq}
+
+
+def _item_query(db: Session):
+    return db.query(NewsItem).options(
+        joinedload(NewsItem.source),
+        # A joined collection would multiply the rows LIMIT counts
+        selectinload(NewsItem.entities),
+        selectinload(NewsItem.tags)
+    )
+
+
+def _in_listing(item: NewsItem, status: str, source_id: Optional[int], language: Optional[str], entity_id: Optional[int]) -> bool:
+    """Whether `item` belongs in the listing `page` serves for these filters."""
+    return (item.status == status
+            and (source_id is None or item.source_id == source_id)
+            and (not language or item.language == language)
+            and (entity_id is None or any(entity.id == entity_id for entity in item.entities)))
+
+
+def changes_since(db: Session, since: int, status: str, source_id: Optional[int] = None,
+                  language: Optional[str] = None, entity_id: Optional[int] = None) -> dict:
+    """
+    What changed in a listing after sequence `since`: `items` that are (now)
+    part of it and the ids `removed` from it, deleted ones included. When the
+    delta cannot be told exactly (more than CHANGES_LIMIT changes, tombstones
+    already pruned, a `since` from another database) `reset` is set instead
+    and the client reloads the listing.
+    """
+    seq = changes.current(db)
+    delta = {"seq": seq, "reset": False, "items": [], "removed": []}
+    if since == seq:
+        return delta
+    if since > seq or since < changes.pruned(db):
+        return dict(delta, reset=True)
+
+    changed = _item_query(db).filter(NewsItem.change_seq > since).order_by(NewsItem.change_seq).limit(CHANGES_LIMIT + 1).all()
+    deleted = db.query(NewsTombstone.news_id).filter(NewsTombstone.change_seq > since).limit(CHANGES_LIMIT + 1).all()
+    if len(changed) + len(deleted) > CHANGES_LIMIT:
+        return dict(delta, reset=True)
+
+    for item in changed:
+        if _in_listing(item, status, source_id, language, entity_id):
+            delta["items"].append(item)
+        else:
+            delta["removed"].append(item.id)
+    # A tombstoned id handed out again by SQLite is listed as changed
+    changed_ids = {item.id for item in changed}
+    delta["removed"] += [news_id for (news_id,) in deleted if news_id not in changed_ids]
+    return delta
+
+
+def etag(db: Session) -> str:
+    """
+    Weak ETag shared by the listings: the change sequence plus a digest of
+    the sources the items embed (scheduling fields left out, they change on
+    every poll).
+    """
+    sources = db.query(
+        Source.id, Source.name, Source.type, Source.subtype, Source.config, Source.icon, Source.health_status, Source.active
+    ).order_by(Source.id).all()
+    digest = hashlib.sha1(json.dumps([list(row) for row in sources], default=str).encode("utf-8")).hexdigest()[:16]
+    return f'W/"{changes.current(db)}-{digest}"'
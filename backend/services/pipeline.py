@@ -0,0 +1,155 @@
+"""
+Pipeline Service - Translation → Extraction Hand-off
+
+Entity extraction runs as its own stage instead of inside the translation
+loop: the translator puts translated item ids on a bounded queue and a
+dedicated thread (with its own DB session) drains it through the SpaCy
+extractor. NER latency therefore no longer stalls translation. `submit` never
+blocks (it is called from the translator's event loop): once the bounded
+queue is full, hand-offs wait in order in an overflow list that the consumer
+moves into the queue as it frees space. Both sides expose queue depth and
+lag through `snapshot()`.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Callable, Iterable, List, Tuple
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from . import extractor
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.getenv("EXTRACT_QUEUE_SIZE", "100"))  # Pending hand-offs (each a list of ids)
+CHUNK_SIZE = int(os.getenv("EXTRACT_CHUNK_SIZE", "50"))  # Max ids per extractor call
+
+_STOP = object()
+
+
+class ExtractionStage:
+    """Consumer thread running entity extraction on translated item ids."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, maxsize: int = QUEUE_SIZE, chunk_size: int = CHUNK_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.processed = 0
+        self.extracted = 0
+        self.max_lag = 0.0
+        self.overflow = deque()
+        self.overflowed = 0
+        self.thread = threading.Thread(target=self._run, name="extraction-stage", daemon=True)
+
+    def start(self) -> "ExtractionStage":
+        self.thread.start()
+        return self
+
+    def submit(self, item_ids: Iterable[int]):
+        """Queues committed item ids for extraction. Never blocks: safe to call from the event loop."""
+        item_ids = list(item_ids)
+        if not item_ids:
+            return
+        entry = (time.monotonic(), item_ids)
+        with self.lock:
+            self.pending += len(item_ids)
+            self.submitted += len(item_ids)
+            if not self.overflow:
+                try:
+                    self.queue.put_nowait(entry)
+                    return
+                except queue.Full:
+                    pass
+            # Queue full: keep order behind whatever already overflowed
+            self.overflow.append(entry)
+            self.overflowed += len(item_ids)
+
+    def close(self):
+        """Waits until everything queued has been extracted, then stops the thread."""
+        if self.thread.is_alive():
+            with self.lock:
+                if self.overflow:
+                    self.overflow.append(_STOP)
+                    stop_queued = True
+                else:
+                    stop_queued = False
+            if not stop_queued:
+                # Called once production is over, off the event loop: blocking is fine here
+                self.queue.put(_STOP)
+            self.thread.join()
+
+    def snapshot(self) -> dict:
+        """Queue depth (ids) and lag (age of the oldest queued hand-off, seconds)."""
+        # The queue is FIFO and fed before the overflow, so its head is the oldest hand-off
+        with self.queue.mutex:
+            oldest = next((entry[0] for entry in self.queue.queue if entry is not _STOP), None)
+        with self.lock:
+            return {
+                "depth": self.pending,
+                "lag_s": round(time.monotonic() - oldest, 2) if oldest is not None else 0.0,
+                "max_lag_s": round(self.max_lag, 2),
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "extracted": self.extracted,
+                "overflowed": self.overflowed,
+            }
+
+    def _get(self, block: bool = True):
+        """Takes the next hand-off and refills the freed slot from the overflow list."""
+        entry = self.queue.get(block=block)
+        with self.lock:
+            while self.overflow:
+                try:
+                    self.queue.put_nowait(self.overflow[0])
+                except queue.Full:
+                    break
+                self.overflow.popleft()
+        return entry
+
+    def _take_chunk(self, first) -> Tuple[List[int], float, bool]:
+        """Merges queued hand-offs into one extractor call of up to chunk_size ids."""
+        enqueued_at, item_ids = first
+        item_ids = list(item_ids)
+        stop = False
+        while len(item_ids) < self.chunk_size:
+            try:
+                entry = self._get(block=False)
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                stop = True
+                break
+            item_ids.extend(entry[1])
+        return item_ids, enqueued_at, stop
+
+    def _run(self):
+        db = self.session_factory()
+        try:
+            stop = False
+            while not stop:
+                entry = self._get()
+                if entry is _STOP:
+                    break
+                item_ids, enqueued_at, stop = self._take_chunk(entry)
+                lag = time.monotonic() - enqueued_at
+                try:
+                    count = extractor.process_pending_entities(db, item_ids=item_ids)
+                except Exception as e:
+                    db.rollback()
+                    count = 0
+                    logger.error(f"[PIPELINE] Error en la extracción de {len(item_ids)} noticias: {e}")
+                with self.lock:
+                    self.pending -= len(item_ids)
+                    self.processed += len(item_ids)
+                    self.extracted += count
+                    self.max_lag = max(self.max_lag, lag)
+                    depth = self.pending
+                logger.info(f"[PIPELINE] Extracción: {len(item_ids)} noticias (retraso {lag:.2f}s, en cola {depth})")
+        finally:
+            db.close()
@@ -0,0 +1,170 @@
+"""
+Rate Limit Service - Token buckets for provider quotas
+
+Keeps translation requests under the provider's requests-per-minute and
+tokens-per-minute quotas, and re-syncs with the rate-limit headers the
+provider returns so that several requests can safely be kept in flight.
+"""
+
+import asyncio
+import re
+import time
+import logging
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a reset/retry header into seconds.
+    Accepts plain seconds ("7.5") and Groq/OpenAI style durations ("1m2.5s", "250ms").
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` units and refills at
+    `capacity / period` units per second.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they already are)."""
+        self._refill()
+        # A single request larger than the bucket still has to go through eventually
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float):
+        """Returns (or, with a negative amount, charges) units after reconciling an estimate."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def resize(self, capacity: Optional[int], period: float = 60.0):
+        """Adopts the provider's limit when it is stricter than the configured one."""
+        if capacity is None or capacity <= 0 or capacity >= self.capacity:
+            return
+        self._refill()
+        logger.warning(f"[RATE LIMIT] El proveedor informa un límite de {capacity}; ajustando (antes {self.capacity:.0f})")
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = min(self.level, self.capacity)
+
+    def sync(self, remaining: Optional[int]):
+        """
+        Aligns the local view with what the provider reports. Only ever lowers
+        the level: the provider's counter is authoritative when it is stricter.
+        """
+        if remaining is None:
+            return
+        self._refill()
+        self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """
+    Requests-per-minute plus tokens-per-minute limiter shared by every
+    in-flight request of a translation run.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+        self.waited = 0.0
+
+    async def acquire(self, tokens: int):
+        """Waits until one request of roughly `tokens` tokens fits under both limits."""
+        async with self.lock:
+            while True:
+                delay = max(
+                    self.paused_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens),
+                )
+                if delay <= 0:
+                    break
+                self.waited += delay
+                await asyncio.sleep(delay)
+            self.requests.take(1)
+            self.tokens.take(min(tokens, self.tokens.capacity))
+
+    def reconcile(self, estimated: int, actual: Optional[int]):
+        """Corrects the token bucket once the real usage of a request is known."""
+        if actual is None:
+            return
+        self.tokens.give_back(min(estimated, self.tokens.capacity) - actual)
+
+    def observe(self, headers: Mapping[str, str]):
+        """Applies x-ratelimit-* response headers to the local buckets."""
+        if not headers:
+            return
+        self.requests.resize(_header_int(headers, "x-ratelimit-limit-requests"))
+        self.tokens.resize(_header_int(headers, "x-ratelimit-limit-tokens"))
+        self.requests.sync(_header_int(headers, "x-ratelimit-remaining-requests"))
+        self.tokens.sync(_header_int(headers, "x-ratelimit-remaining-tokens"))
+
+    def pause(self, seconds: float):
+        """Blocks every new request for `seconds` (used for retry-after)."""
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            logger.warning(f"[RATE LIMIT] Pausa de {seconds:.1f}s solicitada por el proveedor")
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds the provider asks us to wait before retrying, taken from
+    retry-after or, failing that, the relevant x-ratelimit-reset-* header.
+    """
+    if not headers:
+        return None
+    delay = parse_duration(headers.get("retry-after"))
+    if delay is not None:
+        return delay
+    resets = []
+    for kind in ("requests", "tokens"):
+        remaining = _header_int(headers, f"x-ratelimit-remaining-{kind}")
+        reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+        if reset is not None and (remaining is None or remaining <= 0):
+            resets.append(reset)
+    return max(resets) if resets else None
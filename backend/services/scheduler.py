@@ -0,0 +1,124 @@
+"""
+Scheduler Service - Adaptive RSS Polling
+
+Learns each source's publishing cadence from the `published_date` of its
+recent NewsItems and queues SCAN jobs only for the sources that are due.
+Busy feeds are polled often, quiet ones rarely (within min/max bounds and
+with jitter), and sources whose health_status is failing are backed off.
+"""
+
+import os
+import random
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from models import Source, NewsItem, Job
+from . import jobs, ingestor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = int(os.getenv("SCHEDULER_MIN_INTERVAL", "300"))        # 5 min
+MAX_INTERVAL = int(os.getenv("SCHEDULER_MAX_INTERVAL", "21600"))      # 6 h
+DEFAULT_INTERVAL = int(os.getenv("SCHEDULER_DEFAULT_INTERVAL", "1800"))
+JITTER = float(os.getenv("SCHEDULER_JITTER", "0.1"))
+SAMPLE_SIZE = int(os.getenv("SCHEDULER_SAMPLE_SIZE", "20"))
+TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+
+# Multipliers applied to the learned interval for unhealthy sources
+HEALTH_BACKOFF = {"DEGRADED": 2, "DOWN": 8}
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def learned_interval(db: Session, source_id: int) -> int:
+    """Median gap (seconds) between the source's latest items, or the default without enough history."""
+    rows = db.query(NewsItem.published_date).filter(
+        NewsItem.source_id == source_id,
+        NewsItem.published_date != None
+    ).order_by(NewsItem.published_date.desc()).limit(SAMPLE_SIZE).all()
+
+    dates = sorted(d for d in (_parse_date(r[0]) for r in rows) if d is not None)
+    gaps = [(b - a).total_seconds() for a, b in zip(dates, dates[1:])]
+    gaps = [g for g in gaps if g > 0]
+    if not gaps:
+        return DEFAULT_INTERVAL
+    return int(median(gaps))
+
+
+def compute_interval(db: Session, source: Source) -> int:
+    """Learned cadence, backed off for unhealthy sources, clamped to [MIN, MAX]."""
+    interval = learned_interval(db, source.id)
+    interval *= HEALTH_BACKOFF.get(source.health_status, 1)
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+
+def reschedule(db: Session, source_ids: List[int]):
+    """Sets the next poll time for sources that were just scanned."""
+    now = datetime.utcnow()
+    for source in db.query(Source).filter(Source.id.in_(source_ids)).all():
+        interval = compute_interval(db, source)
+        source.poll_interval = interval
+        source.last_polled_at = now
+        source.next_poll_at = now + timedelta(seconds=interval * random.uniform(1 - JITTER, 1 + JITTER))
+    db.commit()
+
+
+def _sources_in_active_scans(db: Session) -> set:
+    busy = set()
+    for job in db.query(Job).filter(Job.kind == jobs.SCAN, Job.status.in_(jobs.ACTIVE_STATES)):
+        busy.update((job.payload or {}).get("source_ids") or [])
+    return busy
+
+
+def tick(db: Session) -> Optional[Job]:
+    """Queues one SCAN job covering every due source not already being scanned."""
+    now = datetime.utcnow()
+    due = ingestor.rss_source_query(db).filter(
+        (Source.next_poll_at == None) | (Source.next_poll_at <= now)
+    ).all()
+    if not due:
+        return None
+
+    due_ids = [s.id for s in due]
+    jobs.lock_scans(db)  # Until enqueue commits, no API scan can claim these sources
+    busy = _sources_in_active_scans(db)
+    due_ids = [source_id for source_id in due_ids if source_id not in busy]
+    if not due_ids:
+        db.commit()
+        return None
+
+    logger.info(f"[SCHEDULER] {len(due_ids)} fuentes pendientes de sondeo")
+    return jobs.enqueue(db, jobs.SCAN, {"source_ids": due_ids, "scheduled": True})
+
+
+def run_scheduler(stop_event: threading.Event, session_factory):
+    """Loop calling tick() every TICK_SECONDS until stopped."""
+    logger.info(f"[SCHEDULER] Iniciado (min={MIN_INTERVAL}s, max={MAX_INTERVAL}s, jitter={JITTER})")
+    while not stop_event.is_set():
+        db = session_factory()
+        try:
+            tick(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[SCHEDULER] Error: {e}")
+        finally:
+            db.close()
+        stop_event.wait(TICK_SECONDS)
+
+
+def start_scheduler(stop_event: threading.Event, session_factory) -> threading.Thread:
+    thread = threading.Thread(target=run_scheduler, args=(stop_event, session_factory), daemon=True)
+    thread.start()
+    return thread
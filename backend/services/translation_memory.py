@@ -0,0 +1,129 @@
+"""
+Translation Memory Service - Reuse of Previous Translations
+
+Stores every successful item translation in the `translation_memory` table,
+keyed by a hash of the normalized source text, its language, the model and
+the prompt version. The translator looks items up here before building Groq
+payloads, so recurring headlines, boilerplate snippets and re-ingested items
+cost no tokens. Entries unused for TRANSLATION_MEMORY_TTL_DAYS expire and the
+table is trimmed to the TRANSLATION_MEMORY_MAX_ENTRIES most recently used rows.
+Lookup and hit counters live in `change_counters`, since translation runs in
+the worker processes while the stats are read by the API.
+"""
+
+import os
+import re
+import hashlib
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import TranslationMemory
+from . import changes
+
+logger = logging.getLogger(__name__)
+
+TTL_DAYS = int(os.getenv("TRANSLATION_MEMORY_TTL_DAYS", "30"))
+MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "50000"))
+LOOKUP_CHUNK = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Counters in change_counters (the entries keep the totals of the rows still stored)
+LOOKUPS = "memory_lookups"
+HITS = "memory_hits"
+TOKENS_SAVED = "memory_tokens_saved"
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def memory_key(title: str, content: str, language: str, model: str, prompt_version: str) -> str:
+    payload = "\x1f".join([normalize(title), normalize(content), language or "", model, prompt_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(db: Session, keys: Iterable[str]) -> Dict[str, TranslationMemory]:
+    """
+    Returns the stored translations for `keys` (one key per item, repeats allowed)
+    and records the hits. Mutates rows on the caller's session; the caller commits.
+    """
+    wanted = Counter(keys)
+    unique = list(wanted)
+    found = {}
+    for start in range(0, len(unique), LOOKUP_CHUNK):
+        chunk = unique[start:start + LOOKUP_CHUNK]
+        for row in db.query(TranslationMemory).filter(TranslationMemory.key.in_(chunk)):
+            found[row.key] = row
+
+    now = datetime.utcnow()
+    hits = tokens_saved = 0
+    for key, row in found.items():
+        row.hits = (row.hits or 0) + wanted[key]
+        row.last_used_at = now
+        hits += wanted[key]
+        tokens_saved += (row.tokens or 0) * wanted[key]
+
+    for name, amount in ((LOOKUPS, sum(wanted.values())), (HITS, hits), (TOKENS_SAVED, tokens_saved)):
+        if amount:
+            changes.increment(db, name, amount)
+    return found
+
+
+def remember(db: Session, entries: List[dict]):
+    """
+    Adds new translations (dicts with the TranslationMemory columns).
+    Keys already present, even ones a concurrent job is inserting, are left
+    untouched (INSERT ... ON CONFLICT DO NOTHING). The caller commits.
+    """
+    entries = list({entry["key"]: entry for entry in entries}.values())
+    if not entries:
+        return
+    now = datetime.utcnow()
+    rows = [{"hits": 0, "created_at": now, "last_used_at": now, **entry} for entry in entries]
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    for start in range(0, len(rows), LOOKUP_CHUNK):
+        stmt = dialect.insert(TranslationMemory).values(rows[start:start + LOOKUP_CHUNK])
+        db.execute(stmt.on_conflict_do_nothing(index_elements=[TranslationMemory.key]))
+
+
+def evict(db: Session) -> int:
+    """Drops expired entries, then the least recently used ones above MAX_ENTRIES."""
+    removed = db.query(TranslationMemory).filter(
+        TranslationMemory.last_used_at < datetime.utcnow() - timedelta(days=TTL_DAYS)
+    ).delete(synchronize_session=False)
+
+    if db.query(TranslationMemory).count() > MAX_ENTRIES:
+        keep = db.query(TranslationMemory.key).order_by(
+            TranslationMemory.last_used_at.desc()
+        ).limit(MAX_ENTRIES)
+        removed += db.query(TranslationMemory).filter(
+            ~TranslationMemory.key.in_(keep.scalar_subquery())
+        ).delete(synchronize_session=False)
+
+    db.commit()
+    if removed:
+        logger.info(f"[MEMORIA] {removed} traducciones expiradas o excedentes eliminadas")
+    return removed
+
+
+def stats(db: Session) -> dict:
+    entries, total_hits, tokens_saved = db.query(
+        func.count(TranslationMemory.key),
+        func.coalesce(func.sum(TranslationMemory.hits), 0),
+        func.coalesce(func.sum(TranslationMemory.hits * TranslationMemory.tokens), 0),
+    ).one()
+    run = {name: changes.read(db, name) for name in (LOOKUPS, HITS, TOKENS_SAVED)}
+    return {
+        "entries": entries,
+        "total_hits": total_hits,
+        "tokens_saved": tokens_saved,
+        "run_lookups": run[LOOKUPS],
+        "run_hits": run[HITS],
+        "run_tokens_saved": run[TOKENS_SAVED],
+        "hit_rate": run[HITS] / run[LOOKUPS] if run[LOOKUPS] else 0.0,
+    }
@@ -8,30 +8,57 @@ Processes items where title_es IS NULL.
 import os
 import json
 import time
+import asyncio
 import logging
-from typing import List, Dict, Any
+from collections import deque
+from typing import List, Dict, Any, Callable, Deque, Optional, Tuple
 from sqlalchemy.orm import Session
 from models import NewsItem
 from langdetect import detect, LangDetectException
-from groq import Groq
-from . import extractor
+from groq import (AsyncGroq, RateLimitError, InternalServerError, APIConnectionError,
+                  AuthenticationError, PermissionDeniedError, NotFoundError, BadRequestError)
+from . import pipeline, ratelimit, translation_memory, jsonstream
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def translate_batch(client: Groq, model: str, items_to_translate: List[NewsItem]) -> Dict[str, Any]:
-    """
-    Helper to translate a batch of news items using a single Groq API call.
-    Includes performance and usage metrics tracking.
-    """
-    if not items_to_translate:
-        return {"results": {}, "usage": None, "duration": 0}
+# Provider quotas. The token buckets keep several batches in flight without
+# exceeding either limit; headers returned by the API keep them in sync.
+TRANSLATE_RPM = int(os.getenv("TRANSLATE_RPM", "30"))
+TRANSLATE_TPM = int(os.getenv("TRANSLATE_TPM", "6000"))
+TRANSLATE_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "4"))
+TRANSLATE_MAX_RETRIES = int(os.getenv("TRANSLATE_MAX_RETRIES", "4"))
 
-    # Logging which items are being sent
-    item_titles = [f"[{item.id}] {item.title[:40]}..." for item in items_to_translate]
-    logger.info(f"[TRADUCTOR] Enviando lote para traducir: {', '.join(item_titles)}")
+# Items missing from a response are re-sent on their own, in smaller batches,
+# after an exponential backoff; after TRANSLATE_ITEM_MAX_ATTEMPTS they are
+# marked FAILED instead of retried forever.
+TRANSLATE_ITEM_MAX_ATTEMPTS = int(os.getenv("TRANSLATE_ITEM_MAX_ATTEMPTS", "4"))
+TRANSLATE_RETRY_BASE_DELAY = float(os.getenv("TRANSLATE_RETRY_BASE_DELAY", "2"))
+FAILED = "FAILED"
+
+# Calls that get no answer at all (outage, transport errors) don't count
+# against the items: they back off and, after this many in a row, the run is
+# abandoned with the items left pending. Auth/permission errors abandon it at once.
+TRANSLATE_MAX_CALL_FAILURES = int(os.getenv("TRANSLATE_MAX_CALL_FAILURES", "5"))
 
-    # Construct the batch request payload
+class TranslationUnavailable(RuntimeError):
+    """The provider could not be reached (or refused the key); pending items were left untouched."""
+
+# Per-request token budget used to pack batches. Input + output must fit in
+# TRANSLATE_TPM; the output budget is also sent as max_tokens.
+TRANSLATE_MAX_INPUT_TOKENS = int(os.getenv("TRANSLATE_MAX_INPUT_TOKENS", "1500"))
+TRANSLATE_MAX_OUTPUT_TOKENS = int(os.getenv("TRANSLATE_MAX_OUTPUT_TOKENS", "2048"))
+TRANSLATE_MAX_BATCH_ITEMS = int(os.getenv("TRANSLATE_MAX_BATCH_ITEMS", "25"))
+
+# Stream completions and store each item as soon as its JSON object closes
+TRANSLATE_STREAM = os.getenv("TRANSLATE_STREAM", "1") == "1"
+
+SYSTEM_PROMPT = "You are a translation service that outputs strictly valid JSON."
+# Bump when the prompt or its rules change so remembered translations are not reused
+PROMPT_VERSION = "1"
+
+def build_prompt(items_to_translate: List[NewsItem]) -> str:
+    """Builds the batch translation prompt for a list of news items."""
     batch_payload = {}
     for item in items_to_translate:
         batch_payload[str(item.id)] = {
@@ -39,7 +66,7 @@ def translate_batch(client: Groq, model: str, items_to_translate: List[NewsItem]
             "content": item.content_snippet or "No summary available"
         }
 
-    prompt = f"""You are a professional news translator. Translate the following news items to Neutral Spanish. Maintain a journalistic tone and keep proper nouns where appropriate. 
+    return f"""You are a professional news translator. Translate the following news items to Neutral Spanish. Maintain a journalistic tone and keep proper nouns where appropriate. 
 
 CRITICAL GRAMMAR RULES:
 1. TITLES: NEVER include a trailing period (.) at the end of the title.
@@ -58,66 +85,452 @@ Structure:
 Items to translate:
 {json.dumps(batch_payload, indent=2)}"""
 
-    batch_start = time.time()
+class BatchSizer:
+    """
+    Packs items into batches by estimated input and output tokens.
+
+    Output tokens per source character are learned from `usage.completion_tokens`,
+    and the share of the output budget actually used shrinks after a response is
+    truncated or unparseable and grows back slowly while responses stay clean.
+    """
+
+    # JSON keys and quoting added per item, in tokens
+    ITEM_OVERHEAD = 15
+
+    def __init__(self, max_input: int = TRANSLATE_MAX_INPUT_TOKENS, max_output: int = TRANSLATE_MAX_OUTPUT_TOKENS, max_items: int = TRANSLATE_MAX_BATCH_ITEMS):
+        self.max_input = max_input
+        self.max_output = max_output
+        self.max_items = max_items
+        self.prompt_overhead = (len(build_prompt([])) + len(SYSTEM_PROMPT)) // 4
+        self.output_per_char = 0.35  # Spanish output runs ~1 token per 3 source chars
+        self.output_share = 0.8
+        self.failure_rate = 0.0
+
+    def _chars(self, item: NewsItem) -> int:
+        return len(item.title or "") + len(item.content_snippet or "No summary available")
+
+    def input_tokens(self, item: NewsItem) -> int:
+        return self._chars(item) // 4 + self.ITEM_OVERHEAD
+
+    def output_tokens(self, item: NewsItem) -> int:
+        return int(self._chars(item) * self.output_per_char) + self.ITEM_OVERHEAD
+
+    def next_batch(self, queue: Deque[NewsItem]) -> List[NewsItem]:
+        """Takes as many items from the front of `queue` as fit in the current budget (at least one)."""
+        batch = []
+        input_budget = self.max_input - self.prompt_overhead
+        output_budget = self.max_output * self.output_share
+        used_input = used_output = 0
+        while queue and len(batch) < self.max_items:
+            item_input = self.input_tokens(queue[0])
+            item_output = self.output_tokens(queue[0])
+            if batch and (used_input + item_input > input_budget or used_output + item_output > output_budget):
+                break
+            batch.append(queue.popleft())
+            used_input += item_input
+            used_output += item_output
+        return batch
+
+    def estimate(self, batch: List[NewsItem]) -> int:
+        """Expected total tokens of a request, used to reserve rate-limit budget."""
+        return self.prompt_overhead + sum(self.input_tokens(item) + self.output_tokens(item) for item in batch)
+
+    def observe(self, batch: List[NewsItem], completion_tokens: Optional[int], parse_failed: bool):
+        """Updates the learned output ratio and budget share from one response."""
+        self.failure_rate = 0.8 * self.failure_rate + 0.2 * (1.0 if parse_failed else 0.0)
+        if parse_failed:
+            self.output_share = max(0.2, self.output_share * 0.6)
+            logger.warning(f"[LOTES] Respuesta inválida/truncada; presupuesto de salida reducido a {int(self.max_output * self.output_share)} tokens")
+            return
+        # A history of failures keeps the ceiling lower for a while
+        self.output_share = min(max(0.2, 0.9 * (1 - self.failure_rate)), self.output_share + 0.05)
+        chars = sum(self._chars(item) for item in batch)
+        if completion_tokens and chars:
+            sample = max(0.05, (completion_tokens - self.ITEM_OVERHEAD * len(batch)) / chars)
+            self.output_per_char = 0.7 * self.output_per_char + 0.3 * sample
+
+def create_client() -> Optional[AsyncGroq]:
+    """Async Groq client; GROQ_BASE_URL points it at a proxy or a local fake server."""
+    api_key = os.getenv("GROQ_API_KEY") or os.getenv("API_KEY")
+    if not api_key:
+        return None
+    # Retries are handled here so that waits go through the shared limiter
+    return AsyncGroq(api_key=api_key, base_url=os.getenv("GROQ_BASE_URL") or None, max_retries=0)
+
+def _log_batch_metrics(usage, estimated: int, batch_duration: float):
+    logger.info(f"[MÉTRICAS DEL LOTE]")
+    if usage:
+        logger.info(f"  > Tokens de Entrada: {usage.prompt_tokens}")
+        logger.info(f"  > Tokens de Salida: {usage.completion_tokens}")
+        logger.info(f"  > Total de Tokens: {usage.total_tokens} (estimados: {estimated})")
+    logger.info(f"  > Tiempo de Respuesta: {batch_duration:.2f}s")
+
+async def _read_stream(stream, expected_ids: set, limiter: ratelimit.RateLimiter, estimated: int, batch_start: float, on_item: Callable[[str, Dict[str, Any]], None]) -> Dict[str, Any]:
+    """
+    Consumes a streamed completion, handing every item to `on_item` as soon as
+    its JSON object closes. If the stream breaks or is truncated, the items
+    that completed are kept and the rest are reported missing. An `on_item`
+    failure is not a stream failure: the item stays in the results and is
+    stored again with its batch.
+    """
+    parser = jsonstream.ObjectMemberStream()
+    results = {}
+    content = []
+    usage = None
+    finish_reason = None
+    first_item = None
+    error = None
+    try:
+        async for chunk in stream:
+            # Groq sends usage on the last chunk under x_groq
+            if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                usage = chunk.x_groq.usage
+            elif chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            delta = choice.delta.content or ""
+            content.append(delta)
+            for item_id, data in parser.feed(delta):
+                if item_id not in expected_ids or not isinstance(data, dict) or not data.get("title_es"):
+                    continue
+                if first_item is None:
+                    first_item = time.time() - batch_start
+                results[item_id] = data
+                logger.info(f"[ÉXITO] Noticia {item_id} traducida: {data['title_es'][:50]}...")
+                try:
+                    on_item(item_id, data)
+                except Exception as e:
+                    logger.error(f"[STREAM] No se pudo guardar la noticia {item_id} al recibirla; se guardará con su lote: {e}")
+    except Exception as e:
+        logger.error(f"[STREAM] Respuesta interrumpida tras {len(results)} noticias: {e}")
+        finish_reason = finish_reason or "error"
+        error = e
+
+    batch_duration = time.time() - batch_start
+    # Without usage (broken stream) the estimate stays charged
+    limiter.reconcile(estimated, usage.total_tokens if usage else None)
+    _log_batch_metrics(usage, estimated, batch_duration)
+    if first_item is not None:
+        logger.info(f"  > Primera Noticia Lista en: {first_item:.2f}s")
+    if finish_reason == "length":
+        logger.warning(f"[TRUNCADO] El lote excedió {TRANSLATE_MAX_OUTPUT_TOKENS} tokens de salida; se conservan {len(results)} noticias completas")
+
     try:
-        response = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a translation service that outputs strictly valid JSON."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            model=model,
-            response_format={"type": "json_object"},
-            temperature=0.2
-        )
-        batch_duration = time.time() - batch_start
-        
-        # Extract usage metrics from response
-        usage = response.usage
-        input_tokens = usage.prompt_tokens
-        output_tokens = usage.completion_tokens
-        total_tokens = usage.total_tokens
-        
-        logger.info(f"[MÉTRICAS DEL LOTE]")
-        logger.info(f"  > Tokens de Entrada: {input_tokens}")
-        logger.info(f"  > Tokens de Salida: {output_tokens}")
-        logger.info(f"  > Total de Tokens: {total_tokens}")
-        logger.info(f"  > Tiempo de Respuesta: {batch_duration:.2f}s")
-        
-        # Parse JSON content
-        result = json.loads(response.choices[0].message.content)
-        
-        # Log success for each item in the result
-        for item_id, data in result.items():
-            logger.info(f"[ÉXITO] Noticia {item_id} traducida: {data.get('title_es', '')[:50]}...")
+        json.loads("".join(content))
+        parse_failed = False
+    except ValueError:
+        parse_failed = True
+    # A broken connection is not the model's fault: the items it did not get to
+    # are retried without spending their attempts
+    return {"results": results, "usage": usage, "duration": batch_duration, "parse_failed": parse_failed and error is None,
+            "first_item": first_item, "call_failed": error is not None, "fatal": False, "error": error}
+
+async def translate_batch(client: AsyncGroq, model: str, items_to_translate: List[NewsItem], limiter: ratelimit.RateLimiter, estimated: int, on_item: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Helper to translate a batch of news items using a single Groq API call.
+    Waits on the shared limiter before each attempt and retries rate-limited
+    or transient failures, honouring retry-after.
+    With `on_item` the completion is streamed and each item is handed over as
+    soon as it is complete (see _read_stream).
+    Includes performance and usage metrics tracking; `parse_failed` flags a
+    truncated or invalid JSON response. `call_failed` means no answer came
+    back at all (`error` says why, `fatal` if retrying cannot help).
+    """
+    if not items_to_translate:
+        return {"results": {}, "usage": None, "duration": 0, "parse_failed": False, "call_failed": False, "fatal": False, "error": None}
+
+    # Logging which items are being sent
+    item_titles = [f"[{item.id}] {item.title[:40]}..." for item in items_to_translate]
+    logger.info(f"[TRADUCTOR] Enviando lote para traducir: {', '.join(item_titles)}")
+
+    prompt = build_prompt(items_to_translate)
+
+    batch_start = time.time()
+    error = None
+    for attempt in range(TRANSLATE_MAX_RETRIES + 1):
+        await limiter.acquire(estimated)
+        try:
+            raw = await client.chat.completions.with_raw_response.create(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                model=model,
+                response_format={"type": "json_object"},
+                max_tokens=TRANSLATE_MAX_OUTPUT_TOKENS,
+                temperature=0.2,
+                stream=on_item is not None
+            )
+            limiter.observe(raw.headers)
+            if on_item is not None:
+                expected_ids = {str(item.id) for item in items_to_translate}
+                return await _read_stream(await raw.parse(), expected_ids, limiter, estimated, batch_start, on_item)
+            response = await raw.parse()
+            batch_duration = time.time() - batch_start
             
-        return {
-            "results": result,
-            "usage": usage,
-            "duration": batch_duration
-        }
+            # Extract usage metrics from response
+            usage = response.usage
+            limiter.reconcile(estimated, usage.total_tokens if usage else None)
+            _log_batch_metrics(usage, estimated, batch_duration)
+            
+            # Parse JSON content
+            choice = response.choices[0]
+            if choice.finish_reason == "length":
+                logger.warning(f"[TRUNCADO] El lote excedió {TRANSLATE_MAX_OUTPUT_TOKENS} tokens de salida")
+            try:
+                result = json.loads(choice.message.content)
+                if not isinstance(result, dict):
+                    raise ValueError(f"se esperaba un objeto, llegó {type(result).__name__}")
+            except (TypeError, ValueError) as e:
+                logger.error(f"[ERROR CRÍTICO] Respuesta JSON inválida ({choice.finish_reason}): {e}")
+                return {"results": {}, "usage": usage, "duration": batch_duration, "parse_failed": True,
+                        "call_failed": False, "fatal": False, "error": None}
+            result = {item_id: data for item_id, data in result.items() if isinstance(data, dict)}
+            
+            # Log success for each item in the result
+            for item_id, data in result.items():
+                logger.info(f"[ÉXITO] Noticia {item_id} traducida: {str(data.get('title_es', ''))[:50]}...")
+                
+            return {
+                "results": result,
+                "usage": usage,
+                "duration": batch_duration,
+                "parse_failed": False,
+                "call_failed": False,
+                "fatal": False,
+                "error": None
+            }
 
-    except Exception as e:
-        logger.error(f"[ERROR CRÍTICO] Traducción por lote fallida: {e}")
-        return {"results": {}, "usage": None, "duration": time.time() - batch_start}
+        except (RateLimitError, InternalServerError, APIConnectionError) as e:
+            error = e
+            # Nothing was (or will be) charged for a rejected request
+            limiter.reconcile(estimated, 0)
+            headers = e.response.headers if getattr(e, "response", None) is not None else {}
+            limiter.observe(headers)
+            delay = ratelimit.retry_after(headers) or min(60, 2 ** attempt)
+            if attempt == TRANSLATE_MAX_RETRIES:
+                logger.error(f"[ERROR CRÍTICO] Lote abandonado tras {attempt + 1} intentos: {e}")
+                break
+            logger.warning(f"[REINTENTO] Lote rechazado ({type(e).__name__}); reintento {attempt + 1} en {delay:.1f}s")
+            limiter.pause(delay)
+
+        except BadRequestError as e:
+            # The model produced output the API rejected (e.g. json_validate_failed): it counts against the items
+            logger.error(f"[ERROR CRÍTICO] Lote rechazado por el proveedor: {e}")
+            return {"results": {}, "usage": None, "duration": time.time() - batch_start, "parse_failed": True,
+                    "call_failed": False, "fatal": False, "error": e}
+
+        except Exception as e:
+            logger.error(f"[ERROR CRÍTICO] Traducción por lote fallida: {e}")
+            error = e
+            break
+
+    fatal = isinstance(error, (AuthenticationError, PermissionDeniedError, NotFoundError))
+    return {"results": {}, "usage": None, "duration": time.time() - batch_start, "parse_failed": False,
+            "call_failed": True, "fatal": fatal, "error": error}
+
+def _split_retry(batch: List[NewsItem], missing: List[NewsItem]) -> List[List[NewsItem]]:
+    """Splits the missing items into batches at most half the size of the one that failed."""
+    size = max(1, min(len(missing), len(batch) // 2))
+    return [missing[i : i + size] for i in range(0, len(missing), size)]
+
+async def run_batches(items: List[NewsItem], model: str, on_result: Callable[[List[NewsItem], Dict[str, Any]], None], sizer: Optional[BatchSizer] = None, on_item: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> float:
+    """
+    Translates all items concurrently (bounded by TRANSLATE_CONCURRENCY and the
+    RPM/TPM limiter) and hands each result to `on_result` as soon as it arrives.
+    Batches are packed lazily so later batches benefit from what the sizer has
+    learned from earlier responses.
+
+    Items the response left out count an attempt (`translation_attempts`) and
+    are re-sent in smaller batches after an exponential backoff. The result
+    passed to `on_result` lists them under "missing", and those that ran out
+    of attempts under "exhausted".
+    Calls that got no answer re-send their items after a backoff without
+    counting an attempt; after TRANSLATE_MAX_CALL_FAILURES in a row (or one
+    rejected key) no new batches are sent and TranslationUnavailable is raised
+    once the ones in flight finish, leaving the rest pending.
+    With TRANSLATE_STREAM, `on_item(item_id, data)` additionally receives each
+    translation as soon as it is streamed, before its batch finishes.
+    Returns the total seconds spent waiting on the limiter.
+    """
+    client = create_client()
+    limiter = ratelimit.RateLimiter(TRANSLATE_RPM, TRANSLATE_TPM)
+    sizer = sizer or BatchSizer()
+    queue = deque(items)
+    retries = []  # (ready_at, batch)
+    in_flight = {}
+    stream_to = on_item if TRANSLATE_STREAM else None
+    # Batches sent together fail together in an outage: only the first one
+    # sent after the previous failure counts towards TRANSLATE_MAX_CALL_FAILURES
+    call_failures = 0
+    last_failure = float("-inf")
+    launched = {}
+    abandoned = None
+
+    def launch(batch):
+        task = asyncio.create_task(translate_batch(client, model, batch, limiter, sizer.estimate(batch), stream_to))
+        in_flight[task] = batch
+        launched[task] = time.monotonic()
+
+    try:
+        while queue or retries or in_flight:
+            now = time.monotonic()
+            retries.sort(key=lambda entry: entry[0])
+            while retries and retries[0][0] <= now and len(in_flight) < TRANSLATE_CONCURRENCY:
+                launch(retries.pop(0)[1])
+            while queue and len(in_flight) < TRANSLATE_CONCURRENCY:
+                launch(sizer.next_batch(queue))
+            if not in_flight:
+                await asyncio.sleep(retries[0][0] - now)
+                continue
+
+            timeout = max(0.0, retries[0][0] - now) if retries else None
+            done, _ = await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch = in_flight.pop(task)
+                sent_at = launched.pop(task)
+                batch_data = task.result()
+                usage = batch_data["usage"]
+                sizer.observe(batch, usage.completion_tokens if usage else None, batch_data["parse_failed"])
+
+                results = batch_data["results"]
+                missing = [item for item in batch if not (results.get(str(item.id)) or {}).get("title_es")]
+                batch_data["missing"] = missing
+                if batch_data["call_failed"]:
+                    batch_data["exhausted"] = []
+                    if results:
+                        call_failures = 0
+                    elif sent_at > last_failure:
+                        call_failures += 1
+                        last_failure = time.monotonic()
+                    if abandoned is None and (batch_data["fatal"] or call_failures >= TRANSLATE_MAX_CALL_FAILURES):
+                        abandoned = batch_data["error"]
+                        logger.error(f"[FALLO] Proveedor de traducción no disponible ({abandoned}); "
+                                     f"se abandona la ronda y las noticias quedan pendientes")
+                        queue.clear()
+                        retries.clear()
+                    if missing and abandoned is None:
+                        delay = TRANSLATE_RETRY_BASE_DELAY * 2 ** max(0, call_failures - 1)
+                        retries.append((time.monotonic() + delay, missing))
+                        logger.warning(f"[REINTENTO] Lote sin respuesta; {len(missing)} noticias se reenviarán en {delay:.1f}s sin gastar intentos")
+                    on_result(batch, batch_data)
+                    continue
+
+                call_failures = 0
+                for item in missing:
+                    item.translation_attempts = (item.translation_attempts or 0) + 1
+                retry = [item for item in missing if item.translation_attempts < TRANSLATE_ITEM_MAX_ATTEMPTS]
+                batch_data["exhausted"] = [item for item in missing if item.translation_attempts >= TRANSLATE_ITEM_MAX_ATTEMPTS]
+                if abandoned is not None:
+                    retry = []
+                for retry_batch in _split_retry(batch, retry) if retry else []:
+                    attempt = max(item.translation_attempts for item in retry_batch)
+                    delay = TRANSLATE_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                    retries.append((time.monotonic() + delay, retry_batch))
+                if retry:
+                    logger.warning(f"[REINTENTO] {len(retry)} noticias sin traducción; se reenviarán en lotes más pequeños")
+                on_result(batch, batch_data)
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await client.close()
+    if abandoned is not None:
+        raise TranslationUnavailable(f"Traducción abandonada: {abandoned}")
+    return limiter.waited
+
+def _reuse_translation(item: NewsItem, canonical: NewsItem) -> bool:
+    """Copies the canonical item's translation onto a near-duplicate, if it has a real one."""
+    if not canonical.title_es:
+        return False
+    item.title_es = canonical.title_es
+    item.content_es = canonical.content_es
+    item.language = item.language or canonical.language
+    return True
+
+def _memory_key(item: NewsItem, model: str) -> str:
+    return translation_memory.memory_key(item.title, item.content_snippet, item.language, model, PROMPT_VERSION)
+
+def _apply_translation_memory(db: Session, items: List[NewsItem], model: str, stage: pipeline.ExtractionStage) -> List[int]:
+    """Fills items whose exact text was translated before; returns their ids."""
+    keys = {item.id: _memory_key(item, model) for item in items}
+    found = translation_memory.lookup(db, keys.values())
+    hit_ids = []
+    tokens_saved = 0
+    for item in items:
+        entry = found.get(keys[item.id])
+        if entry is None:
+            continue
+        item.title_es = entry.title_es
+        item.content_es = entry.content_es
+        hit_ids.append(item.id)
+        tokens_saved += entry.tokens or 0
+    db.commit()
+
+    if hit_ids:
+        logger.info(f"[MEMORIA] {len(hit_ids)} de {len(items)} noticias traducidas desde la memoria (~{tokens_saved} tokens ahorrados)")
+        stage.submit(hit_ids)
+    return hit_ids
+
+def _translate_locally(item: NewsItem) -> bool:
+    """Detects the item's language; Spanish items are their own translation. True if nothing is left to translate."""
+    if not item.language or item.language == "unknown":
+        text_sample = f"{item.title} {item.content_snippet or ''}".strip()
+        try:
+            item.language = detect(text_sample)
+        except LangDetectException:
+            item.language = "unknown"
 
-def process_pending_translations(db: Session, item_ids: List[int] = None) -> int:
+    if item.language != 'es':
+        return False
+    item.title_es = item.title
+    item.content_es = item.content_snippet
+    return True
+
+def _finish_duplicates(db: Session, deferred: List[NewsItem], stage: pipeline.ExtractionStage) -> Tuple[List[int], List[NewsItem]]:
+    """
+    Copies the translation of their canonical, translated in this run, onto
+    deferred near-duplicates and hands those to the extraction stage. Returns
+    their ids and the duplicates whose canonical got no translation (failed,
+    or left out of the run): these have to be translated themselves.
+    """
+    reused_ids, unresolved = [], []
+    for item in deferred:
+        if _reuse_translation(item, item.duplicate_of):
+            reused_ids.append(item.id)
+        else:
+            unresolved.append(item)
+    db.commit()
+
+    if reused_ids:
+        logger.info(f"[DUPLICADOS] {len(reused_ids)} noticias reutilizaron la traducción de su original")
+        stage.submit(reused_ids)
+    return reused_ids, unresolved
+
+def process_pending_translations(db: Session, item_ids: List[int] = None, on_progress: Optional[Callable[[dict], None]] = None) -> int:
     """
     Process translations for news items using batching and rate limiting.
-    Provides detailed execution metrics.
+    Translated items are handed to a separate extraction stage (services/pipeline.py).
+    Provides detailed execution metrics; `on_progress` receives the queue depth
+    and lag of both stages after every batch.
+    Raises TranslationUnavailable when the provider stops answering; what was
+    translated is kept and the rest stays pending for the job's next attempt.
     """
     total_process_start = time.time()
     logger.info("====================================================")
     logger.info("INICIANDO SERVICIO DE TRADUCCIÓN (BATCH MODE)")
     logger.info("====================================================")
     
-    # 1. Fetch all items where title_es IS NULL
-    query = db.query(NewsItem).filter(NewsItem.title_es == None)
+    # 1. Fetch all items where title_es IS NULL (and not given up on)
+    query = db.query(NewsItem).filter(NewsItem.title_es == None, NewsItem.translation_status == None)
     if item_ids:
         query = query.filter(NewsItem.id.in_(item_ids))
     
@@ -129,23 +542,28 @@ def process_pending_translations(db: Session, item_ids: List[int] = None) -> int
     
     logger.info(f"[TRADUCTOR] Total de noticias a procesar: {len(pending_items)}")
     
-    # 2. Local Phase: Detect language and handle Spanish items
+    # 2. Local Phase: Detect language, handle Spanish items and near-duplicates
     batch_queue = []
+    deferred_duplicates = []
     local_copies = 0
+    reused_ids = []
+    pending_ids = {item.id for item in pending_items}
     for item in pending_items:
         try:
-            # Language Detection
-            if not item.language or item.language == "unknown":
-                text_sample = f"{item.title} {item.content_snippet or ''}".strip()
-                try:
-                    item.language = detect(text_sample)
-                except LangDetectException:
-                    item.language = "unknown"
-
-            # Handle Spanish immediately
-            if item.language == 'es':
-                item.title_es = item.title
-                item.content_es = item.content_snippet
+            # Near-duplicate of an already translated story: reuse its translation
+            # (a link to itself is left over from a reused SQLite id)
+            canonical = item.duplicate_of
+            if canonical is not None and canonical.id != item.id:
+                if _reuse_translation(item, canonical):
+                    reused_ids.append(item.id)
+                    continue
+                if canonical.id in pending_ids:
+                    # Canonical is translated in this run; copy once it's done
+                    deferred_duplicates.append(item)
+                    continue
+
+            # Language detection; Spanish items are handled immediately
+            if _translate_locally(item):
                 local_copies += 1
             else:
                 batch_queue.append(item)
@@ -157,93 +575,197 @@ def process_pending_translations(db: Session, item_ids: List[int] = None) -> int
     
     db.commit() # Save detections
     
-    if not batch_queue:
-        logger.info("[TRADUCTOR] Proceso concluido sin llamadas externas.")
-        return len(pending_items)
+    # Entity extraction runs as its own stage, fed as items get translated
+    stage = pipeline.ExtractionStage().start()
+    try:
+        if reused_ids:
+            logger.info(f"[DUPLICADOS] {len(reused_ids)} noticias reutilizaron la traducción de su original")
+            stage.submit(list(reused_ids))
 
-    # 3. API Phase: Batch translation
-    api_key = os.getenv("GROQ_API_KEY") or os.getenv("API_KEY")
-    model = os.getenv("MODEL", "llama-3.1-8b-instant")
-    
-    if not api_key:
-        logger.error("[ERROR] No se encontró GROQ_API_KEY. Abortando.")
-        return 0
-    
-    client = Groq(api_key=api_key)
-    batch_size = 5
-    translated_count = 0
-    total_batches = (len(batch_queue) + batch_size - 1) // batch_size
-    
-    # Accumulated metrics
-    acc_input_tokens = 0
-    acc_output_tokens = 0
-    acc_total_tokens = 0
-    
-    logger.info(f"[API] Iniciando traducción de {len(batch_queue)} noticias en {total_batches} lotes")
-    
-    for i in range(0, len(batch_queue), batch_size):
-        current_batch = batch_queue[i : i + batch_size]
-        batch_num = i//batch_size + 1
-        logger.info(f"--- LOTE {batch_num} de {total_batches} ({len(current_batch)} noticias) ---")
-        
-        batch_data = translate_batch(client, model, current_batch)
-        batch_results = batch_data["results"]
-        usage = batch_data["usage"]
-        
-        if usage:
-            acc_input_tokens += usage.prompt_tokens
-            acc_output_tokens += usage.completion_tokens
-            acc_total_tokens += usage.total_tokens
-        
-        # Map results back to items
-        for item in current_batch:
-            item_id_str = str(item.id)
-            if item_id_str in batch_results:
-                item.title_es = batch_results[item_id_str].get("title_es")
-                item.content_es = batch_results[item_id_str].get("content_es")
-                translated_count += 1
-            else:
-                # Fallback: copy original with error prefix
-                logger.warning(f"[FALLO] Noticia {item.id} sin traducción en la respuesta. Usando fallback.")
-                item.title_es = f"[Fallo] {item.title}"
-                item.content_es = item.content_snippet
+        # 3. Memory Phase: reuse earlier translations of the exact same text
+        model = os.getenv("MODEL", "llama-3.1-8b-instant")
+        memory_ids = _apply_translation_memory(db, batch_queue, model, stage) if batch_queue else []
+        batch_queue = [item for item in batch_queue if item.title_es is None]
+
+        def requeue_duplicates() -> List[NewsItem]:
+            """Resolves the deferred duplicates; returns the ones left for the API, like any other item."""
+            nonlocal local_copies
+            finished, unresolved = _finish_duplicates(db, deferred_duplicates, stage)
+            deferred_duplicates.clear()
+            reused_ids.extend(finished)
+            queue = []
+            for item in unresolved:
+                if _translate_locally(item):
+                    local_copies += 1
+                else:
+                    queue.append(item)
+            db.commit()
+            if queue:
+                memory_ids.extend(_apply_translation_memory(db, queue, model, stage))
+            return [item for item in queue if item.title_es is None]
+        
+        if not batch_queue:
+            # Canonicals were all handled locally; duplicates of the ones that failed still need the API
+            batch_queue = requeue_duplicates()
+            if not batch_queue:
+                logger.info("[TRADUCTOR] Proceso concluido sin llamadas externas.")
+                return len(pending_items)
+
+        # 4. API Phase: Batch translation
+        if not (os.getenv("GROQ_API_KEY") or os.getenv("API_KEY")):
+            logger.error("[ERROR] No se encontró GROQ_API_KEY. Abortando.")
+            return 0
         
-        db.commit()
+        sizer = BatchSizer()
         
-        # --- Automatic Entity Extraction ---
-        # The moment a batch is translated, we process its entities
-        batch_ids = [item.id for item in current_batch]
-        try:
-            extractor.process_pending_entities(db, item_ids=batch_ids)
-        except Exception as e:
-            logger.error(f"[AUTO-EXTRACTOR] Error in automated extraction: {e}")
+        # Accumulated metrics
+        metrics = {"translated": 0, "failed": 0, "batches": 0, "input": 0, "output": 0, "total": 0, "first_item": None}
+        
+        logger.info(f"[API] Iniciando traducción de {len(batch_queue)} noticias "
+                    f"(concurrencia {TRANSLATE_CONCURRENCY}, límites {TRANSLATE_RPM} RPM / {TRANSLATE_TPM} TPM, "
+                    f"presupuesto por lote {TRANSLATE_MAX_INPUT_TOKENS}/{TRANSLATE_MAX_OUTPUT_TOKENS} tokens)")
+        
+        items_by_id = {str(item.id): item for item in batch_queue}
+        api_start = time.time()
+        
+        def stage_snapshot() -> dict:
+            """Translation stage: items still waiting for a translation and how long they have waited."""
+            depth = len(batch_queue) - metrics["translated"] - metrics["failed"]
+            return {
+                "depth": depth,
+                "lag_s": round(time.time() - api_start, 2) if depth else 0.0,
+                "translated": metrics["translated"],
+                "failed": metrics["failed"],
+            }
+        
+        def report_progress():
+            translation, extraction = stage_snapshot(), stage.snapshot()
+            logger.info(f"  > Cola de Traducción: {translation['depth']} noticias (retraso {translation['lag_s']:.2f}s)")
+            logger.info(f"  > Cola de Extracción: {extraction['depth']} noticias (retraso {extraction['lag_s']:.2f}s)")
+            if on_progress:
+                on_progress({"translation": translation, "extraction": extraction})
+        
+        def store_translation(item: NewsItem, result: Dict[str, Any]) -> Dict[str, Any]:
+            """Sets the translation on the item and returns its translation-memory entry."""
+            item.title_es = result.get("title_es")
+            item.content_es = result.get("content_es")
+            return {
+                "key": _memory_key(item, model),
+                "source_language": item.language,
+                "model": model,
+                "prompt_version": PROMPT_VERSION,
+                "title_es": item.title_es,
+                "content_es": item.content_es,
+                "tokens": sizer.input_tokens(item) + sizer.output_tokens(item),
+            }
+        
+        def apply_item(item_id: str, result: Dict[str, Any]):
+            """Streaming: commits one translation the moment its JSON object closes."""
+            item = items_by_id[item_id]
+            try:
+                translation_memory.remember(db, [store_translation(item, result)])
+                db.commit()
+            except Exception:
+                # Expires the item too, so apply_batch sees it untranslated and stores it again
+                db.rollback()
+                raise
+            stage.submit([item.id])
+            if metrics["first_item"] is None:
+                metrics["first_item"] = time.time() - total_process_start
+        
+        def apply_batch(current_batch: List[NewsItem], batch_data: Dict[str, Any]):
+            """Stores one finished batch; runs on the event loop thread, one batch at a time."""
+            metrics["batches"] += 1
+            logger.info(f"--- LOTE {metrics['batches']} ({len(current_batch)} noticias) ---")
+            batch_results = batch_data["results"]
+            usage = batch_data["usage"]
+        
+            if usage:
+                metrics["input"] += usage.prompt_tokens
+                metrics["output"] += usage.completion_tokens
+                metrics["total"] += usage.total_tokens
         
-        # 4. Partial Summary after each batch
-        current_duration = time.time() - total_process_start
-        logger.info("----------------------------------------------------")
-        logger.info("RESUMEN PARCIAL DEL PROCESO")
+            # Map results back to items (missing ones are retried by run_batches)
+            remembered = []
+            translated_ids = []
+            new_ids = []
+            missing = set(item.id for item in batch_data["missing"])
+            for item in current_batch:
+                if item.id in missing:
+                    continue
+                translated_ids.append(item.id)
+                if item.title_es is None:  # Not already stored while streaming
+                    remembered.append(store_translation(item, batch_results[str(item.id)]))
+                    new_ids.append(item.id)
+            metrics["translated"] += len(translated_ids)
+            if translated_ids and metrics["first_item"] is None:
+                metrics["first_item"] = time.time() - total_process_start
+        
+            for item in batch_data["exhausted"]:
+                logger.warning(f"[FALLO] Noticia {item.id} sin traducción tras {item.translation_attempts} intentos. Marcada como {FAILED}.")
+                item.translation_status = FAILED
+            metrics["failed"] += len(batch_data["exhausted"])
+        
+            translation_memory.remember(db, remembered)
+            db.commit()
+        
+            # --- Automatic Entity Extraction ---
+            # Hand the batch to the extraction stage (streamed items were handed over already)
+            stage.submit(new_ids)
+        
+            # 5. Partial Summary after each batch
+            current_duration = time.time() - total_process_start
+            logger.info("----------------------------------------------------")
+            logger.info("RESUMEN PARCIAL DEL PROCESO")
+            logger.info(f"  > Noticias Traducidas (API): {metrics['translated']}")
+            logger.info(f"  > Tokens de Entrada Acumulados: {metrics['input']}")
+            logger.info(f"  > Tokens de Salida Acumulados: {metrics['output']}")
+            logger.info(f"  > Total de Tokens Consumidos: {metrics['total']}")
+            logger.info(f"  > Tiempo Total de Ejecución: {current_duration:.2f}s")
+            report_progress()
+            logger.info("----------------------------------------------------")
+        
+        # 6. Rate limiting is handled by the token buckets inside run_batches
+        limiter_wait = asyncio.run(run_batches(batch_queue, model, apply_batch, sizer, apply_item))
+        
+        # Duplicates whose original ended without a translation go through the
+        # batches (and their retries, up to FAILED) on their own
+        retry_queue = requeue_duplicates()
+        if retry_queue:
+            logger.info(f"[DUPLICADOS] {len(retry_queue)} noticias sin traducción de su original; se traducen por separado")
+            items_by_id.update((str(item.id), item) for item in retry_queue)
+            batch_queue.extend(retry_queue)
+            limiter_wait += asyncio.run(run_batches(retry_queue, model, apply_batch, sizer, apply_item))
+        translated_count = metrics["translated"]
+        
+        translation_memory.evict(db)
+        translation_duration = time.time() - total_process_start
+        # Wait for the extraction stage to drain before reporting
+        stage.close()
+        extraction = stage.snapshot()
+        if on_progress:
+            on_progress({"translation": stage_snapshot(), "extraction": extraction})
+        total_duration = time.time() - total_process_start
+        
+        logger.info("====================================================")
+        logger.info("RESUMEN FINAL DEL PROCESO")
         logger.info(f"  > Noticias Traducidas (API): {translated_count}")
-        logger.info(f"  > Tokens de Entrada Acumulados: {acc_input_tokens}")
-        logger.info(f"  > Tokens de Salida Acumulados: {acc_output_tokens}")
-        logger.info(f"  > Total de Tokens Consumidos: {acc_total_tokens}")
-        logger.info(f"  > Tiempo Total de Ejecución: {current_duration:.2f}s")
-        logger.info("----------------------------------------------------")
-        
-        # 5. Rate Limiting Pause
-        if i + batch_size < len(batch_queue):
-            logger.info(f"[PAUSA] Esperando 12 segundos para cumplir con el Rate Limit...")
-            time.sleep(12)
-    
-    total_duration = time.time() - total_process_start
-    
-    logger.info("====================================================")
-    logger.info("RESUMEN FINAL DEL PROCESO")
-    logger.info(f"  > Noticias Traducidas (API): {translated_count}")
-    logger.info(f"  > Noticias Omitidas (ES): {local_copies}")
-    logger.info(f"  > Tokens de Entrada Acumulados: {acc_input_tokens}")
-    logger.info(f"  > Tokens de Salida Acumulados: {acc_output_tokens}")
-    logger.info(f"  > Total de Tokens Consumidos: {acc_total_tokens}")
-    logger.info(f"  > Tiempo Total de Ejecución: {total_duration:.2f}s")
-    logger.info("====================================================")
-    
-    return translated_count
+        logger.info(f"  > Noticias Omitidas (ES): {local_copies}")
+        logger.info(f"  > Noticias Duplicadas (traducción reutilizada): {len(reused_ids)}")
+        logger.info(f"  > Noticias desde Memoria de Traducción: {len(memory_ids)}")
+        logger.info(f"  > Noticias Fallidas (reintentos agotados): {metrics['failed']}")
+        logger.info(f"  > Tokens de Entrada Acumulados: {metrics['input']}")
+        logger.info(f"  > Tokens de Salida Acumulados: {metrics['output']}")
+        logger.info(f"  > Total de Tokens Consumidos: {metrics['total']}")
+        logger.info(f"  > Lotes Enviados: {metrics['batches']} (tasa reciente de fallos de parseo: {sizer.failure_rate:.0%})")
+        logger.info(f"  > Espera por Rate Limit: {limiter_wait:.2f}s")
+        if metrics["first_item"] is not None:
+            logger.info(f"  > Primera Traducción Guardada a los: {metrics['first_item']:.2f}s")
+        logger.info(f"  > Fin de la Traducción a los: {translation_duration:.2f}s")
+        logger.info(f"  > Noticias Extraídas: {extraction['extracted']} (retraso máx. {extraction['max_lag_s']:.2f}s, desbordadas {extraction['overflowed']})")
+        logger.info(f"  > Tiempo Total de Ejecución: {total_duration:.2f}s")
+        logger.info("====================================================")
+        
+        return translated_count + len(memory_ids)
+    finally:
+        stage.close()
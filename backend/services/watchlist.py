@@ -0,0 +1,110 @@
+"""
+Watch List Service - Long-lived PhraseMatcher over Known Entities
+
+The extractor matches every non-ignored entity name in each article, on top of
+the statistical NER. Instead of rebuilding a PhraseMatcher from the whole
+entities table for every batch, one matcher per process is kept and patched:
+entities created since the last batch (higher ids) are added, and when the
+entity_index version stamp changes (entities renamed, ignored, deleted or
+restored, from any process) the table is diffed against the loaded patterns
+and only the differences are added or removed.
+"""
+
+import time
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
+from sqlalchemy.orm import Session
+from models import Entity
+from . import entity_index
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+
+logger = logging.getLogger(__name__)
+
+
+class WatchList:
+    """
+    PhraseMatcher with one pattern per entity (keyed by id), matching on LOWER.
+    Callable like the matcher itself; falsy while it has no patterns.
+    """
+
+    def __init__(self, nlp_obj: "Language"):
+        from spacy.matcher import PhraseMatcher
+        self.nlp = nlp_obj
+        self.matcher = PhraseMatcher(nlp_obj.vocab, attr="LOWER")
+        self.names: Dict[int, str] = {}
+        self.max_id = 0
+        self.version: Optional[str] = None  # entity_index stamp the patterns reflect
+        self.synced = False
+        self.lock = threading.Lock()
+
+    @classmethod
+    def of(cls, db: Session, nlp_obj: "Language", entity_ids: List[int]) -> "WatchList":
+        """A one-off matcher for just these (non-ignored) entities; never synced."""
+        watchlist = cls(nlp_obj)
+        rows = db.query(Entity.id, Entity.name).filter(Entity.id.in_(entity_ids), Entity.is_ignored == False)
+        for row in rows:
+            watchlist._add(row.id, row.name)
+        return watchlist
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __call__(self, doc):
+        with self.lock:
+            return self.matcher(doc)
+
+    def _add(self, entity_id: int, name: str):
+        self.matcher.add(str(entity_id), [self.nlp.make_doc(name)])
+        self.names[entity_id] = name
+
+    def _remove(self, entity_id: int):
+        if self.names.pop(entity_id, None) is not None:
+            self.matcher.remove(str(entity_id))
+
+    def sync(self, db: Session):
+        """Brings the patterns up to date with the entities table."""
+        version = entity_index.read_version(db)
+        with self.lock:
+            start = time.time()
+            full = not self.synced or version != self.version
+            query = db.query(Entity.id, Entity.name, Entity.is_ignored)
+            if not full:
+                # Same stamp: the only possible changes are entities inserted since (by extraction)
+                query = query.filter(Entity.id > self.max_id)
+            rows = query.all()
+            active = {row.id: row.name for row in rows if not row.is_ignored}
+
+            removed = 0
+            if full:
+                for entity_id in [i for i, name in self.names.items() if active.get(i) != name]:
+                    self._remove(entity_id)
+                    removed += 1
+            added = 0
+            for entity_id, name in active.items():
+                if entity_id not in self.names:
+                    self._add(entity_id, name)
+                    added += 1
+
+            self.max_id = max([self.max_id] + [row.id for row in rows])
+            self.version = version
+            self.synced = True
+            if added or removed:
+                logger.info(f"[EXTRACTOR] Watch List actualizada: +{added} -{removed} ({len(self.names)} entidades activas, {time.time() - start:.2f}s)")
+
+
+_watchlist: Optional[WatchList] = None
+_lock = threading.Lock()
+
+
+def get(db: Session, nlp_obj: "Language") -> WatchList:
+    """Returns this process's watch list, synced with the entities table."""
+    global _watchlist
+    with _lock:
+        if _watchlist is None or _watchlist.nlp is not nlp_obj:
+            _watchlist = WatchList(nlp_obj)
+        watchlist = _watchlist
+    watchlist.sync(db)
+    return watchlist
@@ -0,0 +1,278 @@
+"""
+Pipeline Worker - Job Queue Consumer
+
+Drains the persistent `jobs` queue (services/jobs.py) and runs the heavy
+pipeline stages outside the API request cycle. Several workers can run at
+once, in separate processes or machines sharing the database.
+
+Usage:
+    python worker.py                        # all job kinds
+    python worker.py --kinds SCAN,CRAWL     # only some kinds
+    python worker.py --once                 # drain the queue and exit
+    python worker.py --warm-up              # load the SpaCy model right away
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+import time
+import socket
+import argparse
+import threading
+import traceback
+import uuid
+import logging
+from typing import List, Optional
+
+import models
+from database import SessionLocal, engine
+# Translator/extractor are imported inside their handlers: they pull in Groq and
+# SpaCy, and this module is re-imported by the ingestor's spawned parse processes.
+from services import jobs, ingestor, scheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "30"))
+RECOVERY_INTERVAL = float(os.getenv("WORKER_RECOVERY_INTERVAL", "60"))
+PROGRESS_INTERVAL = float(os.getenv("WORKER_PROGRESS_INTERVAL", "1"))
+NLP_WARMUP = os.getenv("NLP_WARMUP", "0") == "1"
+
+# Job kinds that end up running the SpaCy extractor
+NLP_KINDS = {jobs.TRANSLATE, jobs.EXTRACT, jobs.EXTRACT_NATIVE, jobs.RESCAN_WATCHLIST}
+
+
+class ProgressPublisher:
+    """
+    Writes job progress through its own session so it is visible while the job
+    runs, at most once every PROGRESS_INTERVAL seconds unless forced.
+    """
+
+    def __init__(self, job: models.Job):
+        self.job_id = job.id
+        self.db = SessionLocal()
+        self.last_write = 0.0
+
+    def publish(self, progress: dict, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_write < PROGRESS_INTERVAL:
+            return
+        self.last_write = now
+        try:
+            jobs.set_progress(self.db, self.job_id, progress)
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"[WORKER] Could not publish progress for job #{self.job_id}: {e}")
+
+    def close(self):
+        self.db.close()
+
+
+# --- Handlers: (db, job) -> result dict ---
+
+def handle_scan(db, job: models.Job) -> dict:
+    """Ingest RSS feeds, then queue translation and native extraction."""
+    payload = job.payload or {}
+    scan_stats = {}
+    publisher = ProgressPublisher(job)
+
+    def on_progress(stats: dict):
+        publisher.publish(stats, force=stats["sources_done"] >= stats["sources_total"])
+
+    try:
+        count, new_ids = ingestor.process_feeds(
+            db, stats=scan_stats, source_ids=payload.get("source_ids"), on_progress=on_progress
+        )
+    finally:
+        publisher.close()
+    job.progress = scan_stats
+
+    # Learn from what this scan brought in to pick each source's next poll
+    scanned_ids = payload.get("source_ids") or [int(sid) for sid in scan_stats.get("sources", {})]
+    scheduler.reschedule(db, scanned_ids)
+
+    jobs.enqueue(db, jobs.EXTRACT_NATIVE, dedupe_key="extract_native")
+    if new_ids:
+        jobs.enqueue(db, jobs.TRANSLATE, {"item_ids": new_ids})
+
+    return {
+        "new_items": count,
+        "new_item_ids": new_ids,
+        "sources_fetched": scan_stats.get("fetched", 0),
+        "sources_unchanged": scan_stats.get("unchanged", 0),
+        "sources_failed": scan_stats.get("failed", 0),
+        "bytes_downloaded": scan_stats.get("bytes_downloaded", 0)
+    }
+
+def handle_translate(db, job: models.Job) -> dict:
+    """
+    Translate items. The translator feeds its own extraction stage; job progress
+    reports the queue depth and lag of both stages.
+    """
+    from services import translator
+    item_ids = (job.payload or {}).get("item_ids")
+    logger.info(f"[WORKER] Starting translation flow for {len(item_ids or [])} items")
+    publisher = ProgressPublisher(job)
+    progress = {}
+
+    def on_progress(stages: dict):
+        progress.update(stages)
+        publisher.publish(stages)
+
+    try:
+        count = translator.process_pending_translations(db, item_ids, on_progress=on_progress)
+    finally:
+        publisher.close()
+    job.progress = progress
+    return {"translated": count}
+
+def handle_extract(db, job: models.Job) -> dict:
+    """Extract entities from translated items (if any left)."""
+    from services import extractor
+    count = extractor.process_pending_entities(db, item_ids=(job.payload or {}).get("item_ids"))
+    return {"extracted": count}
+
+def handle_extract_native(db, job: models.Job) -> dict:
+    """Extract entities from native Spanish items."""
+    from services import extractor
+    count = extractor.process_native_pending(db)
+    return {"extracted": count}
+
+def handle_rescan_watchlist(db, job: models.Job) -> dict:
+    """Match watch list names against cached docs of already extracted items (no NER)."""
+    from services import extractor
+    publisher = ProgressPublisher(job)
+    try:
+        result = extractor.rescan_watchlist(db, (job.payload or {}).get("entity_ids"), on_progress=publisher.publish)
+    finally:
+        publisher.close()
+    job.progress = result
+    return result
+
+def handle_crawl(db, job: models.Job) -> dict:
+    """Full-text extraction. Crawl4AI is imported lazily: it pulls in a browser stack."""
+    from services import crawler
+    crawler.run_crawler_sync(db, batch_size=(job.payload or {}).get("batch_size", 5))
+    return {}
+
+HANDLERS = {
+    jobs.SCAN: handle_scan,
+    jobs.TRANSLATE: handle_translate,
+    jobs.EXTRACT: handle_extract,
+    jobs.EXTRACT_NATIVE: handle_extract_native,
+    jobs.RESCAN_WATCHLIST: handle_rescan_watchlist,
+    jobs.CRAWL: handle_crawl,
+}
+
+
+def _heartbeat_loop(job_id: int, worker_id: str, done: threading.Event):
+    while not done.wait(HEARTBEAT_INTERVAL):
+        db = SessionLocal()
+        try:
+            jobs.heartbeat(db, job_id, worker_id)
+        except Exception as e:
+            logger.warning(f"[WORKER] Heartbeat failed for job #{job_id}: {e}")
+        finally:
+            db.close()
+
+def run_job(db, job: models.Job, worker_id: str):
+    """Runs a claimed job, keeping its heartbeat fresh, and records the outcome."""
+    handler = HANDLERS.get(job.kind)
+    if handler is None:
+        jobs.fail(db, job, f"Unknown job kind: {job.kind}")
+        return
+
+    done = threading.Event()
+    beat = threading.Thread(target=_heartbeat_loop, args=(job.id, worker_id, done), daemon=True)
+    beat.start()
+    try:
+        logger.info(f"[WORKER] {worker_id} ejecutando {job.kind} #{job.id} (intento {job.attempts})")
+        result = handler(db, job)
+        jobs.complete(db, job, result)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[WORKER] {job.kind} #{job.id} error: {e}")
+        jobs.fail(db, job, f"{e}\n{traceback.format_exc(limit=5)}")
+    finally:
+        done.set()
+
+def run_worker(worker_id: Optional[str] = None, kinds: Optional[List[str]] = None,
+               stop_event: Optional[threading.Event] = None, once: bool = False):
+    """Main loop: recover stale jobs, claim, run, repeat until stopped."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    stop_event = stop_event or threading.Event()
+    logger.info(f"[WORKER] {worker_id} iniciado (kinds={kinds or 'ALL'})")
+
+    last_recovery = 0.0
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            now = time.monotonic()
+            if now - last_recovery >= RECOVERY_INTERVAL:
+                jobs.recover_stale(db)
+                last_recovery = now
+
+            job = jobs.claim_next(db, worker_id, kinds)
+            if job is not None:
+                run_job(db, job, worker_id)
+                continue
+        except Exception as e:
+            logger.error(f"[WORKER] Loop error: {e}")
+        finally:
+            db.close()
+
+        if once:
+            break
+        stop_event.wait(POLL_INTERVAL)
+
+    logger.info(f"[WORKER] {worker_id} detenido")
+
+def warm_up_nlp(kinds: Optional[List[str]] = None) -> Optional[threading.Thread]:
+    """
+    Loads the SpaCy model in a background thread when this worker handles jobs
+    that need it, so the first extraction does not pay for the load. Jobs that
+    arrive before it finishes simply wait for the same load.
+    """
+    if kinds is not None and not NLP_KINDS.intersection(kinds):
+        return None
+
+    def load():
+        from services import extractor
+        extractor.warm_up()
+
+    thread = threading.Thread(target=load, name="nlp-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def start_embedded_worker(stop_event: threading.Event) -> threading.Thread:
+    """Runs a worker thread inside the API process (development convenience)."""
+    thread = threading.Thread(
+        target=run_worker,
+        kwargs={"worker_id": f"embedded:{os.getpid()}", "stop_event": stop_event},
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agentic Newsroom pipeline worker")
+    parser.add_argument("--kinds", help="Comma-separated job kinds to handle (default: all)")
+    parser.add_argument("--once", action="store_true", help="Drain runnable jobs and exit")
+    parser.add_argument("--scheduler", action="store_true", help="Also run the adaptive polling scheduler (run it in one process only)")
+    parser.add_argument("--warm-up", action="store_true", help="Load the SpaCy model at start instead of on the first extraction (also NLP_WARMUP=1)")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    kinds = [k.strip().upper() for k in args.kinds.split(",")] if args.kinds else None
+    stop_event = threading.Event()
+    if args.warm_up or NLP_WARMUP:
+        warm_up_nlp(kinds)
+    if args.scheduler:
+        scheduler.start_scheduler(stop_event, SessionLocal)
+    try:
+        run_worker(kinds=kinds, stop_event=stop_event, once=args.once)
+    except KeyboardInterrupt:
+        pass
@@ -4,7 +4,7 @@ import {
     Trash2, Plus, Database, Pencil,
     X, User, Building2, MapPin, Lightbulb,
     CheckCircle2, Link2, Info, EyeOff, Eye,
-    LayoutGrid, Search
+    LayoutGrid, Search, RefreshCw
 } from 'lucide-react';
 import { useToast } from '../context/ToastContext';
 import { cn } from '../lib/utils';
@@ -34,6 +34,7 @@ const Entities = () => {
     const [selectedType, setSelectedType] = useState(null);
     const [selectedLetter, setSelectedLetter] = useState(null);
     const [searchTerm, setSearchTerm] = useState('');
+    const [rescanning, setRescanning] = useState(false);
 
     const fetchData = async () => {
         setLoading(true);
@@ -122,6 +123,19 @@ const Entities = () => {
         }
     };
 
+    const handleRescan = async () => {
+        setRescanning(true);
+        try {
+            await axios.post('http://localhost:8000/api/entities/rescan');
+            addToast('Re-escaneo del archivo encolado', 'success');
+        } catch (error) {
+            console.error('Error queueing rescan:', error);
+            addToast('Error al encolar el re-escaneo', 'error');
+        } finally {
+            setRescanning(false);
+        }
+    };
+
     const getTypeDetails = (typeId) => ENTITY_TYPES.find(t => t.id === typeId) || ENTITY_TYPES[0];
 
     const filteredEntities = useMemo(() => {
@@ -149,13 +163,24 @@ const Entities = () => {
                         Catálogo de identidades rastreadas por el sistema.
                     </p>
                 </div>
-                <button
-                    onClick={() => setIsModalOpen(true)}
-                    className="flex items-center gap-2 px-6 py-2.5 bg-indigo-600 hover:bg-indigo-700 text-white rounded-xl font-medium shadow-lg shadow-indigo-500/20 transition-all transform hover:scale-[1.02] active:scale-[0.98]"
-                >
-                    <Plus size={20} />
-                    Nueva Entidad
-                </button>
+                <div className="flex items-center gap-3">
+                    <button
+                        onClick={handleRescan}
+                        disabled={rescanning}
+                        title="Aplica la lista de entidades a las noticias ya procesadas"
+                        className="flex items-center gap-2 px-4 py-2.5 bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 text-gray-700 dark:text-gray-200 hover:bg-gray-50 dark:hover:bg-gray-700 rounded-xl font-medium transition-all disabled:opacity-50"
+                    >
+                        <RefreshCw size={18} className={rescanning ? 'animate-spin' : ''} />
+                        Re-escanear archivo
+                    </button>
+                    <button
+                        onClick={() => setIsModalOpen(true)}
+                        className="flex items-center gap-2 px-6 py-2.5 bg-indigo-600 hover:bg-indigo-700 text-white rounded-xl font-medium shadow-lg shadow-indigo-500/20 transition-all transform hover:scale-[1.02] active:scale-[0.98]"
+                    >
+                        <Plus size={20} />
+                        Nueva Entidad
+                    </button>
+                </div>
             </div>
 
             {/* Filter Tools Row */}
@@ -1,6 +1,6 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useToast } from '../context/ToastContext';
-import { Filter, CheckSquare, Square, Trash2, CheckCircle, RefreshCw, LayoutDashboard, ExternalLink, Sparkles, FileText, Loader2 } from 'lucide-react';
+import { Filter, CheckSquare, Square, Trash2, CheckCircle, RefreshCw, LayoutDashboard, ExternalLink, Sparkles, FileText, Loader2, AlertTriangle } from 'lucide-react';
 import { useHighlight } from '../context/HighlightContext';
 import Reader from '../components/Reader';
 import { cn } from '../lib/utils';
@@ -15,6 +15,7 @@ const News = () => {
     const [newsItems, setNewsItems] = useState([]);
     const [loading, setLoading] = useState(true);
     const [scanning, setScanning] = useState(false);
+    const [scanProgress, setScanProgress] = useState(null);
 
     // New State
     const [selectedItems, setSelectedItems] = useState(new Set());
@@ -24,6 +25,13 @@ const News = () => {
 
     const [newlyFoundIds, setNewlyFoundIds] = useState([]);
 
+    // Pagination: cursor of the next page, and whether there are pages left to load
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const hasMore = useRef(false);
+    // Change sequence the list reflects: polling only asks for what changed after it
+    const seq = useRef(null);
+
     const fetchStats = async () => {
         try {
             const response = await fetch('http://localhost:8000/api/dashboard-stats');
@@ -36,13 +44,31 @@ const News = () => {
         }
     };
 
+    const newsUrl = (cursor = null) => {
+        const params = new URLSearchParams();
+        if (filterSource) params.set('source_id', filterSource);
+        if (cursor) params.set('cursor', cursor);
+        return `http://localhost:8000/api/news/discovered?${params}`;
+    };
+
+    // Listing order: newest published_date first (undated last), then highest id
+    const comesAfter = (a, b) => {
+        if (a.published_date === b.published_date) return a.id < b.id;
+        if (!a.published_date) return true;
+        if (!b.published_date) return false;
+        return a.published_date < b.published_date;
+    };
+
     const fetchNews = async (silent = false) => {
         if (!silent) setLoading(true);
         try {
-            const response = await fetch('http://localhost:8000/api/news/discovered');
+            const response = await fetch(newsUrl());
             if (response.ok) {
-                const data = await response.json();
-                setNewsItems(data);
+                const page = await response.json();
+                seq.current = page.seq;
+                hasMore.current = page.next_cursor !== null;
+                setNewsItems(page.items);
+                setNextCursor(page.next_cursor);
             }
         } catch (error) {
             console.error('Error fetching news:', error);
@@ -51,6 +77,58 @@ const News = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const response = await fetch(newsUrl(nextCursor));
+            if (response.ok) {
+                const page = await response.json();
+                hasMore.current = page.next_cursor !== null;
+                setNewsItems(prev => {
+                    const ids = new Set(prev.map(item => item.id));
+                    return [...prev, ...page.items.filter(item => !ids.has(item.id))];
+                });
+                setNextCursor(page.next_cursor);
+            }
+        } catch (error) {
+            console.error('Error fetching news:', error);
+            addToast('Error al cargar más noticias', 'error');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    // Applies what changed since the last page or poll instead of reloading the list
+    const pollChanges = async () => {
+        if (seq.current === null) return;
+        const params = new URLSearchParams({ since: seq.current, status: 'DISCOVERED' });
+        if (filterSource) params.set('source_id', filterSource);
+        try {
+            const response = await fetch(`http://localhost:8000/api/news/changes?${params}`);
+            if (!response.ok) return;
+            const delta = await response.json();
+            if (delta.reset) {
+                // Too much changed (or too long ago) to patch the list: reload it
+                await fetchNews(true);
+                return;
+            }
+            seq.current = delta.seq;
+            if (delta.items.length === 0 && delta.removed.length === 0) return;
+
+            const changed = new Set(delta.items.map(item => item.id));
+            const removed = new Set(delta.removed);
+            setNewsItems(prev => {
+                const last = prev[prev.length - 1];
+                const kept = prev.filter(item => !changed.has(item.id) && !removed.has(item.id));
+                // Items sorting below the loaded pages show up with "Cargar más"
+                const added = delta.items.filter(item => !hasMore.current || !last || !comesAfter(item, last));
+                return [...kept, ...added].sort((a, b) => (comesAfter(a, b) ? 1 : -1));
+            });
+        } catch (error) {
+            console.error('Error polling news changes:', error);
+        }
+    };
+
     const fetchSources = async () => {
         try {
             const response = await fetch('http://localhost:8000/api/sources');
@@ -63,14 +141,40 @@ const News = () => {
         }
     };
 
+    // Scans run in the background: poll their progress until they finish
+    const waitForScan = async (scanId) => {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1500));
+            const response = await fetch(`http://localhost:8000/api/scan/${scanId}`);
+            if (!response.ok) return null;
+            const scan = await response.json();
+            setScanProgress(scan);
+            if (scan.status === 'DONE' || scan.status === 'FAILED') return scan;
+        }
+    };
+
     const handleScan = async () => {
         setScanning(true);
         try {
             const response = await fetch('http://localhost:8000/api/scan', { method: 'POST' });
+            let scanId = null;
             if (response.ok) {
-                const data = await response.json();
-                addToast(`Escaneo completado. ${data.new_items} noticias nuevas.`, 'success');
-                setNewlyFoundIds(data.new_item_ids || []);
+                scanId = (await response.json()).scan_id;
+            } else if (response.status === 409) {
+                // A scan is already running over these sources: follow it instead
+                scanId = (await response.json()).detail.scan_id;
+                addToast('Ya hay un escaneo en curso.', 'info');
+            }
+
+            if (scanId === null) {
+                addToast('Error al escanear fuentes.', 'error');
+                return;
+            }
+
+            const scan = await waitForScan(scanId);
+            if (scan && scan.status === 'DONE') {
+                addToast(`Escaneo completado. ${scan.items_created} noticias nuevas.`, 'success');
+                setNewlyFoundIds(scan.new_item_ids || []);
                 await fetchStats();
                 await fetchNews();
             } else {
@@ -80,6 +184,7 @@ const News = () => {
             addToast('Error de conexión.', 'error');
         } finally {
             setScanning(false);
+            setScanProgress(null);
         }
     };
 
@@ -161,24 +266,24 @@ const News = () => {
 
     useEffect(() => {
         // Initial fetch
-        Promise.all([fetchStats(), fetchNews(), fetchSources()]).finally(() => setLoading(false));
+        Promise.all([fetchStats(), fetchSources()]);
+    }, []);
+
+    useEffect(() => {
+        // News are filtered by source on the server: reload when the filter changes
+        fetchNews();
 
-        // Silent polling for translation progress
+        // Silent polling for new items and translation progress
         const interval = setInterval(() => {
-            fetchNews(true);
+            pollChanges();
             fetchStats();
         }, 6000);
 
         return () => clearInterval(interval);
-    }, []);
-
-
+    }, [filterSource]);
 
-    // Filter Logic
-    const filteredNews = newsItems.filter(item => {
-        if (!filterSource) return true;
-        return item.source_id === parseInt(filterSource);
-    });
+    // Filter Logic (the server already applies the source filter)
+    const filteredNews = newsItems;
 
     // Navigation for Reader (Moved here to avoid ReferenceError)
     const readingIndex = readingItem ? filteredNews.findIndex(i => i.id === readingItem.id) : -1;
@@ -209,7 +314,9 @@ const News = () => {
                         className={`px-4 py-2 bg-indigo-600 text-white rounded-lg hover:bg-indigo-700 transition-colors flex items-center gap-2 ${scanning ? 'opacity-75 cursor-not-allowed' : ''}`}
                     >
                         <RefreshCw size={20} className={scanning ? 'animate-spin' : ''} />
-                        {scanning ? 'Sincronizar RSS' : 'Sincronizar RSS'}
+                        {scanning && scanProgress
+                            ? `Sincronizando ${scanProgress.sources_done}/${scanProgress.sources_total}`
+                            : 'Sincronizar RSS'}
                     </button>
                 </div>
             </div>
@@ -360,6 +467,11 @@ const News = () => {
                                                         <span className="inline-flex items-center w-5 h-4 justify-center rounded text-[10px] font-bold bg-indigo-100 text-indigo-600 dark:bg-indigo-900/30 dark:text-indigo-400 uppercase tracking-tighter">
                                                             ES
                                                         </span>
+                                                    ) : item.translation_status === 'FAILED' ? (
+                                                        // Gave up after retries
+                                                        <span title="Traducción fallida">
+                                                            <AlertTriangle className="w-3 h-3 text-amber-500" />
+                                                        </span>
                                                     ) : (
                                                         // In progress
                                                         item.language && <Loader2 className="w-3 h-3 animate-spin text-indigo-500" />
@@ -441,6 +553,19 @@ const News = () => {
                 </div >
             )}
 
+            {nextCursor && (
+                <div className="flex justify-center mt-4">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-4 py-2 bg-white dark:bg-gray-800 text-gray-700 dark:text-gray-300 border border-gray-200 dark:border-gray-700 rounded-lg hover:bg-gray-50 dark:hover:bg-gray-700 transition-colors flex items-center gap-2 text-sm font-medium"
+                    >
+                        {loadingMore && <Loader2 size={16} className="animate-spin" />}
+                        Cargar más
+                    </button>
+                </div>
+            )}
+
             {/* Reader Modal */}
             <Reader
                 item={readingItem}
@@ -1,18 +1,23 @@
 import React, { useEffect, useState } from 'react';
 import { useToast } from '../context/ToastContext';
-import { FileText, ExternalLink, Sparkles } from 'lucide-react';
+import { FileText, ExternalLink, Sparkles, Loader2 } from 'lucide-react';
 
 const Newsroom = () => {
     const { addToast } = useToast();
     const [newsItems, setNewsItems] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
-    const fetchApprovedNews = async () => {
+    // The archive is paginated: each page ends with the cursor of the next one
+    const fetchApprovedNews = async (cursor = null) => {
+        const url = 'http://localhost:8000/api/news/approved' + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : '');
         try {
-            const response = await fetch('http://localhost:8000/api/news/approved');
+            const response = await fetch(url);
             if (response.ok) {
-                const data = await response.json();
-                setNewsItems(data);
+                const page = await response.json();
+                setNewsItems(prev => cursor ? [...prev, ...page.items] : page.items);
+                setNextCursor(page.next_cursor);
             }
         } catch (error) {
             console.error('Error fetching approved news:', error);
@@ -22,6 +27,12 @@ const Newsroom = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchApprovedNews(nextCursor);
+        setLoadingMore(false);
+    };
+
     useEffect(() => {
         fetchApprovedNews();
     }, []);
@@ -97,6 +108,19 @@ const Newsroom = () => {
                     </div>
                 </div>
             )}
+
+            {nextCursor && (
+                <div className="flex justify-center mt-4">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-4 py-2 bg-white dark:bg-gray-800 text-gray-700 dark:text-gray-300 border border-gray-200 dark:border-gray-700 rounded-lg hover:bg-gray-50 dark:hover:bg-gray-700 transition-colors flex items-center gap-2 text-sm font-medium"
+                    >
+                        {loadingMore && <Loader2 size={16} className="animate-spin" />}
+                        Cargar más
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
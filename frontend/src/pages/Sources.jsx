@@ -242,8 +242,26 @@ const Sources = () => {
                                             Online
                                         </span>
                                     )}
+                                    {source.health_status === 'DEGRADED' && (
+                                        <span className="flex items-center gap-1.5 text-[10px] uppercase tracking-wider font-bold text-amber-500" title={source.health_detail || ''}>
+                                            <Activity size={12} />
+                                            Inestable
+                                        </span>
+                                    )}
+                                    {source.health_status === 'DOWN' && (
+                                        <span className="flex items-center gap-1.5 text-[10px] uppercase tracking-wider font-bold text-red-500" title={source.health_detail || ''}>
+                                            <AlertCircle size={12} />
+                                            Caída
+                                        </span>
+                                    )}
                                 </div>
 
+                                {source.health_detail && source.health_status !== 'OK' && (
+                                    <p className="text-[10px] text-gray-500 dark:text-gray-400 line-clamp-2 mb-2" title={source.health_detail}>
+                                        {source.health_detail}
+                                    </p>
+                                )}
+
                                 <p className="text-[11px] text-gray-500 dark:text-gray-400 truncate font-mono bg-gray-50 dark:bg-gray-900/50 p-2 rounded-lg border border-gray-100/50 dark:border-gray-800/50" title={source.config.url}>
                                     {source.config.url}
                                 </p>
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { useToast } from '../context/ToastContext';
-import { Trash2, RotateCcw, CheckSquare, Square, CheckCircle } from 'lucide-react';
+import { Trash2, RotateCcw, CheckSquare, Square, CheckCircle, Loader2 } from 'lucide-react';
 import { useHighlight } from '../context/HighlightContext';
 
 const Trash = () => {
@@ -9,13 +9,18 @@ const Trash = () => {
     const [newsItems, setNewsItems] = useState([]);
     const [loading, setLoading] = useState(true);
     const [selectedItems, setSelectedItems] = useState(new Set());
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
-    const fetchRejectedNews = async () => {
+    // The trash is paginated: each page ends with the cursor of the next one
+    const fetchRejectedNews = async (cursor = null) => {
+        const url = 'http://localhost:8000/api/news/rejected' + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : '');
         try {
-            const response = await fetch('http://localhost:8000/api/news/rejected');
+            const response = await fetch(url);
             if (response.ok) {
-                const data = await response.json();
-                setNewsItems(data);
+                const page = await response.json();
+                setNewsItems(prev => cursor ? [...prev, ...page.items] : page.items);
+                setNextCursor(page.next_cursor);
             }
         } catch (error) {
             console.error('Error fetching rejected news:', error);
@@ -25,6 +30,12 @@ const Trash = () => {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchRejectedNews(nextCursor);
+        setLoadingMore(false);
+    };
+
     const handleRestore = async (id) => {
         // Optimistic update
         setNewsItems(prev => prev.filter(item => item.id !== id));
@@ -120,19 +131,13 @@ const Trash = () => {
         if (!window.confirm('¿Estás seguro de vaciar la papelera? Esta acción no se puede deshacer.')) return;
 
         setNewsItems([]);
+        setNextCursor(null);
         setSelectedItems(new Set());
 
         try {
-            // Assuming we might want an endpoint for this, or just iterate. 
-            // For now, let's assume we iterate or have a bulk delete all.
-            // Since the user asked for "Vaciar Papelera", let's assume we use the batch delete with all IDs if no specific "empty" endpoint exists, 
-            // OR we can just implement it as batch delete of all current items.
-            // Ideally backend should have an empty endpoint, but batch delete all is safer for now without backend changes.
-            const allIds = newsItems.map(item => item.id);
-            const response = await fetch('http://localhost:8000/api/news/batch/delete', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ ids: allIds })
+            // Only the loaded pages are on screen, so empty the trash server-side
+            const response = await fetch('http://localhost:8000/api/news/rejected/all', {
+                method: 'DELETE'
             });
 
             if (response.ok) {
@@ -295,6 +300,19 @@ const Trash = () => {
                     </div>
                 </div>
             )}
+
+            {nextCursor && (
+                <div className="flex justify-center mt-4">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-4 py-2 bg-white dark:bg-gray-800 text-gray-700 dark:text-gray-300 border border-gray-200 dark:border-gray-700 rounded-lg hover:bg-gray-50 dark:hover:bg-gray-700 transition-colors flex items-center gap-2 text-sm font-medium"
+                    >
+                        {loadingMore && <Loader2 size={16} className="animate-spin" />}
+                        Cargar más
+                    </button>
+                </div>
+            )}
         </div>
     );
 };